@@ -1,4 +1,4 @@
 from backend.database import db
 from backend.models.user import User
 from backend.models.task import Task
-from backend.models.category import Category
\ No newline at end of file
+from backend.models.category import Category
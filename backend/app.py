@@ -1,14 +1,24 @@
+import logging
 import os
 from flask import Flask, send_from_directory
 from flask_cors import CORS
-from backend.database import db, init_models
+from backend.database import db, init_models, configure_engine, engine_options
 from backend.config import get_config
+from backend.cache import create_cache
+from backend.events import create_broker
+from backend.json_provider import create_json_provider
+from backend.replicas import create_router
 from backend.routes import create_routes
+from backend.shards import create_shard_router
 from backend.services.auth_service import AuthService
 from backend.services.task_service import TaskService
 from backend.services.category_service import CategoryService
+from backend.services.sync_service import SyncService
+from backend.services.token_revocations import create_revocations
 from sqlalchemy import text
 
+logger = logging.getLogger(__name__)
+
 
 def create_app(config_name=None):
     """Application factory pattern - create and configure the Flask app"""
@@ -17,31 +27,98 @@ def create_app(config_name=None):
 
     app = Flask(__name__, static_folder="../frontend")
     app.config.from_object(config_class)
+    app.json = create_json_provider(app)
 
     # Initialize extensions
+    app.config.setdefault(
+        "SQLALCHEMY_ENGINE_OPTIONS", engine_options(app.config)
+    )
     db.init_app(app)
+    replicas = create_router(app.config, engine_options)
+    if replicas is not None:
+        app.extensions["replicas"] = replicas
+    shards = create_shard_router(app.config, engine_options)
+    if shards is not None:
+        app.extensions["shards"] = shards
     CORS(app, origins="*")
     init_models()
 
     # Create database tables
     with app.app_context():
+        configure_engine(app)
         try:
             db.create_all()
-            print("✓ Database tables created successfully")
+            if shards is not None:
+                shards.create_all()
+            logger.info("Database tables created")
         except Exception as e:
-            print(f"✗ Error creating database tables: {e}")
+            logger.error("Error creating database tables: %s", e)
+    if shards is not None and shards.stranded_rows():
+        raise RuntimeError(
+            "the directory database (DATABASE_URL) holds tasks or categories "
+            "from before "
+            "SHARD_URLS was set; move them onto the shards with python -m "
+            "backend.rebalance --migrate"
+        )
+
+    with app.app_context():
+        engine = db.engine
 
     # Create services
     auth_service = AuthService(
         secret_key=app.config["SECRET_KEY"],
         algorithm=app.config["JWT_ALGORITHM"],
         expiration_hours=app.config["JWT_EXPIRATION_HOURS"],
+        token_cache_size=app.config["JWT_CACHE_SIZE"],
+        token_cache_ttl=app.config["JWT_CACHE_TTL_SECONDS"],
+        password_hash_method=app.config["PASSWORD_HASH_METHOD"],
+        shards=shards,
+        # Revoked tokens live where CACHE_BACKEND keeps the other per-user
+        # state
+        revocations=create_revocations(app.config, engine),
+    )
+    # Services and the response cache share the collection versions, so
+    # every write through a service invalidates the cached listings; the
+    # services also announce each write to the user's /events streams
+    response_cache = create_cache(app.config)
+    events = create_broker(app.config)
+    task_service = TaskService(
+        versions=response_cache.versions, events=events, shards=shards
     )
-    task_service = TaskService()
-    category_service = CategoryService()
+    category_service = CategoryService(
+        versions=response_cache.versions, events=events, shards=shards
+    )
+    sync_service = SyncService(
+        page_size=app.config["SYNC_PAGE_SIZE"],
+        overlap_seconds=app.config["SYNC_OVERLAP_SECONDS"],
+        shards=shards,
+    )
+    app.extensions["response_cache"] = response_cache
+    app.extensions["events"] = events
+    # For other entry points serving the same app (backend.asgi)
+    app.extensions["services"] = {
+        "auth": auth_service,
+        "tasks": task_service,
+        "categories": category_service,
+    }
+
+    # Optional features import their dependencies only when enabled
+    if app.config["METRICS_ENABLED"]:
+        from backend.metrics import init_metrics
+        app.extensions["metrics"] = init_metrics(
+            app, engine, response_cache, auth_service
+        )
+    if app.config["QUERY_PROFILING"]:
+        from backend.query_profiler import init_query_profiler
+        init_query_profiler(app, engine)
 
     # Register blueprints
-    app.register_blueprint(create_routes(auth_service, task_service, category_service))
+    app.register_blueprint(
+        create_routes(
+            auth_service, task_service, category_service, response_cache,
+            sync_service, events,
+        )
+    )
 
     # Static file route
     @app.route("/")
@@ -68,5 +145,6 @@ def create_app(config_name=None):
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     app = create_app()
-    app.run(host="0.0.0.0", port=5000, debug=True)
\ No newline at end of file
+    app.run(host="0.0.0.0", port=5000, debug=True)
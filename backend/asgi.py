@@ -0,0 +1,4 @@
+# ASGI entrypoint: uvicorn backend.asgi:app
+from backend.async_app import create_asgi_app
+
+app = create_asgi_app()
@@ -0,0 +1,521 @@
+"""
+ASGI serving mode.
+
+create_asgi_app() builds the Flask app as usual and wraps it in an ASGI
+application that serves the I/O-bound routes natively on the async services:
+
+    POST /register, POST /login
+    GET/POST /categories
+    GET/POST /tasks, GET/PUT/DELETE /tasks/<id>
+    GET /events
+
+A request waiting on the database then only holds a coroutine instead of a
+whole worker, so one process can keep thousands of slow connections open;
+an /events stream likewise only holds a coroutine while it waits.
+Every other route goes to the Flask app through asgiref's WSGI adapter (in a
+thread). Both halves share the services' collection versions, the response
+cache and the token cache, so ETags, cached listings and revoked tokens are
+consistent whichever half serves a request. The Flask request hooks (query
+profiling, per-endpoint metrics) only see the routes served by Flask.
+
+Run it side by side with the WSGI entry point, e.g.
+
+    uvicorn backend.asgi:app --port 8001
+    gunicorn backend.asgi:app -k uvicorn.workers.UvicornWorker
+
+The native routes need a file-backed SQLite database and no SHARD_URLS;
+otherwise the whole app is served through the WSGI adapter.
+"""
+import asyncio
+import json
+import logging
+import re
+import traceback
+from urllib.parse import parse_qsl
+
+from asgiref.wsgi import WsgiToAsgi
+from werkzeug.datastructures import MultiDict
+from werkzeug.http import parse_etags
+
+from backend.app import create_app
+from backend.async_database import (
+    async_session_factory, create_async_engine_for,
+)
+from backend.events import async_event_stream
+from backend.routes import (
+    etag_for, task_changes, task_expand, task_fields, task_filters,
+    task_listing,
+)
+from backend.serializers import (
+    CATEGORY_COLUMNS, serialize_categories, serialize_category, serialize_task,
+)
+from backend.services.async_services import (
+    AsyncAuthService, AsyncCategoryService, AsyncTaskService,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def create_asgi_app(config_name=None):
+    """Application factory of the ASGI serving mode."""
+    flask_app = create_app(config_name)
+    if "shards" in flask_app.extensions:
+        logger.warning(
+            "async routes do not support SHARD_URLS; serving everything "
+            "through WSGI"
+        )
+        return WsgiToAsgi(flask_app)
+    engine = create_async_engine_for(flask_app)
+    if engine is None:
+        logger.warning(
+            "async routes need a file-backed SQLite database; serving "
+            "everything through WSGI"
+        )
+        return WsgiToAsgi(flask_app)
+    return AsyncAPI(flask_app, engine)
+
+
+class Request:
+    """The parts of an ASGI http request the native routes use."""
+
+    def __init__(self, scope, body):
+        self.method = scope["method"]
+        self.path = scope["path"]
+        self.query_string = scope["query_string"].decode("latin-1")
+        self.args = MultiDict(
+            parse_qsl(self.query_string, keep_blank_values=True)
+        )
+        self.headers = {name.decode("latin-1").lower(): value.decode("latin-1")
+                        for name, value in scope["headers"]}
+        self.body = body
+        self.user_id = None
+        self.token = None
+
+    def get_json(self):
+        try:
+            data = json.loads(self.body) if self.body else None
+        except ValueError:
+            return None
+        return data if isinstance(data, dict) else None
+
+
+class Response:
+    def __init__(self, body=b"", status=200, headers=()):
+        self.body = body
+        self.status = status
+        self.headers = list(headers)
+
+
+class StreamingResponse(Response):
+    """A Response whose body is an async iterator of str chunks."""
+
+
+class AsyncAPI:
+    """ASGI app: native async routes in front of the Flask app."""
+
+    def __init__(self, flask_app, engine):
+        self.flask_app = flask_app
+        self.engine = engine
+        self.wsgi = WsgiToAsgi(flask_app)
+        self.dumps = flask_app.json.dumps
+        self.response_cache = flask_app.extensions["response_cache"]
+        self.events = flask_app.extensions["events"]
+        self.max_body = (
+            flask_app.config.get("MAX_CONTENT_LENGTH")
+            or flask_app.config["MAX_JSON_BODY_BYTES"]
+        )
+
+        services = flask_app.extensions["services"]
+        sessions = async_session_factory(engine)
+        self.auth_service = AsyncAuthService(
+            sessions,
+            services["auth"],
+            hash_workers=flask_app.config["PASSWORD_HASH_WORKERS"],
+        )
+        self.task_service = AsyncTaskService(sessions, services["tasks"])
+        self.category_service = AsyncCategoryService(
+            sessions, services["categories"]
+        )
+
+        # (method, path pattern, handler, requires a token)
+        self.routes = [
+            ("POST", re.compile(r"/register"), self.register, False),
+            ("POST", re.compile(r"/login"), self.login, False),
+            ("GET", re.compile(r"/categories"), self.get_categories, True),
+            ("POST", re.compile(r"/categories"), self.create_category, True),
+            ("GET", re.compile(r"/tasks"), self.get_tasks, True),
+            ("POST", re.compile(r"/tasks"), self.create_task, True),
+            ("GET", re.compile(r"/tasks/(\d+)"), self.get_task, True),
+            ("PUT", re.compile(r"/tasks/(\d+)"), self.update_task, True),
+            ("DELETE", re.compile(r"/tasks/(\d+)"), self.delete_task, True),
+            ("GET", re.compile(r"/events"), self.event_source, True),
+        ]
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self._lifespan(receive, send)
+
+        route = self._match(scope) if scope["type"] == "http" else None
+        if route is None:
+            return await self.wsgi(scope, receive, send)
+
+        handler, requires_token, params = route
+        body = await self._read_body(scope, receive)
+        if body is None:
+            return await self._send(
+                send, self.json({"error": "Request body too large"}, 413)
+            )
+        request = Request(scope, body)
+        try:
+            response = (
+                await self._authorize(request) if requires_token else None
+            )
+            if response is None:
+                response = await handler(request, *params)
+        except Exception as e:
+            print(
+                f"ERROR in {request.method} {request.path} (async): {str(e)}"
+            )
+            print(traceback.format_exc())
+            response = self.json(
+                {"error": f"Internal server error: {str(e)}"}, 500
+            )
+        if isinstance(response, StreamingResponse):
+            return await self._stream(send, receive, response)
+        await self._send(send, response)
+
+    # AUTH
+    async def register(self, request):
+        data = request.get_json() or {}
+        if not data.get("username") or not data.get("password"):
+            return self.json(
+                {"error": "Username and password are required"}, 400
+            )
+        try:
+            await self.auth_service.register_user(
+                data.get("username"), data.get("password")
+            )
+            return self.json({"message": "User created successfully"}, 201)
+        except (
+            self.auth_service.RegistrationError,
+            self.auth_service.AuthenticationError,
+        ) as e:
+            return self.json({"error": str(e)}, 400)
+
+    async def login(self, request):
+        data = request.get_json() or {}
+        if not data.get("username") or not data.get("password"):
+            return self.json(
+                {"error": "Username and password are required"}, 400
+            )
+        try:
+            user = await self.auth_service.authenticate_user(
+                data.get("username"), data.get("password")
+            )
+            return self.json(
+                {"token": self.auth_service.generate_token(user.id)}, 200
+            )
+        except self.auth_service.AuthenticationError as e:
+            return self.json({"error": str(e)}, 401)
+
+    # CATEGORY ENDPOINTS
+    async def get_categories(self, request):
+        etag = self._etag(
+            self.category_service.versions, "categories", request.user_id
+        )
+        if self._not_modified(request, etag):
+            return self._not_modified_response(etag)
+
+        async def render():
+            cats = await self.category_service.get_all_categories(
+                request.user_id, columns=CATEGORY_COLUMNS
+            )
+            return self._encode(serialize_categories(cats))
+
+        body = await self.response_cache.get_or_render_async(
+            request.user_id, "categories", "", render
+        )
+        return self._with_etag(
+            Response(body, 200, [(b"content-type", b"application/json")]), etag
+        )
+
+    async def create_category(self, request):
+        data = request.get_json() or {}
+        try:
+            cat = await self.category_service.create_category(
+                request.user_id, data.get("name"), data.get("description")
+            )
+            return self.json(serialize_category(cat), 201)
+        except self.category_service.CategoryValidationError as e:
+            msg = str(e)
+            if msg == "Duplicate category":
+                msg = "Category already exists"
+            return self.json({"error": msg}, 400)
+
+    # TASK ENDPOINTS
+    async def get_tasks(self, request):
+        etag = self._etag(
+            self.task_service.versions, "tasks", request.user_id,
+            request.query_string,
+        )
+        if self._not_modified(request, etag):
+            return self._not_modified_response(etag)
+
+        args = request.args
+        sort = args.get("sort", "priority")
+        expand = task_expand(args)
+        columns, serialize = task_listing(expand)
+
+        async def render():
+            # Paginated when the client asks for a page, full list otherwise
+            if "limit" in args or "cursor" in args:
+                tasks, next_cursor = await self.task_service.get_tasks_page(
+                    request.user_id,
+                    limit=args.get("limit"),
+                    cursor=args.get("cursor"),
+                    sort=sort,
+                    columns=columns,
+                    expand=expand,
+                    **task_filters(args)
+                )
+                return self._encode(
+                    {"tasks": serialize(tasks), "next_cursor": next_cursor}
+                )
+
+            tasks = await self.task_service.get_tasks(
+                request.user_id, sort=sort, columns=columns, expand=expand,
+                **task_filters(args),
+            )
+            return self._encode(serialize(tasks))
+
+        try:
+            body = await self.response_cache.get_or_render_async(
+                request.user_id, "tasks", request.query_string, render
+            )
+        except self.task_service.TaskValidationError as e:
+            return self.json({"error": str(e)}, 400)
+        return self._with_etag(
+            Response(body, 200, [(b"content-type", b"application/json")]), etag
+        )
+
+    async def create_task(self, request):
+        data = request.get_json() or {}
+        if data.get("category_id") is None:
+            return self.json({"error": "category is required"}, 400)
+        try:
+            task = await self.task_service.create_task(
+                request.user_id, **task_fields(data)
+            )
+            return self.json({"id": task.id, "message": "Task created"}, 201)
+        except self.task_service.TaskValidationError as e:
+            return self.json({"error": str(e)}, 400)
+
+    async def get_task(self, request, tid):
+        etag = self._etag(
+            self.task_service.versions, "tasks", request.user_id, tid
+        )
+        if self._not_modified(request, etag):
+            return self._not_modified_response(etag)
+        try:
+            t = await self.task_service.get_task(tid, request.user_id)
+            return self._with_etag(self.json(serialize_task(t), 200), etag)
+        except self.task_service.TaskNotFoundError:
+            return self.json({"error": "Not found"}, 404)
+
+    async def update_task(self, request, tid):
+        data = task_changes(request.get_json() or {})
+        try:
+            t = await self.task_service.update_task(
+                tid, user_id=request.user_id, **data
+            )
+            return self.json({"id": t.id, "title": t.title}, 200)
+        except self.task_service.TaskNotFoundError:
+            return self.json({"error": "Not found"}, 404)
+        except self.task_service.TaskValidationError as e:
+            return self.json({"error": str(e)}, 400)
+
+    async def delete_task(self, request, tid):
+        try:
+            await self.task_service.delete_task(tid, user_id=request.user_id)
+            return self.json({"message": "Task deleted"}, 200)
+        except self.task_service.TaskNotFoundError:
+            return self.json({"error": "Not found"}, 404)
+
+    # EVENTS
+    async def event_source(self, request):
+        if not self.flask_app.config.get("EVENTS_ENABLED", True):
+            return self.json({"error": "Not found"}, 404)
+        loop = asyncio.get_running_loop()
+        wake = asyncio.Event()
+
+        def notify():
+            try:
+                loop.call_soon_threadsafe(wake.set)
+            except RuntimeError:
+                # The loop is gone; the stream is being torn down
+                pass
+
+        stream = async_event_stream(
+            self.events.subscribe(request.user_id, notify),
+            wake,
+            heartbeat=self.flask_app.config.get(
+                "EVENTS_HEARTBEAT_SECONDS", 15
+            ),
+            max_seconds=self.flask_app.config.get("EVENTS_MAX_SECONDS", 25),
+        )
+        return StreamingResponse(stream, 200, [
+            (b"content-type", b"text/event-stream; charset=utf-8"),
+            (b"cache-control", b"no-cache"),
+            (b"x-accel-buffering", b"no"),
+        ])
+
+    # PLUMBING
+    def json(self, data, status):
+        return Response(
+            self._encode(data),
+            status,
+            [(b"content-type", b"application/json")],
+        )
+
+    def _encode(self, data):
+        return (self.dumps(data) + "\n").encode()
+
+    def _match(self, scope):
+        for method, pattern, handler, requires_token in self.routes:
+            if scope["method"] != method:
+                continue
+            match = pattern.fullmatch(scope["path"])
+            if match:
+                return (
+                    handler,
+                    requires_token,
+                    [int(group) for group in match.groups()],
+                )
+        return None
+
+    async def _authorize(self, request):
+        """
+        Set request.user_id from the bearer token; an error Response if that
+        fails.
+        """
+        auth_header = request.headers.get("authorization")
+        if not auth_header:
+            return self.json({"error": "Token is missing"}, 401)
+
+        parts = auth_header.split()
+        if len(parts) != 2 or parts[0].lower() != "bearer":
+            return self.json({"error": "Missing or invalid token"}, 401)
+
+        try:
+            request.user_id = await self.auth_service.verify_token(parts[1])
+        except self.auth_service.AuthenticationError:
+            return self.json({"error": "Invalid token"}, 401)
+        request.token = parts[1]
+        return None
+
+    def _etag(self, versions, collection, user_id, *parts):
+        # No ETags unless the cache backend shares its versions (see
+        # backend.cache)
+        if not self.response_cache.etags:
+            return None
+        return etag_for(versions, collection, user_id, *parts)
+
+    def _not_modified(self, request, etag):
+        return etag is not None and parse_etags(
+            request.headers.get("if-none-match")
+        ).contains(etag)
+
+    def _not_modified_response(self, etag):
+        return self._with_etag(Response(b"", 304), etag)
+
+    def _with_etag(self, response, etag):
+        if response.status in (200, 304) and etag is not None:
+            response.headers.append((b"etag", f'"{etag}"'.encode()))
+            # Browsers may keep the response but must revalidate it every time
+            response.headers.append((b"cache-control", b"private, no-cache"))
+        return response
+
+    async def _read_body(self, scope, receive):
+        """The request body, or None once it exceeds max_body bytes."""
+        for name, value in scope["headers"]:
+            if (
+                name.lower() == b"content-length"
+                and value.isdigit()
+                and int(value) > self.max_body
+            ):
+                return None
+        body = b""
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return body
+            body += message.get("body", b"")
+            if len(body) > self.max_body:
+                return None
+            if not message.get("more_body"):
+                return body
+
+    async def _send(self, send, response):
+        headers = response.headers + [
+            (b"content-length", str(len(response.body)).encode()),
+            # create_app enables CORS for every origin
+            (b"access-control-allow-origin", b"*"),
+        ]
+        await send(
+            {
+                "type": "http.response.start", "status": response.status,
+                "headers": headers,
+            }
+        )
+        await send({"type": "http.response.body", "body": response.body})
+
+    async def _stream(self, send, receive, response):
+        """Send a StreamingResponse until it ends or the client disconnects."""
+        headers = response.headers + [(b"access-control-allow-origin", b"*")]
+        await send(
+            {
+                "type": "http.response.start", "status": response.status,
+                "headers": headers,
+            }
+        )
+        disconnected = asyncio.ensure_future(self._disconnected(receive))
+        chunks = response.body.__aiter__()
+        try:
+            while True:
+                chunk = asyncio.ensure_future(chunks.__anext__())
+                await asyncio.wait(
+                    {chunk, disconnected}, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not chunk.done():
+                    # Client gone: stop the generator where it waits
+                    chunk.cancel()
+                    await asyncio.wait({chunk})
+                    return
+                try:
+                    body = chunk.result()
+                except StopAsyncIteration:
+                    break
+                await send(
+                    {
+                        "type": "http.response.body", "body": body.encode(),
+                        "more_body": True,
+                    }
+                )
+            await send({"type": "http.response.body", "body": b""})
+        finally:
+            disconnected.cancel()
+            await chunks.aclose()
+
+    async def _disconnected(self, receive):
+        while (await receive())["type"] != "http.disconnect":
+            pass
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.engine.dispose()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
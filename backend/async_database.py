@@ -0,0 +1,35 @@
+"""
+Async engine for the ASGI entry point, on the same database as the Flask
+app's engine. Only file-backed SQLite is supported (through aiosqlite): an
+in-memory database cannot be shared between the two engines, and other
+databases would need their own async driver.
+"""
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from backend.database import apply_sqlite_pragmas, db
+
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite"}
+
+
+def create_async_engine_for(app):
+    """
+    Return an AsyncEngine on app's database, or None if it cannot be shared.
+    """
+    with app.app_context():
+        # Flask-SQLAlchemy has already resolved relative SQLite paths
+        url = db.engine.url
+
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None or url.database in (None, "", ":memory:"):
+        return None
+
+    engine = create_async_engine(url.set(drivername=driver))
+    apply_sqlite_pragmas(
+        engine.sync_engine, app.config.get("SQLITE_PRAGMAS") or {}
+    )
+    return engine
+
+
+def async_session_factory(engine):
+    # Objects stay usable after commit; the async session cannot lazy-load them
+    return async_sessionmaker(engine, expire_on_commit=False)
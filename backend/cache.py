@@ -0,0 +1,233 @@
+"""
+Read-through cache for the serialized JSON of per-user listings.
+
+Two stores are provided:
+
+- LRUCache: in-process, bounded by entry count and total bytes, with TTLs.
+  Each process has its own, keyed by versions of this process, so it is
+  only correct when one process serves the app.
+- SharedCache: any Redis-compatible client (get/set/delete/incr/setnx), so
+  all workers share one cache and one set of versions. Anything with that
+  interface works, e.g. a local stand-in during development.
+
+Entries are keyed by the collection version from CollectionVersions, which
+the services bump on every write: a write makes the user's old entries
+unreachable immediately and they age out through the LRU/TTL. The same
+versions make the ETags, so without a cache (CACHE_BACKEND=none, the
+default) responses carry no ETag either: a version one worker bumped
+would be unknown to the others, which would keep answering 304.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from backend.services.collection_versions import (
+    default_versions, SharedCollectionVersions,
+)
+from backend.signals import cache_lookup
+
+
+class CacheStats:
+    """Hit/miss counters shared by the cache stores."""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def as_dict(self, size=None):
+        lookups = self.hits + self.misses
+        stats = {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+        if size is not None:
+            stats["size"] = size
+        return stats
+
+
+class LRUCache:
+    """In-process LRU of bytes values with a per-entry TTL."""
+
+    def __init__(self, max_entries=10000, max_bytes=64 * 1024 * 1024, ttl=300):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (value, expires_at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = CacheStats()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats.misses += 1
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self._stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        if len(value) > self.max_bytes:
+            return
+        expires_at = time.monotonic() + (ttl if ttl is not None else self.ttl)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, expires_at)
+            self._bytes += len(value)
+            while (
+                len(self._entries) > self.max_entries
+                or self._bytes > self.max_bytes
+            ):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._stats.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            stats = self._stats.as_dict(size=len(self._entries))
+            stats["bytes"] = self._bytes
+            return stats
+
+    def _remove(self, key):
+        value, _ = self._entries.pop(key)
+        self._bytes -= len(value)
+
+
+class SharedCache:
+    """Cache store on a Redis-compatible client shared by all workers."""
+
+    def __init__(
+        self, client, ttl=300, max_value_bytes=8 * 1024 * 1024,
+        prefix="todo:cache:",
+    ):
+        self.client = client
+        self.ttl = ttl
+        self.max_value_bytes = max_value_bytes
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._stats = CacheStats()
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        with self._lock:
+            if value is None:
+                self._stats.misses += 1
+            else:
+                self._stats.hits += 1
+        return value
+
+    def set(self, key, value, ttl=None):
+        if len(value) > self.max_value_bytes:
+            return
+        self.client.set(
+            self.prefix + key, value, ex=ttl if ttl is not None else self.ttl
+        )
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def stats(self):
+        with self._lock:
+            return self._stats.as_dict()
+
+
+class ResponseCache:
+    """
+    Serialized listings per user and collection, invalidated through the
+    collection versions. render() is only called on a miss. etags says
+    whether the versions may also back ETags and 304 responses.
+    """
+
+    def __init__(self, store, versions, etags=True):
+        self.store = store
+        self.versions = versions
+        self.etags = etags
+
+    def get_or_render(self, user_id, collection, variant, render, keep=None):
+        """
+        The cached body, else render()'s, which is stored unless keep()
+        (asked after rendering) says otherwise.
+        """
+        key, body = self._lookup(user_id, collection, variant)
+        if body is None:
+            body = render()
+            if keep is None or keep():
+                self.store.set(key, body)
+        return body
+
+    async def get_or_render_async(self, user_id, collection, variant, render):
+        """get_or_render for a coroutine function render (the ASGI routes)."""
+        key, body = self._lookup(user_id, collection, variant)
+        if body is None:
+            body = await render()
+            self.store.set(key, body)
+        return body
+
+    def stats(self):
+        return self.store.stats()
+
+    def _lookup(self, user_id, collection, variant):
+        version = self.versions.get(user_id, collection)
+        key = f"{collection}:{user_id}:{version}:{variant}"
+        body = self.store.get(key)
+        cache_lookup.send(self, collection=collection, hit=body is not None)
+        return key, body
+
+
+def create_cache(config):
+    """
+    Build the ResponseCache described by the app config (CACHE_BACKEND is
+    "memory", "shared" or "none"). Its versions must also be given to the
+    services so their writes invalidate it.
+    """
+    backend = config.get("CACHE_BACKEND", "none")
+    ttl = config.get("CACHE_TTL_SECONDS", 300)
+
+    if backend == "memory":
+        store = LRUCache(
+            max_entries=config.get("CACHE_MAX_ENTRIES", 10000),
+            max_bytes=config.get("CACHE_MAX_BYTES", 64 * 1024 * 1024),
+            ttl=ttl,
+        )
+        return ResponseCache(store, default_versions)
+    if backend == "shared":
+        client = shared_client(config)
+        return ResponseCache(
+            SharedCache(client, ttl=ttl), SharedCollectionVersions(client)
+        )
+    if backend == "none":
+        return ResponseCache(
+            LRUCache(max_entries=0), default_versions, etags=False
+        )
+    raise ValueError(f"Unknown CACHE_BACKEND: {backend}")
+
+
+def shared_client(config):
+    """Redis client for CACHE_URL; redis is only needed when this is used."""
+    try:
+        import redis
+    except ImportError:
+        raise RuntimeError(
+            "CACHE_BACKEND=shared requires the redis package"
+        ) from None
+    return redis.Redis.from_url(config["CACHE_URL"])
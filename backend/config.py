@@ -1,19 +1,184 @@
 import os
 
 
+def database_url():
+    """DATABASE_URL, defaulting to in-memory SQLite."""
+    url = os.getenv("DATABASE_URL", "sqlite:///:memory:")
+    # Hosting providers hand out postgres://, which SQLAlchemy does not accept
+    if url.startswith("postgres://"):
+        url = "postgresql://" + url[len("postgres://"):]
+    return url
+
+
 class Config:
     """Base configuration"""
     SECRET_KEY = os.getenv("SECRET_KEY", "dev-secret-key-change-in-production")
     JWT_ALGORITHM = "HS256"
     JWT_EXPIRATION_HOURS = int(os.getenv("JWT_EXPIRATION_HOURS", "24"))
+    # Verified tokens kept in memory so repeat requests skip the HMAC check and
+    # the revocation lookup; a logout in another process applies once the
+    # entry expires
+    JWT_CACHE_SIZE = int(os.getenv("JWT_CACHE_SIZE", "1024"))
+    JWT_CACHE_TTL_SECONDS = int(os.getenv("JWT_CACHE_TTL_SECONDS", "300"))
+    # werkzeug hash method with its cost, e.g. "scrypt:32768:8:1" or
+    # "pbkdf2:sha256:600000". Stored hashes made with other parameters are
+    # upgraded on the next successful login.
+    PASSWORD_HASH_METHOD = os.getenv(
+        "PASSWORD_HASH_METHOD", "scrypt:32768:8:1"
+    )
+    # ASGI mode (backend.asgi): size of the thread pool that computes
+    # password hashes off the event loop, capping how many run at once; 0
+    # uses the loop's default executor. The WSGI routes hash in the request
+    # thread, which a pool would only add a hop to.
+    PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "0"))
     APP_NAME = "To-Do Manager"
     APP_VERSION = "2.0.0"
     TESTING = False
     SQLALCHEMY_TRACK_MODIFICATIONS = False
-    
-    # Always use in-memory database for Azure
-    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
-    
+
+    # In-memory unless DATABASE_URL points somewhere else. An in-memory
+    # database is private to one process, so gunicorn then runs a single
+    # worker (backend/gunicorn_conf.py); use a file (e.g.
+    # sqlite:////app/data/tasks.db) to share one store between workers.
+    SQLALCHEMY_DATABASE_URI = database_url()
+
+    # Connection pool per process (see backend.database.engine_options). A
+    # server must accept workers x (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+    # connections; a request waits up to DB_POOL_TIMEOUT seconds for one.
+    # Server connections are checked before use (pre-ping) and replaced
+    # after DB_POOL_RECYCLE seconds, before a proxy or the server drops
+    # them. On PostgreSQL, statements are cancelled after
+    # DB_STATEMENT_TIMEOUT_MS and idle transactions after
+    # DB_IDLE_IN_TRANSACTION_TIMEOUT_MS (0 disables either).
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in (
+        "1", "true", "yes"
+    )
+    DB_CONNECT_TIMEOUT = int(os.getenv("DB_CONNECT_TIMEOUT", "10"))
+    DB_STATEMENT_TIMEOUT_MS = int(
+        os.getenv("DB_STATEMENT_TIMEOUT_MS", "15000")
+    )
+    DB_IDLE_IN_TRANSACTION_TIMEOUT_MS = int(
+        os.getenv("DB_IDLE_IN_TRANSACTION_TIMEOUT_MS", "60000")
+    )
+
+    # Comma-separated read replicas of DATABASE_URL (see backend/replicas.py).
+    # GET requests read from them in turn; a replica that fails its health
+    # check or lags more than REPLICA_MAX_LAG_SECONDS is skipped, and users
+    # read from the primary for that long after they wrote.
+    DATABASE_REPLICA_URLS = os.getenv("DATABASE_REPLICA_URLS", "")
+    REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "5"))
+    REPLICA_CHECK_INTERVAL_SECONDS = float(
+        os.getenv("REPLICA_CHECK_INTERVAL_SECONDS", "5")
+    )
+
+    # Tasks and categories split by user over shard databases, as
+    # comma-separated "name=url" entries (see backend/shards.py); DATABASE_URL
+    # then keeps the users and where each one is placed. Placements are
+    # cached for SHARD_PLACEMENT_TTL_SECONDS, a write of a user who is being
+    # moved waits up to SHARD_MOVE_WAIT_SECONDS, and each process reserves
+    # new ids SHARD_ID_BLOCK_SIZE at a time.
+    SHARD_URLS = os.getenv("SHARD_URLS", "")
+    SHARD_PLACEMENT_TTL_SECONDS = float(
+        os.getenv("SHARD_PLACEMENT_TTL_SECONDS", "5")
+    )
+    SHARD_MOVE_WAIT_SECONDS = float(os.getenv("SHARD_MOVE_WAIT_SECONDS", "30"))
+    SHARD_ID_BLOCK_SIZE = int(os.getenv("SHARD_ID_BLOCK_SIZE", "1000"))
+
+    # Applied on every new connection to a file-backed SQLite database.
+    # WAL lets readers run concurrently with the single writer, NORMAL sync
+    # only fsyncs at checkpoints, and busy_timeout makes writers from other
+    # workers wait for the lock instead of failing with "database is locked".
+    SQLITE_PRAGMAS = {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": int(
+            os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))
+        ),
+        "cache_size": int(
+            os.getenv("SQLITE_CACHE_SIZE", "-65536")
+        ),  # KiB when negative
+        "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    }
+    if os.getenv("SQLITE_TUNING", "on").lower() == "off":
+        SQLITE_PRAGMAS = {}
+
+    # Cache of serialized task/category listings, with the ETags that share
+    # its collection versions: "shared" (Redis-compatible server at
+    # CACHE_URL, for any number of workers), "memory" (this process only; a
+    # single worker) or "none", which also turns ETags off
+    CACHE_BACKEND = os.getenv("CACHE_BACKEND", "none")
+    CACHE_URL = os.getenv("CACHE_URL", "redis://localhost:6379/0")
+    CACHE_TTL_SECONDS = int(os.getenv("CACHE_TTL_SECONDS", "300"))
+    CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+    CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+    # Change notifications of GET /events: "memory" reaches the streams of
+    # this process, "shared" relays through pub/sub on EVENTS_URL so every
+    # worker's streams see every write. A stream sends a heartbeat after
+    # EVENTS_HEARTBEAT_SECONDS of silence, ends after EVENTS_MAX_SECONDS (the
+    # client reconnects; keep it below GUNICORN_TIMEOUT) and holds at most
+    # EVENTS_QUEUE_SIZE undelivered events. Under gunicorn sync workers, where
+    # a stream would tie up a whole worker, or with several workers and no
+    # shared broker, EVENTS_ENABLED is turned off and /events answers 404.
+    EVENTS_ENABLED = os.getenv("EVENTS_ENABLED", "true").lower() in (
+        "1", "true", "yes"
+    )
+    EVENTS_BACKEND = os.getenv("EVENTS_BACKEND", "memory")
+    EVENTS_URL = os.getenv("EVENTS_URL", CACHE_URL)
+    EVENTS_HEARTBEAT_SECONDS = float(
+        os.getenv("EVENTS_HEARTBEAT_SECONDS", "15")
+    )
+    EVENTS_MAX_SECONDS = float(os.getenv("EVENTS_MAX_SECONDS", "25"))
+    EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "100"))
+
+    # "auto" uses orjson when it is installed, else the stdlib encoder
+    JSON_PROVIDER = os.getenv("JSON_PROVIDER", "auto")
+
+    # Largest request body in bytes; unset, Flask reads bodies of any size
+    # (POST /tasks/import streams its body) and the native ASGI routes,
+    # which only take small JSON objects, stop at MAX_JSON_BODY_BYTES
+    MAX_CONTENT_LENGTH = (
+        int(os.environ["MAX_CONTENT_LENGTH"])
+        if os.getenv("MAX_CONTENT_LENGTH")
+        else None
+    )
+    MAX_JSON_BODY_BYTES = int(
+        os.getenv("MAX_JSON_BODY_BYTES", str(1024 * 1024))
+    )
+
+    # Largest number of items accepted by the /tasks/batch endpoints
+    MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "5000"))
+    # Rows fetched per round trip by the streaming export
+    EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+    # Rows inserted per transaction by POST /tasks/import
+    IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "500"))
+    # Rows per collection returned by one GET /sync page, and how far before
+    # its start a finished sync resumes, to catch transactions that commit late
+    SYNC_PAGE_SIZE = int(os.getenv("SYNC_PAGE_SIZE", "1000"))
+    SYNC_OVERLAP_SECONDS = float(os.getenv("SYNC_OVERLAP_SECONDS", "5"))
+
+    # Prometheus exporter at /metrics; set PROMETHEUS_MULTIPROC_DIR as well
+    # when running several gunicorn workers
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() in (
+        "1", "true", "yes"
+    )
+
+    # Development aid: X-Query-Count and Server-Timing headers on every
+    # response, and a warning when a request repeats a statement this often
+    QUERY_PROFILING = os.getenv("QUERY_PROFILING", "false").lower() in (
+        "1", "true", "yes"
+    )
+    QUERY_REPEAT_THRESHOLD = int(os.getenv("QUERY_REPEAT_THRESHOLD", "5"))
+
+    # Seconds a fresh interpreter may spend importing backend.app and running
+    # create_app(); enforced by tests/unit/test_startup.py, reported by
+    # python -m benchmarks.startup
+    STARTUP_BUDGET_SECONDS = float(os.getenv("STARTUP_BUDGET_SECONDS", "2.0"))
+
     CORS_ORIGINS = ["*"]
 
 
@@ -21,12 +186,17 @@ class TestingConfig(Config):
     """Testing configuration"""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    # Cheap hashing keeps the auth tests fast
+    PASSWORD_HASH_METHOD = "pbkdf2:sha256:1000"
+    QUERY_PROFILING = True
+    # One process, so the in-process cache and ETags are safe
+    CACHE_BACKEND = "memory"
 
 
 class ProductionConfig(Config):
     """Production configuration"""
-    # In-memory database - data is temporary but works on Azure
-    SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    # Falls back to an in-memory database (data is temporary but works on
+    # Azure) when no DATABASE_URL is set
 
 
 def get_config(name):
@@ -36,4 +206,4 @@ def get_config(name):
         "production": ProductionConfig,
         "development": Config,
     }
-    return configs.get(name, Config)
\ No newline at end of file
+    return configs.get(name, Config)
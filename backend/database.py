@@ -1,13 +1,160 @@
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+from backend.replicas import RoutingSession
+from backend.signals import pool_checkout
+
+# RoutingSession sends the reads of GET requests to the read replicas, if any
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 
-db = SQLAlchemy()
 
-# Import models so tests can import them from here
-from backend.models.user import User
-from backend.models.task import Task
-from backend.models.category import Category
+def utcnow():
+    """
+    The current time as a naive UTC datetime, the form timestamps are stored
+    in.
+    """
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
 
 def init_models():
     pass
 
-__all__ = ["db", "User", "Task", "Category", "init_models"]
\ No newline at end of file
+
+# Per thread: whether InstrumentedQueuePool is timing a checkout
+_checkout = threading.local()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that reports how long every checkout waited for a connection
+    (including opening a new one) through the pool_checkout signal.
+    """
+
+    def _do_get(self):
+        # QueuePool._do_get retries by calling itself; time the outer call only
+        if getattr(_checkout, "active", False):
+            return super()._do_get()
+        _checkout.active = True
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            pool_checkout.send(
+                self._dialect, seconds=time.perf_counter() - started,
+                timed_out=True,
+            )
+            raise
+        finally:
+            _checkout.active = False
+        pool_checkout.send(
+            self._dialect, seconds=time.perf_counter() - started,
+            timed_out=False,
+        )
+        return connection
+
+
+# libpq-based PostgreSQL drivers, which accept server settings in "options"
+LIBPQ_DRIVERS = ("psycopg2", "psycopg")
+
+
+def engine_options(config):
+    """
+    SQLALCHEMY_ENGINE_OPTIONS for the configured database. In-memory SQLite
+    keeps SQLAlchemy's single shared connection. A SQLite file gets a
+    bounded, instrumented pool. A database server additionally gets
+    pre-ping and recycling, so that connections dropped by the server or a
+    proxy are replaced before use, and, on PostgreSQL, a statement timeout.
+    """
+    url = make_url(config["SQLALCHEMY_DATABASE_URI"])
+    if url.get_backend_name() == "sqlite" and url.database in (
+        None, "", ":memory:"
+    ):
+        return {}
+
+    options = {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": config.get("DB_POOL_SIZE", 5),
+        "max_overflow": config.get("DB_MAX_OVERFLOW", 10),
+        "pool_timeout": config.get("DB_POOL_TIMEOUT", 30),
+    }
+    if url.get_backend_name() == "sqlite":
+        return options
+
+    options["pool_pre_ping"] = config.get("DB_POOL_PRE_PING", True)
+    options["pool_recycle"] = config.get("DB_POOL_RECYCLE", 1800)
+    if (
+        url.get_backend_name() == "postgresql"
+        and url.get_driver_name() in LIBPQ_DRIVERS
+    ):
+        settings = []
+        statement_timeout = config.get("DB_STATEMENT_TIMEOUT_MS")
+        idle_timeout = config.get("DB_IDLE_IN_TRANSACTION_TIMEOUT_MS")
+        if statement_timeout:
+            settings.append(f"-c statement_timeout={statement_timeout}")
+        if idle_timeout:
+            settings.append(
+                f"-c idle_in_transaction_session_timeout={idle_timeout}"
+            )
+        options["connect_args"] = {
+            "connect_timeout": config.get("DB_CONNECT_TIMEOUT", 10)
+        }
+        if settings:
+            options["connect_args"]["options"] = " ".join(settings)
+    return options
+
+
+def configure_engine(app):
+    """
+    Prepare the engine of the current app for a file-backed SQLite database:
+    create the parent directory of the file and apply SQLITE_PRAGMAS to every
+    new connection. Other databases (and :memory:) are left untouched.
+    Must be called inside an app context, before the first connection.
+    """
+    url = db.engine.url
+    if url.get_backend_name() != "sqlite" or url.database in (
+        None, "", ":memory:"
+    ):
+        return
+
+    directory = os.path.dirname(url.database)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    apply_sqlite_pragmas(db.engine, app.config.get("SQLITE_PRAGMAS") or {})
+
+
+def apply_sqlite_pragmas(engine, pragmas):
+    """
+    Run PRAGMA name=value for each of pragmas on every new connection of
+    engine.
+    """
+    if not pragmas:
+        return
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+# Import models so tests can import them from here (and their tables are in
+# db.metadata before create_all()); they import db and utcnow from above
+from backend.models.user import User, RevokedToken  # noqa: E402,F401
+from backend.models.task import Task  # noqa: E402
+from backend.models.category import Category  # noqa: E402
+from backend.models.shard import ShardPlacement, IdBlock  # noqa: E402,F401
+
+__all__ = [
+    "db", "User", "Task", "Category", "init_models", "configure_engine",
+    "apply_sqlite_pragmas", "utcnow", "InstrumentedQueuePool",
+    "engine_options",
+]
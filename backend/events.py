@@ -0,0 +1,299 @@
+"""
+Change notifications pushed to clients over Server-Sent Events (GET /events).
+
+Every write through TaskService/CategoryService publishes a "changed" event
+naming the user's collections it touched; each open /events stream of that
+user receives it and the client fetches the changes (GET /sync), so it no
+longer has to poll.
+
+EventBroker fans events out within one process. Each stream gets a
+Subscription with a bounded queue: a client that falls behind is not
+allowed to grow it, its pending events are replaced by a single "resync"
+event telling it to refetch everything. With several workers,
+SharedEventBroker relays the events through a Redis-compatible pub/sub
+channel so a stream receives writes made in any worker.
+"""
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+RESYNC = ("resync", {})
+
+
+class Subscription:
+    """One stream's queue of (event, data) pairs, filled by the broker."""
+
+    def __init__(self, broker, user_id, max_pending=100, notify=None):
+        self.broker = broker
+        self.user_id = user_id
+        self.max_pending = max_pending
+        self.dropped = 0
+        # Called after every delivery; async streams use it to wake their loop
+        self._notify = notify
+        self._events = deque()
+        self._resync_pending = False
+        self._ready = threading.Condition()
+
+    def put(self, event):
+        with self._ready:
+            if self._resync_pending:
+                # The client will refetch everything anyway
+                self.dropped += 1
+                return
+            if event is RESYNC or len(self._events) >= self.max_pending:
+                self.dropped += len(self._events) + (event is not RESYNC)
+                self._events.clear()
+                self._events.append(RESYNC)
+                self._resync_pending = True
+            else:
+                self._events.append(event)
+            self._ready.notify()
+        if self._notify is not None:
+            self._notify()
+
+    def get(self, timeout=None):
+        """
+        Next event, waiting up to timeout seconds; None if there was none.
+        """
+        with self._ready:
+            if not self._events:
+                self._ready.wait(timeout)
+            return self._pop()
+
+    def get_nowait(self):
+        with self._ready:
+            return self._pop()
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+    def _pop(self):
+        if not self._events:
+            return None
+        event = self._events.popleft()
+        if event is RESYNC:
+            self._resync_pending = False
+        return event
+
+
+class EventBroker:
+    """In-process pub/sub of per-user events."""
+
+    def __init__(self, max_pending=100):
+        self.max_pending = max_pending
+        self._subscriptions = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, user_id, notify=None):
+        subscription = Subscription(self, user_id, self.max_pending, notify)
+        with self._lock:
+            self._subscriptions.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.user_id]
+
+    def publish(self, user_id, event, data):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(user_id, ()))
+        for subscription in subscriptions:
+            subscription.put((event, data))
+
+    def changed(self, user_id, *collections):
+        """Publish that the user's collections changed."""
+        self.publish(user_id, "changed", {"collections": list(collections)})
+
+    def stream_count(self):
+        with self._lock:
+            return sum(
+                len(subscriptions)
+                for subscriptions in self._subscriptions.values()
+            )
+
+
+# Shared by every service in the process unless one is passed explicitly
+default_broker = EventBroker()
+
+
+class SharedEventBroker(EventBroker):
+    """
+    EventBroker whose events travel through a pub/sub channel on a
+    Redis-compatible client, so every worker's streams see every worker's
+    writes. publish() only sends to the channel; a listener thread started
+    with the first stream of the process delivers what arrives on it.
+    """
+
+    def __init__(self, client, channel="todo:events", max_pending=100):
+        super().__init__(max_pending)
+        self.client = client
+        self.channel = channel
+        self._listener_pid = None
+
+    def subscribe(self, user_id, notify=None):
+        self._ensure_listener()
+        return super().subscribe(user_id, notify)
+
+    def publish(self, user_id, event, data):
+        message = json.dumps(
+            {"user_id": user_id, "event": event, "data": data}
+        )
+        try:
+            self.client.publish(self.channel, message)
+        except Exception as e:
+            # A lost notification only delays clients until their next sync
+            logger.warning("could not publish %s event: %s", event, e)
+
+    def _ensure_listener(self):
+        # Threads do not survive a fork, so each worker starts its own
+        with self._lock:
+            if self._listener_pid == os.getpid():
+                return
+            self._listener_pid = os.getpid()
+        pubsub = self._open_channel()
+        threading.Thread(
+            target=self._listen, args=(pubsub,), name="event-listener",
+            daemon=True,
+        ).start()
+
+    def _open_channel(self):
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self.channel)
+        return pubsub
+
+    def _listen(self, pubsub):
+        while True:
+            try:
+                if pubsub is None:
+                    pubsub = self._open_channel()
+                    # Events sent while the channel was down are lost
+                    self._resync_all()
+                for message in pubsub.listen():
+                    self._deliver(message)
+            except Exception as e:
+                logger.warning("event channel failed, reconnecting: %s", e)
+            pubsub = None
+            time.sleep(1)
+
+    def _deliver(self, message):
+        if message.get("type") != "message":
+            return
+        try:
+            payload = json.loads(message["data"])
+            EventBroker.publish(
+                self, payload["user_id"], payload["event"], payload["data"]
+            )
+        except (ValueError, KeyError, TypeError):
+            logger.warning(
+                "ignoring malformed event message: %r", message.get("data")
+            )
+
+    def _resync_all(self):
+        with self._lock:
+            subscriptions = [
+                s
+                for subscriptions in self._subscriptions.values()
+                for s in subscriptions
+            ]
+        for subscription in subscriptions:
+            subscription.put(RESYNC)
+
+
+def create_broker(config):
+    """
+    The EventBroker described by the app config (EVENTS_BACKEND "memory" or
+    "shared").
+    """
+    backend = config.get("EVENTS_BACKEND", "memory")
+    max_pending = config.get("EVENTS_QUEUE_SIZE", 100)
+    if backend == "memory":
+        return EventBroker(max_pending)
+    if backend == "shared":
+        from backend.cache import shared_client
+
+        return SharedEventBroker(
+            shared_client({"CACHE_URL": config["EVENTS_URL"]}),
+            max_pending=max_pending,
+        )
+    raise ValueError(f"Unknown EVENTS_BACKEND: {backend}")
+
+
+def format_event(event, data):
+    """One SSE message."""
+    return (
+        f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+    )
+
+
+# First message of every stream: how long EventSource waits before it
+# reconnects, and a "ready" event on which the client syncs, to catch up on
+# what changed while it was not connected
+PREAMBLE = "retry: 3000\n" + format_event("ready", {})
+HEARTBEAT = ": heartbeat\n\n"
+
+
+def event_stream(subscription, heartbeat=15, max_seconds=300):
+    """
+    SSE text for a subscription, for a WSGI response: events as they come,
+    a comment line every heartbeat seconds of silence (keeps proxies from
+    closing the connection and detects clients that went away), and the end
+    of the stream after max_seconds, when the client reconnects. Closing
+    the generator (the client disconnected) ends the subscription.
+    """
+    deadline = time.monotonic() + max_seconds
+    try:
+        yield PREAMBLE
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            event = subscription.get(timeout=min(heartbeat, remaining))
+            if event is None:
+                yield HEARTBEAT
+                continue
+            chunks = [format_event(*event)]
+            # Send whatever else is queued in the same write
+            while (event := subscription.get_nowait()) is not None:
+                chunks.append(format_event(*event))
+            yield "".join(chunks)
+    finally:
+        subscription.close()
+
+
+async def async_event_stream(
+    subscription, wake, heartbeat=15, max_seconds=300
+):
+    """
+    event_stream for an asyncio server: wake is the asyncio.Event that the
+    subscription's notify sets (from whichever thread published).
+    """
+    deadline = time.monotonic() + max_seconds
+    try:
+        yield PREAMBLE
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                await asyncio.wait_for(wake.wait(), min(heartbeat, remaining))
+            except asyncio.TimeoutError:
+                yield HEARTBEAT
+                continue
+            wake.clear()
+            chunks = []
+            while (event := subscription.get_nowait()) is not None:
+                chunks.append(format_event(*event))
+            if chunks:
+                yield "".join(chunks)
+    finally:
+        subscription.close()
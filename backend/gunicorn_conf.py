@@ -0,0 +1,224 @@
+"""
+Gunicorn settings for production:
+
+    gunicorn -c python:backend.gunicorn_conf backend.wsgi:app
+
+Every setting can be overridden from the environment:
+
+- GUNICORN_BIND          address to listen on (default 0.0.0.0:$PORT,
+                         PORT=8000)
+- WEB_CONCURRENCY        worker processes (default 2 x CPUs + 1, or 1, see
+                         below)
+- GUNICORN_WORKER_CLASS  gthread (default), sync, or gevent (needs gevent
+                         installed); sync workers do not serve /events (404)
+- GUNICORN_THREADS       threads per gthread worker (default 4; 1 with an
+                         in-memory database)
+- GUNICORN_PRELOAD       load the app once in the master and fork it
+                         (default on)
+- GUNICORN_MAX_REQUESTS  recycle a worker after this many requests (default
+                         1000, 0 = never; never with an in-memory database)
+- GUNICORN_MAX_REQUESTS_JITTER
+                         random extra requests, so workers do not restart
+                         together
+- GUNICORN_TIMEOUT       seconds before a silent worker is killed (default
+                         30); must be more than the app's EVENTS_MAX_SECONDS
+- WARMUP                 run backend.warmup before the workers start
+                         (default on)
+
+With preload the app, its schema and the warmed caches are created once in
+the master and shared with the workers copy-on-write; connections opened
+during startup are dropped in post_fork so no two processes share one.
+
+Several workers only see each other's writes when nothing the app serves
+from lives in one process: the database must be a file or a server (not
+the in-memory default) and CACHE_BACKEND must not be memory. Otherwise one
+worker is started, and asking for more is refused. An in-memory database
+also lives in the worker, in one connection all its threads would share
+(and so share transactions): that worker runs one thread and is never
+recycled. /events needs EVENTS_BACKEND=shared to reach every worker; with
+several workers and another broker it is turned off, with a warning.
+"""
+import logging
+import multiprocessing
+import os
+
+from sqlalchemy.engine import make_url
+
+from backend.config import get_config
+
+
+def _env_flag(name, default):
+    return os.getenv(name, default).lower() in ("1", "true", "yes", "on")
+
+
+def _in_memory(database_uri):
+    url = make_url(database_uri)
+    return url.get_backend_name() == "sqlite" and url.database in (
+        None, "", ":memory:"
+    )
+
+
+def _process_local_state(config):
+    """
+    What the app configured by config keeps in each process, as readable
+    reasons.
+    """
+    reasons = []
+    if _in_memory(config.SQLALCHEMY_DATABASE_URI):
+        reasons.append("an in-memory database (set DATABASE_URL)")
+    if config.CACHE_BACKEND == "memory":
+        reasons.append("CACHE_BACKEND=memory")
+    return reasons
+
+
+app_config = get_config(os.getenv("FLASK_ENV", "production"))
+# A sync worker is busy for as long as it serves a request, so a stream
+# would take the worker out of service (and be killed at the timeout)
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+process_local = _process_local_state(app_config)
+memory_database = _in_memory(app_config.SQLALCHEMY_DATABASE_URI)
+
+bind = os.getenv("GUNICORN_BIND", f"0.0.0.0:{os.getenv('PORT', '8000')}")
+workers = int(
+    os.getenv(
+        "WEB_CONCURRENCY",
+        1 if process_local else multiprocessing.cpu_count() * 2 + 1,
+    )
+)
+if workers > 1 and process_local:
+    raise RuntimeError(
+        f"WEB_CONCURRENCY={workers}: workers would not see each other's data "
+        "with "
+        + ", ".join(process_local)
+        + "; run one worker or share that state"
+    )
+threads = (
+    int(os.getenv("GUNICORN_THREADS", "1" if memory_database else "4"))
+    if worker_class == "gthread"
+    else 1
+)
+if threads > 1 and memory_database:
+    raise RuntimeError(
+        f"GUNICORN_THREADS={threads}: the threads would share the in-memory "
+        "database's one "
+        "connection, and each other's transactions; set DATABASE_URL or "
+        "GUNICORN_THREADS=1"
+    )
+# A stream on a process-local broker only hears the writes of its own worker
+events_unshared = workers > 1 and app_config.EVENTS_BACKEND != "shared"
+events_served = (
+    app_config.EVENTS_ENABLED
+    and worker_class != "sync"
+    and not events_unshared
+)
+if worker_class == "gevent":
+    worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", "1000"))
+
+preload_app = _env_flag("GUNICORN_PRELOAD", "on")
+max_requests = int(
+    os.getenv("GUNICORN_MAX_REQUESTS", "0" if memory_database else "1000")
+)
+if max_requests and memory_database:
+    raise RuntimeError(
+        "GUNICORN_MAX_REQUESTS: a recycled worker would start over from the "
+        "master's empty "
+        "in-memory database; set DATABASE_URL or GUNICORN_MAX_REQUESTS=0"
+    )
+max_requests_jitter = int(
+    os.getenv("GUNICORN_MAX_REQUESTS_JITTER", str(max_requests // 10))
+)
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+if events_served and app_config.EVENTS_MAX_SECONDS >= timeout:
+    raise RuntimeError(
+        f"EVENTS_MAX_SECONDS={app_config.EVENTS_MAX_SECONDS:g} must be less "
+        f"than GUNICORN_TIMEOUT={timeout}"
+    )
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-")
+errorlog = "-"
+loglevel = os.getenv("LOG_LEVEL", "info")
+
+warmup_enabled = _env_flag("WARMUP", "on")
+
+# Set up when gunicorn reads this file, i.e. before the app is preloaded:
+# the app's own loggers (backend.*) write to stderr in gunicorn's format
+_handler = logging.StreamHandler()
+_handler.setFormatter(
+    logging.Formatter(
+        "[%(asctime)s] [%(process)d] [%(levelname)s] %(name)s: %(message)s",
+        "%Y-%m-%d %H:%M:%S %z",
+    )
+)
+_app_logger = logging.getLogger("backend")
+_app_logger.addHandler(_handler)
+_app_logger.setLevel(loglevel.upper())
+_app_logger.propagate = False
+if app_config.EVENTS_ENABLED and events_unshared:
+    _app_logger.warning(
+        "/events is OFF: EVENTS_BACKEND=%s cannot reach %d workers; set "
+        "EVENTS_BACKEND=shared",
+        app_config.EVENTS_BACKEND,
+        workers,
+    )
+
+# and multiprocess metrics need an existing directory without stale files
+_metrics_dir = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+if _metrics_dir:
+    os.makedirs(_metrics_dir, exist_ok=True)
+    for _name in os.listdir(_metrics_dir):
+        if _name.endswith(".db"):
+            os.remove(os.path.join(_metrics_dir, _name))
+
+
+def _flask_app(wsgi):
+    # backend.asgi wraps the Flask app; uvicorn workers hand us the wrapper
+    return getattr(wsgi, "flask_app", wsgi)
+
+
+def when_ready(server):
+    # Runs in the master once the app is preloaded, before any worker forks
+    if preload_app and warmup_enabled:
+        from backend.warmup import warmup
+
+        warmup(_flask_app(server.app.wsgi()))
+
+
+def post_fork(server, worker):
+    # A connection opened in the master must not be used by two processes.
+    # An in-memory SQLite database lives in its connection, so it is kept:
+    # each worker continues with its own copy of the preloaded schema.
+    if not preload_app:
+        return
+    from backend.database import db
+
+    app = _flask_app(server.app.wsgi())
+    with app.app_context():
+        if db.engine.url.database not in (None, "", ":memory:"):
+            db.engine.dispose(close=False)
+    replicas = app.extensions.get("replicas")
+    if replicas is not None:
+        replicas.dispose(close=False)
+    shards = app.extensions.get("shards")
+    if shards is not None:
+        shards.dispose(close=False)
+
+
+def post_worker_init(worker):
+    from gunicorn.workers.sync import SyncWorker
+
+    app = _flask_app(worker.wsgi)
+    # Also catches a worker class given on the command line (-k sync)
+    if not events_served or isinstance(worker, SyncWorker):
+        app.config["EVENTS_ENABLED"] = False
+    if not preload_app and warmup_enabled:
+        from backend.warmup import warmup
+
+        warmup(app)
+
+
+def child_exit(server, worker):
+    from backend.metrics import child_exit as metrics_child_exit
+
+    metrics_child_exit(server, worker)
@@ -0,0 +1,58 @@
+"""
+JSON provider of the app.
+
+Both providers encode datetimes as ISO 8601 (the format the API has always
+used for due_date). OrjsonProvider uses orjson, which is several times
+faster than the stdlib encoder on large listings; it is optional and
+JSON_PROVIDER="auto" picks it only when it is installed.
+"""
+from datetime import date
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+class StdlibJSONProvider(DefaultJSONProvider):
+    """Flask's default provider with ISO 8601 dates."""
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, date):
+            return o.isoformat()
+        return DefaultJSONProvider.default(o)
+
+
+class OrjsonProvider(StdlibJSONProvider):
+    """Encodes with orjson; falls back to the stdlib for formatting options."""
+
+    def dumps(self, obj, **kwargs):
+        # indent/separators (debug mode) and similar options are stdlib only
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        option = orjson.OPT_SORT_KEYS if self.sort_keys else 0
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+
+def create_json_provider(app):
+    """
+    The provider selected by JSON_PROVIDER ("auto", "orjson" or "stdlib").
+    """
+    choice = app.config.get("JSON_PROVIDER", "auto")
+    if choice == "orjson" or (choice == "auto" and orjson is not None):
+        if orjson is None:
+            raise RuntimeError(
+                "JSON_PROVIDER=orjson requires the orjson package"
+            )
+        return OrjsonProvider(app)
+    if choice in ("auto", "stdlib"):
+        return StdlibJSONProvider(app)
+    raise ValueError(f"Unknown JSON_PROVIDER: {choice}")
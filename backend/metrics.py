@@ -0,0 +1,232 @@
+"""
+Prometheus instrumentation installed by create_app.
+
+prometheus_flask_exporter provides the flask_http_request_* metrics used by
+monitoring/grafana-dashboard.json (latency histogram per endpoint, request
+and exception counters) and serves /metrics. On top of that this module
+records:
+
+- todo_http_requests_in_flight          requests being handled, per endpoint
+- todo_db_queries_total                 SQL statements, by operation
+- todo_db_query_duration_seconds        SQL statement latency, by operation
+- todo_cache_requests_total             response cache lookups, by collection
+                                        and result
+- todo_jwt_verify_duration_seconds      token verification latency, by result
+- todo_db_pool_checkout_wait_seconds    time a request waited for a pooled
+                                        connection
+- todo_db_pool_checkout_timeouts_total  checkouts that gave up after
+                                        DB_POOL_TIMEOUT
+- todo_db_pool_connections_in_use       connections checked out of the pool
+- todo_db_pool_capacity                 pool size plus overflow
+- todo_db_pool_saturation               in use / capacity (the highest
+                                        worker's)
+
+The pool metrics are recorded for pooled databases (a SQLite file or a
+database server), not for in-memory SQLite.
+
+Under gunicorn with several workers set PROMETHEUS_MULTIPROC_DIR to an empty
+directory shared by the workers (and call child_exit from the gunicorn
+config); /metrics then aggregates the values of every worker.
+"""
+import os
+import threading
+import time
+
+from flask import g, request
+from prometheus_client import (
+    CollectorRegistry, Counter, Gauge, Histogram, PlatformCollector,
+    ProcessCollector,
+)
+from prometheus_flask_exporter import PrometheusMetrics
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+from backend.signals import cache_lookup, pool_checkout, token_verified
+
+DB_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0
+)
+JWT_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.01
+)
+POOL_BUCKETS = (
+    0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+    10.0, 30.0,
+)
+
+
+def multiprocess_enabled():
+    return bool(os.getenv("PROMETHEUS_MULTIPROC_DIR"))
+
+
+class AppMetrics:
+    """
+    The app's own metrics, registered in registry (None in multiprocess mode).
+    """
+
+    def __init__(self, registry):
+        self.in_flight = Gauge(
+            "todo_http_requests_in_flight", "Requests currently being handled",
+            ["endpoint"], registry=registry, multiprocess_mode="livesum",
+        )
+        self.db_queries = Counter(
+            "todo_db_queries_total", "SQL statements executed",
+            ["operation"], registry=registry,
+        )
+        self.db_query_seconds = Histogram(
+            "todo_db_query_duration_seconds", "SQL statement latency",
+            ["operation"], registry=registry, buckets=DB_BUCKETS,
+        )
+        self.cache_requests = Counter(
+            "todo_cache_requests_total", "Response cache lookups",
+            ["collection", "result"], registry=registry,
+        )
+        self.jwt_verify_seconds = Histogram(
+            "todo_jwt_verify_duration_seconds", "JWT verification latency",
+            ["result"], registry=registry, buckets=JWT_BUCKETS,
+        )
+        self.pool_wait_seconds = Histogram(
+            "todo_db_pool_checkout_wait_seconds",
+            "Time waited for a pooled database connection",
+            registry=registry,
+            buckets=POOL_BUCKETS,
+        )
+        self.pool_timeouts = Counter(
+            "todo_db_pool_checkout_timeouts_total",
+            "Pool checkouts that timed out",
+            registry=registry,
+        )
+        self.pool_in_use = Gauge(
+            "todo_db_pool_connections_in_use",
+            "Database connections checked out of the pool",
+            registry=registry,
+            multiprocess_mode="livesum",
+        )
+        self.pool_capacity = Gauge(
+            "todo_db_pool_capacity",
+            "Connections the pool may open (size plus overflow)",
+            registry=registry,
+            multiprocess_mode="livesum",
+        )
+        self.pool_saturation = Gauge(
+            "todo_db_pool_saturation", "Share of the pool's capacity in use",
+            registry=registry, multiprocess_mode="livemax",
+        )
+        self._in_use = 0
+        self._pool_lock = threading.Lock()
+
+    def on_cache_lookup(self, sender, collection, hit):
+        self.cache_requests.labels(collection, "hit" if hit else "miss").inc()
+
+    def on_token_verified(self, sender, seconds, cached, valid):
+        result = (
+            "invalid" if not valid else ("cached" if cached else "verified")
+        )
+        self.jwt_verify_seconds.labels(result).observe(seconds)
+
+    def on_pool_checkout(self, sender, seconds, timed_out):
+        self.pool_wait_seconds.observe(seconds)
+        if timed_out:
+            self.pool_timeouts.inc()
+
+    def track_pool(self, engine, max_overflow):
+        """
+        Keep the in-use, capacity and saturation gauges of engine's pool
+        current; max_overflow is the pool's DB_MAX_OVERFLOW (negative for
+        no limit, which counts as none here).
+        """
+        capacity = engine.pool.size() + max(max_overflow, 0)
+
+        def update(change):
+            with self._pool_lock:
+                # Set here rather than at startup, so that a gunicorn master
+                # that preloads the app does not count as one more pool
+                self.pool_capacity.set(capacity)
+                self._in_use += change
+                self.pool_in_use.set(self._in_use)
+                self.pool_saturation.set(
+                    self._in_use / capacity if capacity else 0
+                )
+
+        # Pool events registered on the engine carry over to the pools that
+        # replace this one on dispose()
+        event.listen(engine, "checkout", lambda *args: update(1))
+        event.listen(engine, "checkin", lambda *args: update(-1))
+
+
+def init_metrics(app, engine, response_cache, auth_service):
+    """Install the exporter and the app metrics; returns the AppMetrics."""
+    if multiprocess_enabled():
+        from prometheus_flask_exporter.multiprocess import (
+            GunicornInternalPrometheusMetrics,
+        )
+
+        exporter = GunicornInternalPrometheusMetrics(app, group_by="endpoint")
+        # Values go to the shared multiprocess files; the exporter's
+        # collector reads them back, so nothing is registered here
+        metrics = AppMetrics(registry=None)
+    else:
+        # One registry per app, so several apps can live in one process
+        registry = CollectorRegistry(auto_describe=True)
+        ProcessCollector(registry=registry)
+        PlatformCollector(registry=registry)
+        exporter = PrometheusMetrics(
+            app, registry=registry, group_by="endpoint"
+        )
+        metrics = AppMetrics(registry=registry)
+
+    exporter.info(
+        "todo_app_info", "Application info", version=app.config["APP_VERSION"]
+    )
+
+    @app.before_request
+    def track_in_flight():
+        g.metrics_endpoint = request.endpoint or "unknown"
+        metrics.in_flight.labels(g.metrics_endpoint).inc()
+
+    @app.teardown_request
+    def untrack_in_flight(exc):
+        endpoint = g.pop("metrics_endpoint", None)
+        if endpoint is not None:
+            metrics.in_flight.labels(endpoint).dec()
+
+    # The start time rides on the statement's execution context, so a
+    # statement that fails (no after_cursor_execute) leaves nothing behind
+    @event.listens_for(engine, "before_cursor_execute")
+    def query_started(
+        conn, cursor, statement, parameters, context, executemany
+    ):
+        context.metrics_query_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def query_finished(
+        conn, cursor, statement, parameters, context, executemany
+    ):
+        started = context.metrics_query_start
+        operation = (
+            statement.lstrip().split(None, 1)[0].upper()
+            if statement.strip()
+            else "OTHER"
+        )
+        metrics.db_queries.labels(operation).inc()
+        metrics.db_query_seconds.labels(operation).observe(
+            time.perf_counter() - started
+        )
+
+    # Receivers are held weakly by blinker; metrics keeps them alive
+    cache_lookup.connect(metrics.on_cache_lookup, sender=response_cache)
+    token_verified.connect(metrics.on_token_verified, sender=auth_service)
+    if isinstance(engine.pool, QueuePool):
+        pool_checkout.connect(metrics.on_pool_checkout, sender=engine.dialect)
+        metrics.track_pool(engine, app.config["DB_MAX_OVERFLOW"])
+
+    metrics.exporter = exporter
+    return metrics
+
+
+def child_exit(server, worker):
+    """gunicorn hook: drop the live gauges of a worker that exited."""
+    if multiprocess_enabled():
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
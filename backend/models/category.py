@@ -1,9 +1,22 @@
-from backend.database import db
+from backend.database import db, utcnow
 
 class Category(db.Model):
+    __table_args__ = (
+        # Duplicate-name check and per-user listing
+        db.Index("ix_category_user_name", "user_id", "name"),
+        # GET /sync reads a user's changes in (updated_at, id) order
+        db.Index("ix_category_user_updated_at", "user_id", "updated_at"),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(80), nullable=False)
     description = db.Column(db.String(255))
     user_id = db.Column(db.Integer, nullable=False, default=1)
 
+    # Same sync bookkeeping as Task: deleting sets deleted_at (a tombstone)
+    updated_at = db.Column(
+        db.DateTime, nullable=False, default=utcnow, onupdate=utcnow
+    )
+    deleted_at = db.Column(db.DateTime, nullable=True)
+
     tasks = db.relationship("Task", backref="category", lazy=True)
\ No newline at end of file
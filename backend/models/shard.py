@@ -0,0 +1,24 @@
+from backend.database import db
+
+
+class ShardPlacement(db.Model):
+    """
+    The shard holding a user's tasks and categories (see backend/shards.py).
+    Written at registration; moving is set while backend.rebalance copies
+    the user to another shard, and holds back the user's writes.
+    """
+    __tablename__ = "shard_placement"
+
+    user_id = db.Column(db.Integer, primary_key=True)
+    shard = db.Column(db.String(64), nullable=False)
+    moving = db.Column(db.Boolean, nullable=False, default=False)
+
+
+class IdBlock(db.Model):
+    """
+    Next free id of a sharded table; processes reserve ids from it in blocks.
+    """
+    __tablename__ = "id_block"
+
+    name = db.Column(db.String(64), primary_key=True)
+    next_id = db.Column(db.BigInteger, nullable=False)
@@ -1,9 +1,24 @@
 from datetime import datetime
-from backend.database import db
+from sqlalchemy import DDL, event
+from backend.database import db, utcnow
 
 
 class Task(db.Model):
     __tablename__ = "task"
+    __table_args__ = (
+        # Listings are always scoped to one user and ordered by a sort key
+        # with the id as tie-breaker (see TaskService.get_tasks_page)
+        db.Index("ix_task_user_priority_id", "user_id", "priority", "id"),
+        db.Index("ix_task_user_hours_id", "user_id", "hours", "id"),
+        # Filters of the task listing
+        db.Index("ix_task_user_status", "user_id", "status"),
+        db.Index("ix_task_user_category", "user_id", "category_id"),
+        db.Index("ix_task_user_due_date", "user_id", "due_date"),
+        # Category.tasks lazy loads look tasks up by category alone
+        db.Index("ix_task_category_id", "category_id"),
+        # GET /sync reads a user's changes in (updated_at, id) order
+        db.Index("ix_task_user_updated_at", "user_id", "updated_at"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
 
@@ -31,5 +46,87 @@ class Task(db.Model):
         nullable=True
     )
 
+    # Every write moves updated_at; deleting only sets deleted_at, so GET /sync
+    # can report the deletion. Reads skip rows with deleted_at set.
+    updated_at = db.Column(
+        db.DateTime, nullable=False, default=utcnow, onupdate=utcnow
+    )
+    deleted_at = db.Column(db.DateTime, nullable=True)
+
     def __repr__(self):
-        return f"<Task {self.id} {self.title}>"
\ No newline at end of file
+        return f"<Task {self.id} {self.title}>"
+
+
+# Full-text index of the task titles and descriptions
+# (TaskService.search_tasks). A contentless FTS5 table kept in sync by
+# triggers, so every write path (ORM, bulk statements, imports, the async
+# services) updates it. The owner column holds "u<user_id>": matching it
+# narrows a search to one user's documents, and prefix='2 3' indexes short
+# prefixes for search-as-you-type. Soft-deleted tasks are taken out of the
+# index.
+SEARCH_TABLE = "task_fts"
+
+SEARCH_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5(
+        owner, title, description,
+        content='', prefix='2 3', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS task_fts_insert AFTER INSERT ON task BEGIN
+        INSERT INTO {SEARCH_TABLE}(rowid, owner, title, description)
+        VALUES (new.id, 'u' || new.user_id, new.title, new.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS task_fts_delete
+    AFTER DELETE ON task WHEN old.deleted_at IS NULL BEGIN
+        INSERT INTO {SEARCH_TABLE}(
+            {SEARCH_TABLE}, rowid, owner, title, description
+        )
+        VALUES (
+            'delete', old.id, 'u' || old.user_id, old.title, old.description
+        );
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS task_fts_update
+    AFTER UPDATE OF user_id, title, description, deleted_at ON task BEGIN
+        INSERT INTO {SEARCH_TABLE}(
+            {SEARCH_TABLE}, rowid, owner, title, description
+        )
+        SELECT 'delete', old.id, 'u' || old.user_id, old.title, old.description
+        WHERE old.deleted_at IS NULL;
+        INSERT INTO {SEARCH_TABLE}(rowid, owner, title, description)
+        SELECT new.id, 'u' || new.user_id, new.title, new.description
+        WHERE new.deleted_at IS NULL;
+    END""",
+]
+
+
+@event.listens_for(db.metadata, "after_create")
+def create_search_index(target, connection, **kw):
+    """
+    Create the search index on SQLite, indexing existing tasks the first time.
+    """
+    if connection.dialect.name != "sqlite":
+        return
+    existing = (
+        connection.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE name IN ('task', ?)",
+            (SEARCH_TABLE,),
+        )
+        .scalars()
+        .all()
+    )
+    if "task" not in existing:
+        return
+    for statement in SEARCH_DDL:
+        connection.exec_driver_sql(statement)
+    if SEARCH_TABLE not in existing:
+        connection.exec_driver_sql(
+            f"INSERT INTO {SEARCH_TABLE}(rowid, owner, title, description) "
+            "SELECT id, 'u' || user_id, title, description FROM task WHERE "
+            "deleted_at IS NULL"
+        )
+
+
+# The triggers go with the task table
+event.listen(
+    db.metadata, "before_drop",
+    DDL(f"DROP TABLE IF EXISTS {SEARCH_TABLE}").execute_if(dialect="sqlite"),
+)
@@ -1,13 +1,47 @@
+from functools import lru_cache
+
 from backend.database import db
 from werkzeug.security import generate_password_hash, check_password_hash
 
+# werkzeug's default when no method is configured
+DEFAULT_HASH_METHOD = "scrypt"
+
+
+@lru_cache(maxsize=None)
+def hash_parameters(method: str) -> str:
+    """
+    The "method:params" prefix werkzeug writes for this method, with its
+    defaults filled in (e.g. "scrypt" -> "scrypt:32768:8:1"). Computed once
+    per method by hashing an empty password.
+    """
+    return generate_password_hash("", method=method).split("$", 1)[0]
+
+
 class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
     password_hash = db.Column(db.String(255), nullable=False)
 
-    def set_password(self, password: str):
-        self.password_hash = generate_password_hash(password)
+    def set_password(self, password: str, method: str = DEFAULT_HASH_METHOD):
+        self.password_hash = generate_password_hash(password, method=method)
 
     def check_password(self, password: str):
-        return check_password_hash(self.password_hash, password)
\ No newline at end of file
+        return check_password_hash(self.password_hash, password)
+
+    def needs_rehash(self, method: str = DEFAULT_HASH_METHOD):
+        """
+        True when the stored hash was made with other parameters than method.
+        """
+        return self.password_hash.split("$", 1)[0] != hash_parameters(method)
+
+
+class RevokedToken(db.Model):
+    """
+    A token revoked before its exp (backend/services/token_revocations.py).
+    """
+    __tablename__ = "revoked_token"
+
+    # sha256 of the token, hex
+    digest = db.Column(db.String(64), primary_key=True)
+    # The token's exp (seconds since the epoch); NULL never expires
+    expires_at = db.Column(db.Float, index=True)
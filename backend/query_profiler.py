@@ -0,0 +1,125 @@
+"""
+Per-request SQL profiling for development and tests.
+
+With QUERY_PROFILING enabled every request records the statements it runs
+(through the engine's cursor events) and the response carries:
+
+- X-Query-Count: number of statements
+- Server-Timing: db;dur=<ms>;desc="<n> queries"
+
+A request that runs the same statement (after normalization) at least
+QUERY_REPEAT_THRESHOLD times is logged as a likely N+1, e.g. a loop over
+category.tasks. count_queries() records the statements of any block of code
+and backs the assert_max_queries fixture in the tests.
+"""
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from flask import g, request
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LISTS = re.compile(r"\?(?:\s*,\s*\?)+")
+
+
+def normalize(statement):
+    """
+    Reduce a statement to its shape: literals and IN-lists collapse to '?'.
+    """
+    statement = _WHITESPACE.sub(" ", statement.strip())
+    statement = _LITERALS.sub("?", statement)
+    return _PLACEHOLDER_LISTS.sub("?", statement)
+
+
+class QueryLog:
+    """Statements run inside a block, with their total duration."""
+
+    def __init__(self):
+        self.statements = []
+        self.seconds = 0.0
+
+    def __len__(self):
+        return len(self.statements)
+
+    def record(self, statement, seconds):
+        self.statements.append(statement)
+        self.seconds += seconds
+
+    def repeated(self, threshold):
+        """
+        [(normalized statement, count)] of shapes run at least threshold times.
+        """
+        counts = Counter(normalize(statement) for statement in self.statements)
+        return [
+            (shape, n) for shape, n in counts.most_common() if n >= threshold
+        ]
+
+
+def _listen(engine, current_log):
+    """Record statements into current_log() (skipped when it returns None)."""
+
+    # Start times ride on the execution context, so a failed statement
+    # leaves nothing behind for the next one to pick up
+    def before(conn, cursor, statement, parameters, context, executemany):
+        if current_log() is not None:
+            context.profiler_query_start = time.perf_counter()
+
+    def after(conn, cursor, statement, parameters, context, executemany):
+        log = current_log()
+        started = getattr(context, "profiler_query_start", None)
+        if log is not None and started is not None:
+            log.record(statement, time.perf_counter() - started)
+
+    event.listen(engine, "before_cursor_execute", before)
+    event.listen(engine, "after_cursor_execute", after)
+    return before, after
+
+
+@contextmanager
+def count_queries(engine):
+    """Yield a QueryLog of the statements engine runs inside the block."""
+    log = QueryLog()
+    before, after = _listen(engine, lambda: log)
+    try:
+        yield log
+    finally:
+        event.remove(engine, "before_cursor_execute", before)
+        event.remove(engine, "after_cursor_execute", after)
+
+
+def init_query_profiler(app, engine):
+    """
+    Profile every request of app; installed by create_app when QUERY_PROFILING
+    is set.
+    """
+    threshold = app.config["QUERY_REPEAT_THRESHOLD"]
+
+    # Statements outside a request (create_all, CLI) have no g to record into
+    _listen(engine, lambda: g.get("query_log") if g else None)
+
+    @app.before_request
+    def start_query_log():
+        g.query_log = QueryLog()
+
+    @app.after_request
+    def add_query_headers(response):
+        log = g.pop("query_log", None)
+        if log is None:
+            return response
+        response.headers["X-Query-Count"] = str(len(log))
+        response.headers.add(
+            "Server-Timing",
+            f'db;dur={log.seconds * 1000:.2f};desc="{len(log)} queries"',
+        )
+        for shape, n in log.repeated(threshold):
+            logger.warning(
+                "%s %s ran a statement %d times (possible N+1): %s",
+                request.method, request.path, n, shape,
+            )
+        return response
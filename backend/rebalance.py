@@ -0,0 +1,446 @@
+"""
+Move users between shards (backend/shards.py) while the app serves them.
+
+Users move in batches of BATCH_SIZE, their rows copied to the new shard in
+three steps:
+
+1. copy everything, with the users' reads and writes going on as usual;
+2. mark the placements as moving, which holds back the users' writes in
+   every process once its cached placement expires (the tool waits
+   SHARD_PLACEMENT_TTL_SECONDS, once per batch), then copy again the rows
+   whose version (updated_at, which moves on every write, deletes
+   included) differs between the two shards, and flip the placements.
+   Versions are compared rather than taken after a point in time: a
+   transaction may commit well after the updated_at it wrote, when the
+   step 1 copy had already read past it. Meanwhile the old shard's task and
+   category tables are locked against writes (BEGIN IMMEDIATE on SQLite,
+   LOCK TABLE ... IN SHARE MODE on PostgreSQL), so a write that started
+   before the mark cannot slip in after the copy. Shards on other
+   databases cannot be locked this way and are refused;
+3. wait for the cached placements to expire again and delete the rows
+   from the old shard.
+
+Rows keep their ids (unique across shards) and timestamps, so sync tokens
+and client-side ids stay valid. Run it with the app's configuration:
+
+    python -m backend.rebalance --plan            # users placed elsewhere
+    python -m backend.rebalance --apply           # move them all
+    python -m backend.rebalance --user 42 --to b  # move one user
+    python -m backend.rebalance --pin             # record where users
+                                                  # registered before
+                                                  # sharding are placed
+    python -m backend.rebalance --migrate         # move the tasks and
+                                                  # categories written
+                                                  # before sharding
+
+After adding a shard to SHARD_URLS, --plan lists the users now placed on
+it by the ring (about 1/N of them) and --apply moves them. Before adding
+one, --pin keeps users without a placement row where they are.
+
+When SHARD_URLS is first set on an existing database, its tasks and
+categories are still in DATABASE_URL (now the directory) and the app
+refuses to start; --migrate, run with the app stopped, copies them to
+their users' shards and deletes them from the directory.
+"""
+import argparse
+import os
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from sqlalchemy import delete, func, insert, select, update
+
+from backend.models.shard import IdBlock, ShardPlacement
+from backend.models.user import User
+from backend.shards import SHARDED_MODELS
+
+# Users marked as moving together, sharing the waits for cached placements
+BATCH_SIZE = 100
+
+# Statement blocking writes to the sharded tables until the transaction ends,
+# by dialect
+WRITE_LOCKS = {
+    "sqlite": "BEGIN IMMEDIATE",
+    "postgresql": "LOCK TABLE {} IN SHARE MODE".format(
+        ", ".join(model.__tablename__ for model in SHARDED_MODELS)
+    ),
+}
+
+
+def move_user(router, user_id, target):
+    """
+    Move user_id's tasks and categories to the shard named target; returns a
+    summary.
+    """
+    return move_users(router, [(user_id, target)])[0]
+
+
+def move_users(router, moves, batch_size=BATCH_SIZE):
+    """
+    Move each (user_id, target shard) of moves, batch_size users at a time;
+    returns their summaries.
+    """
+    for _, target in moves:
+        if target not in router.engines:
+            raise ValueError(f"unknown shard {target!r}")
+    unlockable = sorted(
+        name
+        for name, engine in router.engines.items()
+        if engine.dialect.name not in WRITE_LOCKS
+    )
+    if unlockable:
+        raise ValueError(
+            f"cannot lock shards {', '.join(unlockable)} for a move "
+            "(SQLite or PostgreSQL only)"
+        )
+
+    results = []
+    for i in range(0, len(moves), batch_size):
+        results += _move_batch(router, moves[i:i + batch_size])
+    return results
+
+
+def _move_batch(router, moves):
+    started = time.perf_counter()
+    results, pending = {}, []
+    for user_id, target in moves:
+        source = router._placement(user_id, fresh=True)[0]
+        # delta: rows copied again under the lock (written during or after the
+        # copy)
+        results[user_id] = {
+            "user_id": user_id, "source": source, "target": target, "rows": 0,
+            "delta": 0,
+        }
+        if source != target:
+            pending.append(results[user_id])
+    if not pending:
+        return [{**result, "seconds": 0.0} for result in results.values()]
+
+    for move in pending:
+        with router.engines[move["source"]].connect() as connection:
+            move["rows"] = _copy(
+                connection, router.engines[move["target"]], move["user_id"]
+            )
+
+    by_source = defaultdict(list)
+    for move in pending:
+        by_source[move["source"]].append(move)
+    flipped = set()
+    try:
+        for move in pending:
+            router.place(move["user_id"], move["source"], moving=True)
+        # Every process now sees the marks and holds the users' writes back
+        time.sleep(router.placement_ttl)
+        for source, source_moves in by_source.items():
+            with router.engines[source].connect() as connection, _write_lock(
+                connection
+            ):
+                for move in source_moves:
+                    move["delta"] = _copy_changed(
+                        connection, router.engines[move["target"]],
+                        move["user_id"],
+                    )
+                    router.place(move["user_id"], move["target"])
+                    flipped.add(move["user_id"])
+    except BaseException:
+        for move in pending:
+            if move["user_id"] not in flipped:
+                router.place(move["user_id"], move["source"])
+        raise
+
+    # Nobody reads from the old shards any more
+    time.sleep(router.placement_ttl)
+    for source, source_moves in by_source.items():
+        user_ids = [move["user_id"] for move in source_moves]
+        with router.engines[source].begin() as connection:
+            for model in reversed(SHARDED_MODELS):
+                connection.execute(
+                    delete(model.__table__).where(
+                        model.__table__.c.user_id.in_(user_ids)
+                    )
+                )
+
+    seconds = round(time.perf_counter() - started, 3)
+    for result in results.values():
+        result["seconds"] = (
+            seconds if result["source"] != result["target"] else 0.0
+        )
+    return list(results.values())
+
+
+def migrate(router):
+    """
+    Move the tasks and categories left in the directory to their users'
+    shards, placing those users; returns the number of rows moved. Run it
+    with the app stopped: nothing holds the users' writes back meanwhile.
+    """
+    if not router.stranded_rows():
+        return 0
+    tables = [model.__table__ for model in SHARDED_MODELS]
+    with router.directory.connect() as connection:
+        user_ids = sorted(
+            {
+                user_id
+                for table in tables
+                for user_id in connection.execute(
+                    select(table.c.user_id).distinct()
+                ).scalars()
+            }
+        )
+        # Ids keep their values, so none may be in use on a shard already
+        for table in tables:
+            ids = connection.execute(select(table.c.id)).scalars().all()
+            for name, engine in router.engines.items():
+                with engine.connect() as shard:
+                    taken = sum(
+                        shard.execute(
+                            select(func.count())
+                            .select_from(table)
+                            .where(table.c.id.in_(ids[i:i + 500]))
+                        ).scalar()
+                        for i in range(0, len(ids), 500)
+                    )
+                if taken:
+                    raise ValueError(
+                        f"{taken} {table.name} ids of the directory are "
+                        f"already used on shard {name}"
+                    )
+
+    moved = 0
+    for user_id in user_ids:
+        shard = router.shard_for(user_id)
+        router.place(user_id, shard)
+        with router.directory.connect() as connection:
+            moved += _copy(connection, router.engines[shard], user_id)
+        with router.directory.begin() as connection:
+            for table in reversed(tables):
+                connection.execute(
+                    delete(table).where(table.c.user_id == user_id)
+                )
+
+    # New ids must start above the migrated ones
+    with router.directory.begin() as connection:
+        for table in tables:
+            largest = router._max_id(table.name)
+            connection.execute(
+                update(IdBlock)
+                .where(IdBlock.name == table.name, IdBlock.next_id <= largest)
+                .values(next_id=largest + 1)
+            )
+    return moved
+
+
+def plan(router):
+    """
+    (user_id, current shard, ring shard) of every user the ring places
+    elsewhere.
+    """
+    with router.directory.connect() as connection:
+        users = connection.execute(
+            select(User.id, ShardPlacement.shard)
+            .outerjoin(ShardPlacement, ShardPlacement.user_id == User.id)
+            .order_by(User.id)
+        ).all()
+    moves = []
+    for user_id, shard in users:
+        ring_shard = router.ring.node_for(user_id)
+        if shard is not None and shard != ring_shard:
+            moves.append((user_id, shard, ring_shard))
+    return moves
+
+
+def pin(router):
+    """
+    Record the current (ring) shard of the users without a placement; returns
+    how many.
+    """
+    with router.directory.connect() as connection:
+        user_ids = connection.execute(
+            select(User.id)
+            .outerjoin(ShardPlacement, ShardPlacement.user_id == User.id)
+            .where(ShardPlacement.user_id.is_(None))
+        ).scalars().all()
+    for user_id in user_ids:
+        router.place(user_id, router.ring.node_for(user_id))
+    return len(user_ids)
+
+
+def _copy(connection, target_engine, user_id):
+    """
+    Copy the user's rows from connection to the target shard; returns how many.
+    """
+    copied = 0
+    with target_engine.begin() as target:
+        # Categories first: tasks refer to them
+        for model in SHARDED_MODELS:
+            table = model.__table__
+            rows = [
+                dict(row)
+                for row in connection.execute(
+                    select(table).where(table.c.user_id == user_id)
+                ).mappings()
+            ]
+            if not rows:
+                continue
+            # Left over from a move that was rolled back
+            target.execute(
+                delete(table).where(
+                    table.c.id.in_([row["id"] for row in rows])
+                )
+            )
+            target.execute(insert(table), rows)
+            copied += len(rows)
+    return copied
+
+
+def _copy_changed(connection, target_engine, user_id, chunk_size=500):
+    """
+    Bring the target shard's copy of the user's rows up to date with
+    connection's: rows missing there or with another updated_at are copied
+    again, rows only there are deleted. Returns the number of rows copied.
+    """
+    copied = 0
+    with target_engine.begin() as target:
+        for model in SHARDED_MODELS:
+            table = model.__table__
+            versions = select(table.c.id, table.c.updated_at).where(
+                table.c.user_id == user_id
+            )
+            current = dict(connection.execute(versions).all())
+            copies = dict(target.execute(versions).all())
+            stale = [
+                row_id
+                for row_id, updated_at in current.items()
+                if copies.get(row_id) != updated_at
+            ]
+            gone = sorted(copies.keys() - current.keys())
+            for i in range(0, len(gone), chunk_size):
+                target.execute(
+                    delete(table).where(
+                        table.c.id.in_(gone[i:i + chunk_size])
+                    )
+                )
+            for i in range(0, len(stale), chunk_size):
+                ids = stale[i:i + chunk_size]
+                rows = [
+                    dict(row)
+                    for row in connection.execute(
+                        select(table).where(table.c.id.in_(ids))
+                    ).mappings()
+                ]
+                target.execute(delete(table).where(table.c.id.in_(ids)))
+                target.execute(insert(table), rows)
+                copied += len(rows)
+    return copied
+
+
+@contextmanager
+def _write_lock(connection):
+    """
+    Block writes to the sharded tables of connection's shard for the block.
+    """
+    connection.exec_driver_sql(WRITE_LOCKS[connection.dialect.name])
+    try:
+        yield
+    finally:
+        connection.rollback()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "--plan",
+        action="store_true",
+        help="list the users the ring places elsewhere",
+    )
+    parser.add_argument(
+        "--apply", action="store_true", help="move the users listed by --plan"
+    )
+    parser.add_argument("--user", type=int, help="move this user")
+    parser.add_argument("--to", help="shard to move --user to")
+    parser.add_argument(
+        "--pin",
+        action="store_true",
+        help="record the placement of users without one",
+    )
+    parser.add_argument(
+        "--migrate",
+        action="store_true",
+        help=(
+            "move the tasks and categories written before sharding "
+            "(app stopped)"
+        ),
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=BATCH_SIZE,
+        help="users marked as moving together",
+    )
+    parser.add_argument(
+        "--config",
+        default=None,
+        help="configuration name (default: FLASK_ENV)",
+    )
+    args = parser.parse_args()
+
+    from backend.config import get_config
+    from backend.database import engine_options
+    from backend.shards import create_shard_router
+
+    # Not create_app: it refuses to start while --migrate has work to do
+    config_class = get_config(
+        args.config or os.getenv("FLASK_ENV", "production")
+    )
+    config = {
+        name: getattr(config_class, name)
+        for name in dir(config_class)
+        if name.isupper()
+    }
+    router = create_shard_router(config, engine_options)
+    if router is None:
+        parser.error("SHARD_URLS is not set")
+    router.create_all()
+
+    try:
+        if args.migrate:
+            print(f"migrated {migrate(router)} rows")
+        if args.pin:
+            print(f"pinned {pin(router)} users")
+        if args.user is not None:
+            if not args.to:
+                parser.error("--user needs --to")
+            moves = [(args.user, router.shard_for(args.user), args.to)]
+        elif args.plan or args.apply:
+            moves = plan(router)
+        else:
+            return
+
+        print(
+            f"{'user':>8}  "
+            f"{'from':<12}{'to':<12}{'rows':>8}{'delta':>8}{'seconds':>9}"
+        )
+        if not (args.apply or args.user is not None):
+            for user_id, source, target in moves:
+                print(f"{user_id:>8}  {source:<12}{target:<12}")
+            return
+        try:
+            results = move_users(
+                router,
+                [(user_id, target) for user_id, _, target in moves],
+                batch_size=args.batch_size,
+            )
+        except ValueError as e:
+            parser.error(str(e))
+        for r in results:
+            print(
+                f"{r['user_id']:>8}  {r['source']:<12}{r['target']:<12}"
+                f"{r['rows']:>8}{r['delta']:>8}{r['seconds']:>9.2f}"
+            )
+    finally:
+        router.dispose()
+
+
+if __name__ == "__main__":
+    main()
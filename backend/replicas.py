@@ -0,0 +1,260 @@
+"""
+Read replicas.
+
+With DATABASE_REPLICA_URLS set, the statements of GET requests go to the
+replicas, in turn, and everything else to the primary (the DATABASE_URL
+engine). RoutingSession, the session class of backend.database.db, picks
+the engine per statement:
+
+- writes, SELECT ... FOR UPDATE and raw SQL go to the primary;
+- once a session wrote, the rest of the request stays on the primary, so
+  it reads its own writes;
+- a user who wrote in the last REPLICA_MAX_LAG_SECONDS reads from the
+  primary too, so a GET right after a POST sees the new task (this is
+  tracked per process);
+- a request that read from a replica sets g.replica_read: its response may
+  lag the collection versions, so it is neither cached nor given an ETag
+  (another worker may already have bumped the version);
+- replicas are health-checked every REPLICA_CHECK_INTERVAL_SECONDS: one
+  that fails, or that reports more lag than REPLICA_MAX_LAG_SECONDS, is
+  left out until a later check passes. With none left, reads go to the
+  primary.
+
+Lag is read with LAG_QUERIES for the replica's dialect (PostgreSQL's
+replay timestamp); other databases are only checked for being up.
+"""
+import itertools
+import logging
+import threading
+import time
+
+from flask import current_app, g, has_app_context, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.sql import Select
+
+logger = logging.getLogger(__name__)
+
+# Seconds of replication lag, by dialect
+LAG_QUERIES = {
+    "postgresql": (
+        "SELECT CASE WHEN pg_last_wal_receive_lsn() = "
+        "pg_last_wal_replay_lsn() THEN 0 "
+        "ELSE COALESCE(EXTRACT(EPOCH FROM now() - "
+        "pg_last_xact_replay_timestamp()), 0) END"
+    ),
+}
+
+
+class Replica:
+    def __init__(self, engine, lag_query=None):
+        self.engine = engine
+        self.lag_query = lag_query
+        self.healthy = True
+        self.lag = None
+        self.error = None
+
+    def check(self, max_lag):
+        try:
+            with self.engine.connect() as connection:
+                if self.lag_query:
+                    self.lag = float(
+                        connection.execute(text(self.lag_query)).scalar() or 0
+                    )
+                else:
+                    connection.execute(text("SELECT 1"))
+            self.error = None
+        except Exception as e:
+            self.error = str(e)
+        healthy = self.error is None and (
+            self.lag is None or self.lag <= max_lag
+        )
+        if healthy != self.healthy:
+            logger.warning(
+                "replica %s is %s (lag %s, error %s)",
+                self.engine.url.render_as_string(),
+                "back" if healthy else "out", self.lag, self.error,
+            )
+        self.healthy = healthy
+
+    def status(self):
+        return {
+            "url": self.engine.url.render_as_string(),
+            "healthy": self.healthy,
+            "lag_seconds": self.lag,
+            "error": self.error,
+        }
+
+
+class ReplicaRouter:
+    """
+    Round-robin over the healthy replicas, with the lag guard described above.
+    """
+
+    def __init__(self, engines, max_lag=5, check_interval=5, lag_queries=None):
+        lag_queries = LAG_QUERIES if lag_queries is None else lag_queries
+        self.replicas = [
+            Replica(engine, lag_queries.get(engine.dialect.name))
+            for engine in engines
+        ]
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._turn = itertools.count()
+        self._checked_at = None
+        self._checking = threading.Lock()
+        self._lock = threading.Lock()
+        self._writes = {}
+
+    def reader(self, user_id=None):
+        """The engine for a read by user_id; None means the primary."""
+        if user_id is not None and self._wrote_recently(user_id):
+            return None
+        self._check_if_due()
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        return healthy[next(self._turn) % len(healthy)].engine
+
+    def note_write(self, user_id):
+        with self._lock:
+            now = time.monotonic()
+            self._writes[user_id] = now
+            # Forget users whose window has passed
+            if len(self._writes) > 10000:
+                self._writes = {
+                    u: t
+                    for u, t in self._writes.items()
+                    if now - t < self.max_lag
+                }
+
+    def check(self):
+        for replica in self.replicas:
+            replica.check(self.max_lag)
+        self._checked_at = time.monotonic()
+
+    def status(self):
+        return [replica.status() for replica in self.replicas]
+
+    def dispose(self, close=True):
+        for replica in self.replicas:
+            replica.engine.dispose(close=close)
+
+    def _wrote_recently(self, user_id):
+        with self._lock:
+            wrote_at = self._writes.get(user_id)
+        return (
+            wrote_at is not None and time.monotonic() - wrote_at < self.max_lag
+        )
+
+    def _check_if_due(self):
+        due = (
+            self._checked_at is None
+            or time.monotonic() - self._checked_at >= self.check_interval
+        )
+        # One thread checks; the others go on with the previous results
+        if due and self._checking.acquire(blocking=False):
+            try:
+                self.check()
+            finally:
+                self._checking.release()
+
+
+def create_router(config, engine_options=None):
+    """ReplicaRouter for DATABASE_REPLICA_URLS, or None when there are none."""
+    from backend.database import apply_sqlite_pragmas
+
+    urls = [
+        url.strip()
+        for url in config.get("DATABASE_REPLICA_URLS", "").split(",")
+        if url.strip()
+    ]
+    if not urls:
+        return None
+    engines = []
+    for url in urls:
+        options = (
+            engine_options({**config, "SQLALCHEMY_DATABASE_URI": url})
+            if engine_options
+            else {}
+        )
+        engine = create_engine(url, **options)
+        if make_url(url).get_backend_name() == "sqlite":
+            apply_sqlite_pragmas(engine, config.get("SQLITE_PRAGMAS") or {})
+        engines.append(engine)
+    return ReplicaRouter(
+        engines,
+        max_lag=config.get("REPLICA_MAX_LAG_SECONDS", 5),
+        check_interval=config.get("REPLICA_CHECK_INTERVAL_SECONDS", 5),
+    )
+
+
+class RoutingSession(Session):
+    """
+    Flask-SQLAlchemy session that sends the reads of GET requests to a
+    replica, and the statements on sharded tables to their user's shard.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        # Tasks and categories live on the shard of the user the session
+        # was set to (backend/shards.py); shards have no replicas
+        shards = self.info.get("shards")
+        if (
+            shards is not None
+            and bind is None
+            and mapper is not None
+            and shards.holds(mapper)
+        ):
+            # No clause: asked for the engine outside a flush, not to write
+            write = self._flushing or (
+                clause is not None and not self._is_read(clause)
+            )
+            return shards.engine_for(self.info.get("shard_key"), write=write)
+
+        primary = super().get_bind(
+            mapper=mapper, clause=clause, bind=bind, **kwargs
+        )
+        if bind is not None or not has_app_context():
+            return primary
+        router = current_app.extensions.get("replicas")
+        if router is None:
+            return primary
+
+        # No clause: the caller inspects the engine (e.g. its dialect)
+        if clause is None and not self._flushing:
+            return primary
+        if not self._is_read(clause):
+            self.info["wrote"] = True
+            return primary
+        if (
+            self.info.get("wrote")
+            or not has_request_context()
+            or request.method not in ("GET", "HEAD")
+        ):
+            return primary
+        replica = router.reader(getattr(request, "user_id", None))
+        if replica is None:
+            return primary
+        g.replica_read = True
+        return replica
+
+    def commit(self):
+        super().commit()
+        router = (
+            current_app.extensions.get("replicas")
+            if has_app_context()
+            else None
+        )
+        if (
+            router is not None
+            and self.info.get("wrote")
+            and has_request_context()
+        ):
+            user_id = getattr(request, "user_id", None)
+            if user_id is not None:
+                router.note_write(user_id)
+
+    def _is_read(self, clause):
+        if self._flushing:
+            return False
+        return isinstance(clause, Select) and clause._for_update_arg is None
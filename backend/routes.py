@@ -1,17 +1,144 @@
-from flask import Blueprint, request, jsonify
+from flask import (
+    Blueprint, current_app, g, request, jsonify, stream_with_context,
+)
 from functools import wraps
-from datetime import datetime, timezone
+import csv
+import io
+import hashlib
+from datetime import date, datetime, timezone
 import traceback
 
+from backend.cache import LRUCache, ResponseCache
+from backend.events import EventBroker, event_stream
+from backend.serializers import (
+    CATEGORY_COLUMNS, PRIORITY_VALUES, TASK_CATEGORY_COLUMNS, TASK_COLUMNS,
+    serialize_categories, serialize_category, serialize_task, serialize_tasks,
+    serialize_tasks_with_category,
+)
 from backend.services.auth_service import AuthService
 from backend.services.category_service import CategoryService
-from backend.services.task_service import TaskService
+from backend.services.sync_service import SyncService
+from backend.services.task_import import PARSERS
+from backend.services.task_service import (
+    STATUSES, UPDATABLE_FIELDS, TaskService, TaskValidationError,
+)
 
 
-def create_routes(auth_service: AuthService, task_service: TaskService, category_service: CategoryService):
+# Columns of GET /tasks/export?format=csv
+EXPORT_FIELDS = [
+    "id", "title", "description", "priority", "hours", "category_id", "status",
+    "due_date",
+]
+
+
+def etag_for(versions, collection, user_id, *parts):
+    """
+    ETag of a user's collection version plus the parts that shape the response.
+    """
+    version = versions.get(user_id, collection)
+    raw = "|".join([collection, str(user_id), version, *map(str, parts)])
+    return hashlib.sha256(raw.encode()).hexdigest()[:32]
+
+
+def task_fields(data):
+    """Convert a task payload from the client to create_task arguments."""
+    # Convert priority from string to integer if needed
+    priority = data.get("priority")
+    if isinstance(priority, str):
+        priority = PRIORITY_VALUES.get(priority, 2)
+
+    # Ensure hours is provided and valid
+    hours = data.get("hours", data.get("estimated_hours", 0))
+    if hours is None:
+        hours = 0
+
+    return {
+        "title": data.get("title"),
+        "description": data.get("description"),
+        "priority": priority,
+        "hours": hours,
+        "category_id": data.get("category_id"),
+        "due_date": data.get("due_date"),
+    }
+
+
+def task_changes(data):
+    """
+    Convert a PUT /tasks/<id> payload to update_task arguments; other keys are
+    dropped.
+    """
+    changes = {k: data[k] for k in UPDATABLE_FIELDS if k in data}
+    if isinstance(changes.get("priority"), str):
+        changes["priority"] = PRIORITY_VALUES.get(changes["priority"], 2)
+    return changes
 
-    bp = Blueprint("api", __name__)
 
+def task_filters(args):
+    """
+    Read the listing filters from the query string args (a MultiDict).
+    A value that cannot match any task raises TaskValidationError.
+    """
+    filters = {
+        "status": args.get("status"),
+        "category_id": args.get("category_id"),
+        "due_after": args.get("due_after"),
+        "due_before": args.get("due_before"),
+        "priority": args.get("priority"),
+    }
+    if filters["status"] is not None and filters["status"] not in STATUSES:
+        raise TaskValidationError("invalid status")
+    if filters["category_id"] is not None:
+        if not filters["category_id"].isdigit():
+            raise TaskValidationError("invalid category_id")
+        filters["category_id"] = int(filters["category_id"])
+    priority = filters["priority"]
+    if priority is not None:
+        priority = PRIORITY_VALUES.get(
+            priority, int(priority) if priority.isdigit() else None
+        )
+        if priority not in (1, 2, 3):
+            raise TaskValidationError("invalid priority")
+        filters["priority"] = priority
+    return filters
+
+
+def task_expand(args):
+    """
+    Read ?expand=category (comma-separated or repeated) from the query string
+    args.
+    """
+    return tuple(
+        name
+        for value in args.getlist("expand")
+        for name in value.split(",")
+        if name
+    )
+
+
+def task_listing(expand):
+    """
+    Columns to select and the serializer of a task listing with these
+    expansions.
+    """
+    if "category" in expand:
+        return TASK_CATEGORY_COLUMNS, serialize_tasks_with_category
+    return TASK_COLUMNS, serialize_tasks
+
+
+def create_routes(
+    auth_service: AuthService, task_service: TaskService,
+    category_service: CategoryService, response_cache: ResponseCache = None,
+    sync_service: SyncService = None, events: EventBroker = None,
+):
+
+    if response_cache is None:
+        response_cache = ResponseCache(LRUCache(), task_service.versions)
+    if sync_service is None:
+        sync_service = SyncService()
+    if events is None:
+        events = task_service.events
+
+    bp = Blueprint("api", __name__)
 
     # AUTH DECORATOR
     def require_token(f):
@@ -34,9 +161,54 @@ def create_routes(auth_service: AuthService, task_service: TaskService, category
                 return jsonify({"error": "Invalid token"}), 401
 
             request.user_id = user_id
+            request.token = token
             return f(*args, **kwargs)
         return wrapper
 
+    # CONDITIONAL GET
+    def collection_etag(versions, collection, *parts):
+        """
+        Strong ETag of a user's collection as seen through this request: the
+        collection version plus whatever else shapes the response (query
+        string, resource id). Computed without touching the database. None
+        when the cache backend keeps no versions other processes can see.
+        """
+        if not response_cache.etags:
+            return None
+        return etag_for(versions, collection, request.user_id, *parts)
+
+    def fresh(etag):
+        return etag is not None and request.if_none_match.contains(etag)
+
+    def not_modified(etag):
+        response = current_app.response_class(status=304)
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "private, no-cache"
+        return response
+
+    def with_etag(result, etag):
+        response, status = result
+        # Data read from a replica may be older than the version in the ETag
+        if status == 200 and etag is not None and not g.get("replica_read"):
+            response.set_etag(etag)
+            # Browsers may keep the response but must revalidate it every time
+            response.headers["Cache-Control"] = "private, no-cache"
+        return response, status
+
+    def cached_json(collection, variant, render):
+        """
+        JSON response of render(), served from the response cache when
+        possible.
+        """
+        body = response_cache.get_or_render(
+            request.user_id, collection, variant,
+            lambda: (current_app.json.dumps(render()) + "\n").encode(),
+            # Only what the primary returned is known to match the version
+            keep=lambda: not g.get("replica_read"),
+        )
+        return (
+            current_app.response_class(body, mimetype="application/json"), 200
+        )
 
     # AUTH
     @bp.route("/register", methods=["POST"])
@@ -81,6 +253,16 @@ def create_routes(auth_service: AuthService, task_service: TaskService, category
             print(traceback.format_exc())
             return jsonify({"error": f"Internal server error: {str(e)}"}), 500
 
+    @bp.route("/logout", methods=["POST"])
+    @require_token
+    def logout():
+        try:
+            auth_service.revoke_token(request.token)
+            return jsonify({"message": "Logged out"}), 200
+        except Exception as e:
+            print(f"ERROR in /logout: {str(e)}")
+            print(traceback.format_exc())
+            return jsonify({"error": f"Internal server error: {str(e)}"}), 500
 
     # CATEGORY ENDPOINTS
     @bp.route("/categories", methods=["POST"])
@@ -94,11 +276,7 @@ def create_routes(auth_service: AuthService, task_service: TaskService, category
                     data.get("name"),
                     data.get("description")
                 )
-                return jsonify({
-                    "id": cat.id,
-                    "name": cat.name,
-                    "description": cat.description
-                }), 201
+                return jsonify(serialize_category(cat)), 201
             except category_service.CategoryValidationError as e:
                 msg = str(e)
                 if msg == "Duplicate category":
@@ -113,11 +291,17 @@ def create_routes(auth_service: AuthService, task_service: TaskService, category
     @require_token
     def get_categories():
         try:
-            cats = category_service.get_all_categories(request.user_id)
-            return jsonify([
-                {"id": c.id, "name": c.name, "description": c.description}
-                for c in cats
-            ]), 200
+            etag = collection_etag(category_service.versions, "categories")
+            if fresh(etag):
+                return not_modified(etag)
+
+            def render():
+                cats = category_service.get_all_categories(
+                    request.user_id, columns=CATEGORY_COLUMNS
+                )
+                return serialize_categories(cats)
+
+            return with_etag(cached_json("categories", "", render), etag)
         except Exception as e:
             print(f"ERROR in /categories GET: {str(e)}")
             print(traceback.format_exc())
@@ -129,12 +313,11 @@ def create_routes(auth_service: AuthService, task_service: TaskService, category
         try:
             data = request.get_json() or {}
             try:
-                cat = category_service.update_category(cid, data.get("name"), data.get("description"))
-                return jsonify({
-                    "id": cat.id,
-                    "name": cat.name,
-                    "description": cat.description
-                }), 200
+                cat = category_service.update_category(
+                    cid, data.get("name"), data.get("description"),
+                    user_id=request.user_id,
+                )
+                return jsonify(serialize_category(cat)), 200
             except category_service.CategoryValidationError as e:
                 return jsonify({"error": str(e)}), 400
         except Exception as e:
@@ -147,7 +330,7 @@ def create_routes(auth_service: AuthService, task_service: TaskService, category
     def delete_category(cid):
         try:
             try:
-                category_service.delete_category(cid)
+                category_service.delete_category(cid, user_id=request.user_id)
                 return jsonify({"message": "Category deleted"}), 200
             except category_service.CategoryValidationError as e:
                 return jsonify({"error": str(e)}), 400
@@ -157,6 +340,29 @@ def create_routes(auth_service: AuthService, task_service: TaskService, category
             return jsonify({"error": f"Internal server error: {str(e)}"}), 500
 
     # TASK ENDPOINTS
+    def batch_items(data, key):
+        """
+        Return the list of items of a batch request, or an error response.
+        """
+        if not isinstance(data, dict):
+            return None, (
+                jsonify(
+                    {"error": f"body must be an object with a {key} list"}
+                ),
+                400,
+            )
+        items = data.get(key)
+        if not isinstance(items, list) or not items:
+            return None, (
+                jsonify({"error": f"{key} must be a non-empty list"}), 400
+            )
+        max_size = current_app.config.get("MAX_BATCH_SIZE", 5000)
+        if len(items) > max_size:
+            return None, (
+                jsonify({"error": f"at most {max_size} items per batch"}), 400
+            )
+        return items, None
+
     @bp.route("/tasks", methods=["POST"])
     @require_token
     def create_task():
@@ -167,26 +373,9 @@ def create_routes(auth_service: AuthService, task_service: TaskService, category
             if data.get("category_id") is None:
                 return jsonify({"error": "category is required"}), 400
 
-            # Convert priority from string to integer if needed
-            priority = data.get("priority")
-            if isinstance(priority, str):
-                priority_map = {"High": 1, "Medium": 2, "Low": 3}
-                priority = priority_map.get(priority, 2)
-            
-            # Ensure hours is provided and valid
-            hours = data.get("hours", data.get("estimated_hours", 0))
-            if hours is None:
-                hours = 0
-
             try:
                 task = task_service.create_task(
-                    request.user_id,
-                    data.get("title"),
-                    data.get("description"),
-                    priority,
-                    hours,
-                    data.get("category_id"),
-                    data.get("due_date")
+                    request.user_id, **task_fields(data)
                 )
                 return jsonify({"id": task.id, "message": "Task created"}), 201
             except task_service.TaskValidationError as e:
@@ -196,48 +385,341 @@ def create_routes(auth_service: AuthService, task_service: TaskService, category
             print(traceback.format_exc())
             return jsonify({"error": f"Internal server error: {str(e)}"}), 500
 
+    @bp.route("/tasks/batch", methods=["POST"])
+    @require_token
+    def create_tasks_batch():
+        try:
+            data = request.get_json() or {}
+            items, error = batch_items(data, "tasks")
+            if error:
+                return error
+            atomic = bool(data.get("atomic"))
+
+            # Same rule as POST /tasks; checked here so indexes stay aligned
+            valid, errors = [], []
+            for index, item in enumerate(items):
+                if (
+                    not isinstance(item, dict)
+                    or item.get("category_id") is None
+                ):
+                    errors.append(
+                        {"index": index, "error": "category is required"}
+                    )
+                else:
+                    valid.append((index, task_fields(item)))
+            if errors and atomic:
+                return jsonify({"errors": errors}), 400
+
+            try:
+                created, service_errors = task_service.create_tasks(
+                    request.user_id, [fields for _, fields in valid],
+                    atomic=atomic,
+                )
+            except task_service.TaskBatchError as e:
+                return (
+                    jsonify(
+                        {
+                            "errors": [
+                                {
+                                    "index": valid[err["index"]][0],
+                                    "error": err["error"],
+                                }
+                                for err in e.errors
+                            ]
+                        }
+                    ),
+                    400,
+                )
+
+            errors += [
+                {"index": valid[err["index"]][0], "error": err["error"]}
+                for err in service_errors
+            ]
+            errors.sort(key=lambda err: err["index"])
+            return jsonify({"created": created, "errors": errors}), (
+                201 if created else 400
+            )
+        except Exception as e:
+            print(f"ERROR in /tasks/batch POST: {str(e)}")
+            print(traceback.format_exc())
+            return jsonify({"error": f"Internal server error: {str(e)}"}), 500
+
+    @bp.route("/tasks/batch", methods=["PATCH"])
+    @require_token
+    def update_tasks_batch():
+        try:
+            data = request.get_json() or {}
+            items, error = batch_items(data, "tasks")
+            if error:
+                return error
+
+            for item in items:
+                if not isinstance(item, dict):
+                    continue
+                if isinstance(item.get("priority"), str):
+                    item["priority"] = PRIORITY_VALUES.get(item["priority"], 2)
+                if "hours" not in item and "estimated_hours" in item:
+                    item["hours"] = item["estimated_hours"]
+
+            try:
+                updated, errors = task_service.update_tasks(
+                    request.user_id, items, atomic=bool(data.get("atomic"))
+                )
+                return jsonify({"updated": updated, "errors": errors}), 200
+            except task_service.TaskBatchError as e:
+                return jsonify({"errors": e.errors}), 400
+        except Exception as e:
+            print(f"ERROR in /tasks/batch PATCH: {str(e)}")
+            print(traceback.format_exc())
+            return jsonify({"error": f"Internal server error: {str(e)}"}), 500
+
+    @bp.route("/tasks/batch", methods=["DELETE"])
+    @require_token
+    def delete_tasks_batch():
+        try:
+            data = request.get_json() or {}
+            ids, error = batch_items(data, "ids")
+            if error:
+                return error
+
+            try:
+                deleted, errors = task_service.delete_tasks(
+                    request.user_id, ids, atomic=bool(data.get("atomic"))
+                )
+                return jsonify({"deleted": deleted, "errors": errors}), 200
+            except task_service.TaskBatchError as e:
+                return jsonify({"errors": e.errors}), 400
+        except Exception as e:
+            print(f"ERROR in /tasks/batch DELETE: {str(e)}")
+            print(traceback.format_exc())
+            return jsonify({"error": f"Internal server error: {str(e)}"}), 500
+
     @bp.route("/tasks", methods=["GET"])
     @require_token
     def get_tasks():
         try:
-            tasks = task_service.get_tasks(request.user_id)
-            priority_map = {1: "High", 2: "Medium", 3: "Low"}
-            return jsonify([
-                {
-                    "id": t.id,
-                    "title": t.title,
-                    "description": t.description,
-                    "priority": priority_map.get(t.priority, "Medium"),
-                    "hours": t.hours,
-                    "estimated_hours": t.hours,
-                    "category_id": t.category_id,
-                    "status": t.status,
-                    "due_date": t.due_date.isoformat() if t.due_date else None
-                } for t in tasks
-            ]), 200
+            # Category writes bump the tasks version too, which keeps
+            # ?expand=category listings fresh
+            etag = collection_etag(
+                task_service.versions, "tasks", request.query_string.decode()
+            )
+            if fresh(etag):
+                return not_modified(etag)
+
+            def render():
+                sort = request.args.get("sort", "priority")
+                expand = task_expand(request.args)
+                columns, serialize = task_listing(expand)
+                # Paginated when the client asks for a page, full list
+                # otherwise
+                if "limit" in request.args or "cursor" in request.args:
+                    tasks, next_cursor = task_service.get_tasks_page(
+                        request.user_id,
+                        limit=request.args.get("limit"),
+                        cursor=request.args.get("cursor"),
+                        sort=sort,
+                        columns=columns,
+                        expand=expand,
+                        **task_filters(request.args)
+                    )
+                    return {
+                        "tasks": serialize(tasks), "next_cursor": next_cursor
+                    }
+
+                tasks = task_service.get_tasks(
+                    request.user_id, sort=sort, columns=columns, expand=expand,
+                    **task_filters(request.args),
+                )
+                return serialize(tasks)
+
+            try:
+                return with_etag(
+                    cached_json(
+                        "tasks", request.query_string.decode(), render
+                    ),
+                    etag,
+                )
+            except task_service.TaskValidationError as e:
+                return jsonify({"error": str(e)}), 400
         except Exception as e:
             print(f"ERROR in /tasks GET: {str(e)}")
             print(traceback.format_exc())
             return jsonify({"error": f"Internal server error: {str(e)}"}), 500
 
+    @bp.route("/tasks/search", methods=["GET"])
+    @require_token
+    def search_tasks():
+        try:
+            # Cached with the listings: any task write changes the version
+            variant = "search?" + request.query_string.decode()
+            etag = collection_etag(task_service.versions, "tasks", variant)
+            if fresh(etag):
+                return not_modified(etag)
+
+            def render():
+                tasks, next_cursor = task_service.search_tasks(
+                    request.user_id,
+                    request.args.get("q"),
+                    limit=request.args.get("limit"),
+                    cursor=request.args.get("cursor"),
+                    columns=TASK_COLUMNS,
+                    **task_filters(request.args)
+                )
+                return {
+                    "tasks": serialize_tasks(tasks), "next_cursor": next_cursor
+                }
+
+            try:
+                return with_etag(cached_json("tasks", variant, render), etag)
+            except task_service.TaskValidationError as e:
+                return jsonify({"error": str(e)}), 400
+        except Exception as e:
+            print(f"ERROR in /tasks/search GET: {str(e)}")
+            print(traceback.format_exc())
+            return jsonify({"error": f"Internal server error: {str(e)}"}), 500
+
+    @bp.route("/stats", methods=["GET"])
+    @require_token
+    def get_stats():
+        try:
+            # Overdue counts change with the date, so each day has its own
+            # entry
+            variant = f"stats:{date.today().isoformat()}"
+            etag = collection_etag(task_service.versions, "tasks", variant)
+            if fresh(etag):
+                return not_modified(etag)
+            return with_etag(
+                cached_json(
+                    "tasks",
+                    variant,
+                    lambda: task_service.get_stats(request.user_id),
+                ),
+                etag,
+            )
+        except Exception as e:
+            print(f"ERROR in /stats GET: {str(e)}")
+            print(traceback.format_exc())
+            return jsonify({"error": f"Internal server error: {str(e)}"}), 500
+
+    @bp.route("/sync", methods=["GET"])
+    @require_token
+    def sync():
+        try:
+            try:
+                changes = sync_service.changes(
+                    request.user_id, request.args.get("since")
+                )
+            except sync_service.SyncTokenError as e:
+                return jsonify({"error": str(e)}), 400
+            return jsonify(changes)
+        except Exception as e:
+            print(f"ERROR in /sync GET: {str(e)}")
+            print(traceback.format_exc())
+            return jsonify({"error": f"Internal server error: {str(e)}"}), 500
+
+    @bp.route("/events", methods=["GET"])
+    @require_token
+    def event_source():
+        # Served as long as the client stays connected, holding a thread
+        # (gthread) for up to EVENTS_MAX_SECONDS; off under sync workers
+        if not current_app.config.get("EVENTS_ENABLED", True):
+            return jsonify({"error": "Not found"}), 404
+        subscription = events.subscribe(request.user_id)
+        stream = event_stream(
+            subscription,
+            heartbeat=current_app.config.get("EVENTS_HEARTBEAT_SECONDS", 15),
+            max_seconds=current_app.config.get("EVENTS_MAX_SECONDS", 25),
+        )
+        return current_app.response_class(
+            stream,
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    @bp.route("/tasks/export", methods=["GET"])
+    @require_token
+    def export_tasks():
+        fmt = request.args.get("format", "ndjson")
+        if fmt not in ("ndjson", "csv"):
+            return jsonify({"error": "format must be ndjson or csv"}), 400
+
+        batches = task_service.iter_tasks(
+            request.user_id,
+            TASK_COLUMNS,
+            batch_size=current_app.config.get("EXPORT_BATCH_SIZE", 1000),
+        )
+        dumps = current_app.json.dumps
+
+        def ndjson():
+            for rows in batches:
+                yield "".join(
+                    dumps(task) + "\n" for task in serialize_tasks(rows)
+                )
+
+        def csv_rows():
+            buffer = io.StringIO()
+            writer = csv.DictWriter(
+                buffer, fieldnames=EXPORT_FIELDS, extrasaction="ignore"
+            )
+            # The header goes out before the first row is fetched
+            writer.writeheader()
+            yield buffer.getvalue()
+            for rows in batches:
+                buffer.seek(0)
+                buffer.truncate()
+                for task in serialize_tasks(rows):
+                    if task["due_date"] is not None:
+                        task["due_date"] = task["due_date"].isoformat()
+                    writer.writerow(task)
+                yield buffer.getvalue()
+
+        if fmt == "csv":
+            body, mimetype = csv_rows(), "text/csv"
+        else:
+            body, mimetype = ndjson(), "application/x-ndjson"
+        return current_app.response_class(
+            stream_with_context(body),
+            mimetype=mimetype,
+            headers={
+                "Content-Disposition": f"attachment; filename=tasks.{fmt}"
+            },
+        )
+
+    @bp.route("/tasks/import", methods=["POST"])
+    @require_token
+    def import_tasks():
+        try:
+            fmt = request.args.get("format")
+            if fmt is None:
+                fmt = "csv" if request.mimetype == "text/csv" else "ndjson"
+            parse = PARSERS.get(fmt)
+            if parse is None:
+                return jsonify({"error": "format must be ndjson or csv"}), 400
+
+            # The body is read line by line straight from the input stream
+            summary = task_service.import_tasks(
+                request.user_id,
+                parse(request.stream),
+                chunk_size=current_app.config.get("IMPORT_CHUNK_SIZE", 500),
+            )
+            status = 201 if summary["inserted"] else 400
+            return jsonify(summary), status
+        except Exception as e:
+            print(f"ERROR in /tasks/import POST: {str(e)}")
+            print(traceback.format_exc())
+            return jsonify({"error": f"Internal server error: {str(e)}"}), 500
+
     @bp.route("/tasks/<int:tid>", methods=["GET"])
     @require_token
     def get_task(tid):
         try:
+            etag = collection_etag(task_service.versions, "tasks", tid)
+            if fresh(etag):
+                return not_modified(etag)
+
             try:
-                t = task_service.get_task(tid)
-                priority_map = {1: "High", 2: "Medium", 3: "Low"}
-                return jsonify({
-                    "id": t.id,
-                    "title": t.title,
-                    "description": t.description,
-                    "priority": priority_map.get(t.priority, "Medium"),
-                    "hours": t.hours,
-                    "estimated_hours": t.hours,
-                    "category_id": t.category_id,
-                    "status": t.status,
-                    "due_date": t.due_date.isoformat() if t.due_date else None
-                }), 200
+                t = task_service.get_task(tid, request.user_id)
+                return with_etag((jsonify(serialize_task(t)), 200), etag)
             except task_service.TaskNotFoundError:
                 return jsonify({"error": "Not found"}), 404
         except Exception as e:
@@ -249,18 +731,18 @@ def create_routes(auth_service: AuthService, task_service: TaskService, category
     @require_token
     def update_task(tid):
         try:
-            data = request.get_json() or {}
-            
-            # Convert priority from string to integer if provided
-            if "priority" in data and isinstance(data["priority"], str):
-                priority_map = {"High": 1, "Medium": 2, "Low": 3}
-                data["priority"] = priority_map.get(data["priority"], 2)
-            
+            # The owner is the caller, not something the client can set
+            data = task_changes(request.get_json() or {})
+
             try:
-                t = task_service.update_task(tid, **data)
+                t = task_service.update_task(
+                    tid, user_id=request.user_id, **data
+                )
                 return jsonify({"id": t.id, "title": t.title}), 200
             except task_service.TaskNotFoundError:
                 return jsonify({"error": "Not found"}), 404
+            except task_service.TaskValidationError as e:
+                return jsonify({"error": str(e)}), 400
         except Exception as e:
             print(f"ERROR in /tasks PUT: {str(e)}")
             print(traceback.format_exc())
@@ -271,7 +753,7 @@ def create_routes(auth_service: AuthService, task_service: TaskService, category
     def delete_task(tid):
         try:
             try:
-                task_service.delete_task(tid)
+                task_service.delete_task(tid, user_id=request.user_id)
                 return jsonify({"message": "Task deleted"}), 200
             except task_service.TaskNotFoundError:
                 return jsonify({"error": "Not found"}), 404
@@ -280,7 +762,6 @@ def create_routes(auth_service: AuthService, task_service: TaskService, category
             print(traceback.format_exc())
             return jsonify({"error": f"Internal server error: {str(e)}"}), 500
 
-
     # HEALTH
     @bp.route("/health", methods=["GET"])
     def health():
@@ -294,11 +775,15 @@ def create_routes(auth_service: AuthService, task_service: TaskService, category
             db_status = f"degraded: {str(e)}"
             status = "degraded"
         
-        return jsonify({
+        body = {
             "status": status,
             "timestamp": datetime.now(timezone.utc).isoformat(),
             "version": "2.0.0",
             "database": db_status
-        }), 200
+        }
+        replicas = current_app.extensions.get("replicas")
+        if replicas is not None:
+            body["replicas"] = replicas.status()
+        return jsonify(body), 200
 
-    return bp
\ No newline at end of file
+    return bp
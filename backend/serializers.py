@@ -0,0 +1,102 @@
+"""
+Shared JSON shapes of tasks and categories.
+
+Listings select only TASK_COLUMNS / CATEGORY_COLUMNS, so the database
+returns plain row tuples instead of hydrated ORM objects, and
+serialize_tasks / serialize_categories unpack those tuples by position.
+serialize_task / serialize_category take a single model object, and
+serialize_tasks_with_category the rows of a listing with ?expand=category.
+Datetimes are left as datetime objects for the app's JSON provider to encode.
+"""
+from backend.models.category import Category
+from backend.models.task import Task
+
+PRIORITY_NAMES = {1: "High", 2: "Medium", 3: "Low"}
+PRIORITY_VALUES = {"High": 1, "Medium": 2, "Low": 3}
+
+TASK_COLUMNS = (
+    Task.id,
+    Task.title,
+    Task.description,
+    Task.priority,
+    Task.hours,
+    Task.category_id,
+    Task.status,
+    Task.due_date,
+)
+
+# A listing with ?expand=category also selects its category, outer-joined
+# (None for tasks without one). Labelled: Task has a description too.
+TASK_CATEGORY_COLUMNS = TASK_COLUMNS + (
+    # NULL when no category was joined (none, another user's or deleted)
+    Category.id.label("joined_category_id"),
+    Category.name.label("category_name"),
+    Category.description.label("category_description"),
+)
+
+CATEGORY_COLUMNS = (
+    Category.id,
+    Category.name,
+    Category.description,
+)
+
+
+def serialize_task(t):
+    return {
+        "id": t.id,
+        "title": t.title,
+        "description": t.description,
+        "priority": PRIORITY_NAMES.get(t.priority, "Medium"),
+        "hours": t.hours,
+        "estimated_hours": t.hours,
+        "category_id": t.category_id,
+        "status": t.status,
+        "due_date": t.due_date,
+    }
+
+
+def serialize_tasks(rows):
+    """Serialize rows selected with TASK_COLUMNS."""
+    names = PRIORITY_NAMES
+    return [
+        {
+            "id": id,
+            "title": title,
+            "description": description,
+            "priority": names.get(priority, "Medium"),
+            "hours": hours,
+            "estimated_hours": hours,
+            "category_id": category_id,
+            "status": status,
+            "due_date": due_date,
+        }
+        for (
+            id, title, description, priority, hours, category_id, status,
+            due_date,
+        ) in rows
+    ]
+
+
+def serialize_tasks_with_category(rows):
+    """
+    Serialize rows selected with TASK_CATEGORY_COLUMNS, each task with its
+    category inline.
+    """
+    tasks = serialize_tasks(row[:-3] for row in rows)
+    for task, (*_, category_id, name, description) in zip(tasks, rows):
+        task["category"] = None if category_id is None else {
+            "id": category_id, "name": name, "description": description,
+        }
+    return tasks
+
+
+def serialize_category(c):
+    return {"id": c.id, "name": c.name, "description": c.description}
+
+
+def serialize_categories(rows):
+    """Serialize rows selected with CATEGORY_COLUMNS."""
+    return [
+        {"id": id, "name": name, "description": description}
+        for id, name, description in rows
+    ]
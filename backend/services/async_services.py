@@ -0,0 +1,249 @@
+"""
+Async variants of the services for the ASGI entry point (backend.asgi).
+
+They run on SQLAlchemy's asyncio extension (sqlite+aiosqlite) with sessions
+from an async_sessionmaker, and reuse the validation, filtering and cursor
+helpers of the sync services, so both serving modes accept the same input
+and bump the same collection versions. They hold the sync services instead
+of subclassing them, so no sync method can run db.session queries on the
+event loop. Password hashing, the one CPU-bound step, runs in a thread so
+it never blocks the event loop.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import select
+
+from backend.database import utcnow
+from backend.models.category import Category
+from backend.models.task import Task
+from backend.models.user import User
+from backend.services.auth_service import (
+    AuthenticationError, RegistrationError,
+)
+from backend.services.category_service import CategoryValidationError
+from backend.services.task_service import (
+    TaskNotFoundError, TaskValidationError,
+)
+
+
+class AsyncTaskService:
+    """
+    Async task reads and writes. Validation and statements come from the sync
+    TaskService the WSGI routes use; every query runs on an async session.
+    """
+
+    TaskValidationError = TaskValidationError
+    TaskNotFoundError = TaskNotFoundError
+
+    def __init__(self, session_factory, task_service):
+        self.session_factory = session_factory
+        self.task_service = task_service
+        self.versions = task_service.versions
+        self.events = task_service.events
+
+    async def create_task(
+        self, user_id, title, description, priority, hours, category_id,
+        due_date=None,
+    ):
+        task = Task(**self.task_service.task_values(
+            user_id, title, description, priority, hours, category_id, due_date
+        ))
+        async with self.session_factory() as session:
+            await self._check_category(session, user_id, category_id)
+            session.add(task)
+            await session.commit()
+        self._changed(user_id)
+        return task
+
+    async def get_tasks(
+        self, user_id, sort="priority", columns=None, expand=(), **filters
+    ):
+        stmt = self.task_service.listing(
+            user_id, sort, columns, expand, **filters
+        )
+        return await self._all(stmt, columns)
+
+    async def get_tasks_page(
+        self, user_id, limit=None, cursor=None, sort="priority", columns=None,
+        expand=(), **filters,
+    ):
+        limit = self.task_service.page_size(limit)
+        stmt = self.task_service.listing(
+            user_id, sort, columns, expand, cursor, **filters
+        )
+        rows = await self._all(stmt.limit(limit + 1), columns)
+        return self.task_service.split_page(rows, limit, sort)
+
+    async def get_task(self, task_id, user_id=None):
+        async with self.session_factory() as session:
+            return await self._live_task(session, task_id, user_id)
+
+    async def update_task(self, task_id, user_id=None, **kwargs):
+        async with self.session_factory() as session:
+            t = await self._live_task(session, task_id, user_id)
+            row = self.task_service.update_values({**kwargs, "id": t.id})
+            if "category_id" in row:
+                await self._check_category(
+                    session, t.user_id, row["category_id"]
+                )
+
+            for k, v in row.items():
+                setattr(t, k, v)
+            await session.commit()
+        self._changed(t.user_id)
+        return t
+
+    async def delete_task(self, task_id, user_id=None):
+        async with self.session_factory() as session:
+            t = await self._live_task(session, task_id, user_id)
+            t.deleted_at = utcnow()
+            await session.commit()
+        self._changed(t.user_id)
+
+    def _changed(self, user_id):
+        self.versions.bump(user_id, "tasks")
+        self.events.changed(user_id, "tasks")
+
+    async def _live_task(self, session, task_id, user_id=None):
+        t = await session.get(Task, task_id)
+        if (
+            not t
+            or t.deleted_at is not None
+            or user_id not in (None, t.user_id)
+        ):
+            raise TaskNotFoundError()
+        return t
+
+    async def _check_category(self, session, user_id, category_id):
+        stmt = self.task_service.live_category(user_id, category_id)
+        if stmt is not None and await session.scalar(stmt) is None:
+            raise TaskValidationError("unknown category_id")
+
+    async def _all(self, stmt, columns):
+        async with self.session_factory() as session:
+            if columns:
+                return (await session.execute(stmt)).all()
+            return (await session.scalars(stmt)).all()
+
+
+class AsyncCategoryService:
+    """
+    Async category reads and writes, validated by the sync CategoryService.
+    """
+
+    CategoryValidationError = CategoryValidationError
+
+    def __init__(self, session_factory, category_service):
+        self.session_factory = session_factory
+        self.category_service = category_service
+        self.versions = category_service.versions
+        self.events = category_service.events
+
+    async def create_category(self, user_id, name, description=None):
+        cat = Category(
+            **self.category_service.category_values(user_id, name, description)
+        )
+
+        async with self.session_factory() as session:
+            existing = await session.scalar(
+                select(Category.id).where(
+                    Category.user_id == user_id, Category.name == name,
+                    Category.deleted_at.is_(None),
+                )
+            )
+            if existing:
+                raise CategoryValidationError("Duplicate category")
+
+            session.add(cat)
+            await session.commit()
+        self.versions.bump(user_id, "categories")
+        self.events.changed(user_id, "categories")
+        return cat
+
+    async def get_all_categories(self, user_id, columns=None):
+        live = (Category.user_id == user_id, Category.deleted_at.is_(None))
+        async with self.session_factory() as session:
+            if columns:
+                return (
+                    await session.execute(select(*columns).where(*live))
+                ).all()
+            return (await session.scalars(select(Category).where(*live))).all()
+
+
+class AsyncAuthService:
+    """
+    Async registration and login. Token operations are delegated to the
+    sync AuthService the WSGI routes use, so both serving modes share one
+    token cache and one set of revoked tokens.
+    """
+
+    AuthenticationError = AuthenticationError
+    RegistrationError = RegistrationError
+
+    def __init__(self, session_factory, auth_service, hash_workers=0):
+        self.session_factory = session_factory
+        self.auth_service = auth_service
+        # Hashes run off the event loop: on a pool of hash_workers threads,
+        # which caps how many are computed at once, else on the loop's
+        # default executor
+        self.hash_pool = (
+            ThreadPoolExecutor(
+                max_workers=hash_workers, thread_name_prefix="password-hash"
+            )
+            if hash_workers
+            else None
+        )
+
+    async def register_user(self, username, password):
+        self.auth_service.check_registration(username, password)
+
+        async with self.session_factory() as session:
+            existing = await session.scalar(
+                select(User.id).where(User.username == username)
+            )
+            if existing:
+                raise RegistrationError("User already exists")
+
+            user = User(username=username)
+            await self._run_hash(
+                user.set_password, password,
+                self.auth_service.password_hash_method,
+            )
+            session.add(user)
+            await session.commit()
+        return user
+
+    async def authenticate_user(self, username, password):
+        async with self.session_factory() as session:
+            user = await session.scalar(
+                select(User).where(User.username == username)
+            )
+            if not user or not await self._run_hash(
+                user.check_password, password
+            ):
+                raise AuthenticationError("Invalid credentials")
+
+            # Upgrade hashes made with outdated parameters while we have the
+            # password
+            if user.needs_rehash(self.auth_service.password_hash_method):
+                await self._run_hash(
+                    user.set_password, password,
+                    self.auth_service.password_hash_method,
+                )
+                await session.commit()
+        return user
+
+    def generate_token(self, user_id):
+        return self.auth_service.generate_token(user_id)
+
+    async def verify_token(self, token):
+        # The revocation lookup may be a database or network round trip
+        return await asyncio.to_thread(self.auth_service.verify_token, token)
+
+    def revoke_token(self, token):
+        self.auth_service.revoke_token(token)
+
+    async def _run_hash(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.hash_pool, fn, *args)
@@ -1,7 +1,16 @@
+import hashlib
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
 import jwt
 from datetime import datetime, timedelta, timezone
 from backend.database import db
-from backend.models.user import User
+from backend.models.shard import ShardPlacement
+from backend.models.user import User, DEFAULT_HASH_METHOD
+from backend.services.token_revocations import TokenRevocations
+from backend.signals import token_verified
 
 
 class AuthenticationError(Exception):
@@ -17,28 +26,53 @@ class AuthService:
     AuthenticationError = AuthenticationError
     RegistrationError = RegistrationError
 
-    def __init__(self, secret_key, algorithm, expiration_hours):
+    def __init__(
+        self, secret_key, algorithm, expiration_hours, token_cache_size=1024,
+        token_cache_ttl=300, password_hash_method=None, shards=None,
+        revocations=None,
+    ):
         self.secret_key = secret_key
         self.algorithm = algorithm
         self.expiration_hours = expiration_hours
 
-    def register_user(self, username, password):
-        if not username or not username.strip():
-            raise RegistrationError("Username and password are required")
-
-        if not password:
-            raise RegistrationError("Username and password are required")
+        # Password hashing is deliberately slow; it runs in the request thread
+        # (hashlib releases the GIL, so other threads go on meanwhile)
+        self.password_hash_method = password_hash_method or DEFAULT_HASH_METHOD
+
+        # Verified tokens: sha256(token) -> (user_id, cached until). Bounded
+        # LRU; an entry never outlives the token's own exp claim.
+        self.token_cache_size = token_cache_size
+        self.token_cache_ttl = token_cache_ttl
+        self._token_cache = OrderedDict()
+        # Revoked tokens, checked when a token is not in the cache; see
+        # backend/services/token_revocations.py for the stores
+        self.revocations = (
+            revocations if revocations is not None else TokenRevocations()
+        )
+        self._lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        # ShardRouter placing new users on a shard (backend/shards.py)
+        self.shards = shards
 
-        if len(password) < 6:
-            raise RegistrationError("Password must be at least 6 characters")
+    def register_user(self, username, password):
+        self.check_registration(username, password)
 
         existing = User.query.filter_by(username=username).first()
         if existing:
             raise RegistrationError("User already exists")
 
         user = User(username=username)
-        user.set_password(password)
+        user.set_password(password, self.password_hash_method)
         db.session.add(user)
+        if self.shards is not None:
+            # Placed with the user, so they are never routed before it exists
+            db.session.flush()
+            db.session.add(
+                ShardPlacement(
+                    user_id=user.id, shard=self.shards.ring.node_for(user.id)
+                )
+            )
         db.session.commit()
 
         return user
@@ -47,18 +81,118 @@ class AuthService:
         user = User.query.filter_by(username=username).first()
         if not user or not user.check_password(password):
             raise AuthenticationError("Invalid credentials")
+
+        # Upgrade hashes made with outdated parameters while we have the
+        # password
+        if user.needs_rehash(self.password_hash_method):
+            user.set_password(password, self.password_hash_method)
+            db.session.commit()
         return user
 
     def generate_token(self, user_id):
         exp = datetime.now(timezone.utc) + timedelta(hours=self.expiration_hours)
-        return jwt.encode({"user_id": user_id, "exp": exp}, self.secret_key, algorithm=self.algorithm)
+        # jti makes every token unique, so revoking one never affects another
+        payload = {"user_id": user_id, "exp": exp, "jti": secrets.token_hex(8)}
+        return jwt.encode(payload, self.secret_key, algorithm=self.algorithm)
 
     def verify_token(self, token):
+        started = time.perf_counter()
+        digest = self._token_digest(token)
+        now = time.time()
+
+        with self._lock:
+            cached = self._token_cache.get(digest)
+            if cached and cached[1] > now:
+                self._token_cache.move_to_end(digest)
+                self.cache_hits += 1
+            else:
+                cached = None
+                self.cache_misses += 1
+
+        if cached:
+            self._verified(started, cached=True, valid=True)
+            return cached[0]
+
+        # Only on a miss: revoke_token drops the entry in this process, and
+        # other processes' entries expire within token_cache_ttl
+        if self.revocations.is_revoked(digest):
+            self._verified(started, cached=False, valid=False)
+            raise AuthenticationError("Invalid token")
+
+        try:
+            data = self._decode(token)
+        except AuthenticationError:
+            self._verified(started, cached=False, valid=False)
+            raise
+        self._verified(started, cached=False, valid=True)
+
+        if self.token_cache_size > 0:
+            # A token without exp is cached for the TTL like any other
+            cached_until = min(
+                data.get("exp", now + self.token_cache_ttl),
+                now + self.token_cache_ttl,
+            )
+            with self._lock:
+                self._token_cache[digest] = (data["user_id"], cached_until)
+                self._token_cache.move_to_end(digest)
+                while len(self._token_cache) > self.token_cache_size:
+                    self._token_cache.popitem(last=False)
+        return data["user_id"]
+
+    def revoke_token(self, token):
+        """
+        Reject this token from now on, in every process sharing the
+        revocations.
+        """
+        data = self._decode(token)
+        digest = self._token_digest(token)
+        # Kept until exp; a token without exp stays revoked
+        self.revocations.revoke(digest, data.get("exp"))
+        with self._lock:
+            self._token_cache.pop(digest, None)
+
+    def cache_stats(self):
+        with self._lock:
+            lookups = self.cache_hits + self.cache_misses
+            return {
+                "hits": self.cache_hits,
+                "misses": self.cache_misses,
+                "size": len(self._token_cache),
+                "hit_ratio": self.cache_hits / lookups if lookups else 0.0,
+            }
+
+    def check_registration(self, username, password):
+        """
+        Raise RegistrationError unless username and password are acceptable.
+        """
+        if not username or not username.strip():
+            raise RegistrationError("Username and password are required")
+
+        if not password:
+            raise RegistrationError("Username and password are required")
+
+        if len(password) < 6:
+            raise RegistrationError("Password must be at least 6 characters")
+
+    def _decode(self, token):
         try:
             data = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
-            return data["user_id"]
         except Exception:
             raise AuthenticationError("Invalid token")
+        if "user_id" not in data:
+            raise AuthenticationError("Invalid token")
+        return data
+
+    def _verified(self, started, cached, valid):
+        token_verified.send(
+            self, seconds=time.perf_counter() - started, cached=cached,
+            valid=valid,
+        )
+
+    def _token_digest(self, token):
+        return hashlib.sha256(
+            token.encode() if isinstance(token, str) else token
+        ).digest()
 
     def get_user_by_id(self, user_id):
-        return db.session.get(User, user_id)
\ No newline at end of file
+        return db.session.get(User, user_id)
@@ -1,5 +1,10 @@
-from backend.database import db
+from sqlalchemy import update
+
+from backend.database import db, utcnow
+from backend.events import default_broker
 from backend.models.category import Category
+from backend.models.task import Task
+from backend.services.collection_versions import default_versions
 
 
 class CategoryValidationError(Exception):
@@ -11,31 +16,55 @@ class CategoryService:
     # Required by tests
     CategoryValidationError = CategoryValidationError
 
+    def __init__(self, versions=None, events=None, shards=None):
+        self.versions = versions if versions is not None else default_versions
+        self.events = events if events is not None else default_broker
+        # ShardRouter when categories are split over shards (backend/shards.py)
+        self.shards = shards
+
     def create_category(self, user_id, name, description=None):
-        
-        if not name or not name.strip():
-            raise CategoryValidationError("Name required")
+        self._use_shard(user_id)
+        values = self.category_values(user_id, name, description)
 
-        existing = Category.query.filter_by(user_id=user_id, name=name).first()
+        existing = Category.query.filter_by(
+            user_id=user_id, name=name, deleted_at=None
+        ).first()
         if existing:
             raise CategoryValidationError("Duplicate category")
 
-        cat = Category(
-            name=name.strip(),
-            description=description.strip() if description else None,
-            user_id=user_id,
-        )
+        cat = Category(**values)
         db.session.add(cat)
         db.session.commit()
+        self._changed(user_id, "categories")
         return cat
 
-    def get_all_categories(self, user_id):
-        return Category.query.filter_by(user_id=user_id).all()
+    def get_all_categories(self, user_id, columns=None):
+        self._use_shard(user_id)
+        query = Category.query.filter_by(user_id=user_id, deleted_at=None)
+        if columns:
+            query = query.with_entities(*columns)
+        return query.all()
 
-    def update_category(self, category_id, name, description=None):
+    def get_category(self, category_id, user_id=None):
+        """
+        The category; with user_id, only if it is one of that user's
+        categories.
+        """
+        if user_id is not None:
+            self._use_shard(user_id)
         cat = db.session.get(Category, category_id)
-        if not cat:
+        if (
+            not cat
+            or cat.deleted_at is not None
+            or user_id not in (None, cat.user_id)
+        ):
             raise CategoryValidationError("Category not found")
+        return cat
+
+    def update_category(
+        self, category_id, name, description=None, user_id=None
+    ):
+        cat = self.get_category(category_id, user_id)
 
         if not name or not name.strip():
             raise CategoryValidationError("Name required")
@@ -43,12 +72,47 @@ class CategoryService:
         cat.name = name.strip()
         cat.description = description.strip() if description else None
         db.session.commit()
+        self._changed(cat.user_id, "categories", "tasks")
         return cat
 
-    def delete_category(self, category_id):
-        cat = db.session.get(Category, category_id)
-        if not cat:
-            raise CategoryValidationError("Category not found")
+    def delete_category(self, category_id, user_id=None):
+        cat = self.get_category(category_id, user_id)
+
+        # Deleting a category (a tombstone for GET /sync) also clears
+        # category_id on its tasks, which moves their updated_at
+        cat.deleted_at = utcnow()
+        db.session.execute(
+            update(Task)
+            .where(Task.category_id == cat.id, Task.deleted_at.is_(None))
+            .values(category_id=None),
+            execution_options={"synchronize_session": False},
+        )
+        db.session.commit()
+        self._changed(cat.user_id, "categories", "tasks")
+
+    def category_values(self, user_id, name, description=None):
+        """
+        Validate the fields of a new category and return its column values.
+        """
+        if not name or not name.strip():
+            raise CategoryValidationError("Name required")
+        return {
+            "name": name.strip(),
+            "description": description.strip() if description else None,
+            "user_id": user_id,
+        }
+
+    def _use_shard(self, user_id):
+        """
+        Send this session's task and category statements to the user's shard.
+        """
+        if self.shards is not None:
+            self.shards.use(db.session, user_id)
 
-        db.session.delete(cat)
-        db.session.commit()
\ No newline at end of file
+    def _changed(self, user_id, *collections):
+        """
+        Record that the user's collections changed (invalidates ETags, notifies
+        /events).
+        """
+        self.versions.bump(user_id, *collections)
+        self.events.changed(user_id, *collections)
@@ -0,0 +1,69 @@
+import threading
+import uuid
+
+
+class CollectionVersions:
+    """
+    Per-user version counters of the "tasks" and "categories" collections.
+
+    Every write through TaskService/CategoryService bumps the version of the
+    collections it changed, so a version identifies one state of a user's
+    data and can be used as an ETag or cache key without querying the
+    database. Versions live in this process; the epoch (random per instance)
+    keeps them from being mistaken for versions handed out by another
+    process or before a restart. Another process never sees the bumps, so
+    they only back ETags and cached listings when a single process serves
+    the app (CACHE_BACKEND=memory); use SharedCollectionVersions otherwise.
+    """
+
+    def __init__(self):
+        self.epoch = uuid.uuid4().hex[:12]
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id, collection):
+        with self._lock:
+            return (
+                f"{self.epoch}.{self._versions.get((user_id, collection), 0)}"
+            )
+
+    def bump(self, user_id, *collections):
+        with self._lock:
+            for collection in collections:
+                key = (user_id, collection)
+                self._versions[key] = self._versions.get(key, 0) + 1
+
+
+# Shared by every service in the process unless one is passed explicitly
+default_versions = CollectionVersions()
+
+
+class SharedCollectionVersions:
+    """
+    CollectionVersions kept in a Redis-compatible store, so that every
+    worker sees the same versions. The epoch is stored alongside the
+    counters: if the store is wiped, a new epoch is drawn and versions
+    handed out before can never match again.
+    """
+
+    def __init__(self, client, prefix="todo:version:"):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, user_id, collection):
+        epoch, version = self.client.mget(
+            self.prefix + "epoch", self._key(user_id, collection)
+        )
+        if epoch is None:
+            self.client.setnx(self.prefix + "epoch", uuid.uuid4().hex[:12])
+            epoch = self.client.get(self.prefix + "epoch")
+        if isinstance(epoch, bytes):
+            epoch = epoch.decode()
+        return f"{epoch}.{int(version or 0)}"
+
+    def bump(self, user_id, *collections):
+        for collection in collections:
+            self.client.incr(self._key(user_id, collection))
+
+    def _key(self, user_id, collection):
+        return f"{self.prefix}{collection}:{user_id}"
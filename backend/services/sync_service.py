@@ -0,0 +1,146 @@
+"""
+Incremental sync for clients that keep a local copy of their data.
+
+A sync token records, per collection, how far the client has read the
+user's rows in (updated_at, id) order. changes() returns the rows after that
+position: live rows in full and deleted ones (tombstones) as ids, read along
+the (user_id, updated_at) indexes, so a sync costs what changed rather than
+what exists.
+
+Timestamps come from the writers' clocks and a transaction may commit a
+little after the updated_at it wrote, so a finished sync hands out a
+position overlap_seconds before the time it started: changes in that window
+may be sent twice (applying them is idempotent) but none is skipped.
+"""
+import base64
+import json
+from datetime import datetime, timedelta
+
+from sqlalchemy import or_, select
+
+from backend.database import db, utcnow
+from backend.models.category import Category
+from backend.models.task import Task
+from backend.serializers import (
+    CATEGORY_COLUMNS, TASK_COLUMNS, serialize_categories, serialize_tasks,
+)
+
+
+class SyncTokenError(Exception):
+    pass
+
+
+# (response key, model, columns of a live row)
+COLLECTIONS = (
+    ("tasks", Task, TASK_COLUMNS),
+    ("categories", Category, CATEGORY_COLUMNS),
+)
+SERIALIZERS = {"tasks": serialize_tasks, "categories": serialize_categories}
+
+
+class SyncService:
+
+    SyncTokenError = SyncTokenError
+
+    def __init__(self, page_size=1000, overlap_seconds=5, shards=None):
+        self.page_size = page_size
+        self.overlap = timedelta(seconds=overlap_seconds)
+        # ShardRouter when tasks are split over shards (backend/shards.py)
+        self.shards = shards
+
+    def changes(self, user_id, since=None):
+        """
+        Return the user's changes since the token (everything without one):
+
+            {"tasks": [...], "deleted_tasks": [ids], "categories": [...],
+             "deleted_categories": [ids], "next": token, "has_more": bool}
+
+        At most page_size rows per collection are returned; while has_more is
+        true, call again with next straight away. A first sync (no token)
+        sends no tombstones except for rows deleted while it is paging.
+        """
+        started = utcnow()
+        positions = self._decode(since) if since else {}
+        if self.shards is not None:
+            self.shards.use(db.session, user_id)
+        result, next_positions, has_more = {}, {}, False
+
+        for key, model, columns in COLLECTIONS:
+            # [updated_at, id, start of the first sync or None]
+            after, after_id, initial = positions.get(key) or (
+                None, 0, started - self.overlap
+            )
+            stmt = select(*columns, model.updated_at, model.deleted_at).where(
+                model.user_id == user_id
+            )
+            if after is not None:
+                # The >= is the range seek on the index, the OR breaks ties by
+                # id
+                stmt = stmt.where(
+                    model.updated_at >= after,
+                    or_(model.updated_at > after, model.id > after_id),
+                )
+            if initial is not None:
+                # Rows deleted before the first sync began are of no interest
+                stmt = stmt.where(
+                    or_(
+                        model.deleted_at.is_(None), model.updated_at >= initial
+                    )
+                )
+            rows = db.session.execute(
+                stmt.order_by(model.updated_at, model.id).limit(
+                    self.page_size + 1
+                )
+            ).all()
+
+            if len(rows) > self.page_size:
+                rows = rows[:self.page_size]
+                last = rows[-1]
+                next_positions[key] = (last.updated_at, last.id, initial)
+                has_more = True
+            else:
+                next_positions[key] = (started - self.overlap, 0, None)
+
+            width = len(columns)
+            result[key] = SERIALIZERS[key](
+                [row[:width] for row in rows if row.deleted_at is None]
+            )
+            result[f"deleted_{key}"] = [
+                row.id for row in rows if row.deleted_at is not None
+            ]
+
+        result["next"] = self._encode(next_positions)
+        result["has_more"] = has_more
+        return result
+
+    def _encode(self, positions):
+        raw = json.dumps(
+            {
+                key: [
+                    updated_at.isoformat(),
+                    last_id,
+                    initial.isoformat() if initial else None,
+                ]
+                for key, (updated_at, last_id, initial) in positions.items()
+            },
+            separators=(",", ":"),
+        )
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+    def _decode(self, token):
+        try:
+            padded = token + "=" * (-len(token) % 4)
+            raw = json.loads(base64.urlsafe_b64decode(padded))
+            positions = {}
+            for key, _, _ in COLLECTIONS:
+                updated_at, last_id, initial = raw[key]
+                if not isinstance(last_id, int):
+                    raise ValueError()
+                positions[key] = (
+                    datetime.fromisoformat(updated_at),
+                    last_id,
+                    datetime.fromisoformat(initial) if initial else None,
+                )
+        except Exception:
+            raise SyncTokenError("invalid sync token")
+        return positions
@@ -0,0 +1,70 @@
+"""
+Incremental parsers for POST /tasks/import.
+
+Both take an iterable of raw lines (bytes or str), e.g. the request stream,
+and yield (line_number, record, error) one record at a time, so the body is
+never held in memory. record is a dict of strings/values as found in the
+input; error is a message when the line could not be parsed.
+"""
+import csv
+import json
+
+
+def _decoded(lines):
+    # Bytes that are not UTF-8 become lone surrogates, so one bad line is
+    # reported by _valid_utf8 instead of ending the whole import
+    for line in lines:
+        yield (
+            line.decode("utf-8", "surrogateescape")
+            if isinstance(line, bytes)
+            else line
+        )
+
+
+def _valid_utf8(*texts):
+    try:
+        for text in texts:
+            if isinstance(text, str):
+                text.encode("utf-8")
+    except UnicodeEncodeError:
+        return False
+    return True
+
+
+def parse_ndjson(lines):
+    for number, line in enumerate(_decoded(lines), start=1):
+        if not line.strip():
+            continue
+        if not _valid_utf8(line):
+            yield number, None, "invalid UTF-8"
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield number, None, "invalid JSON"
+            continue
+        if not isinstance(record, dict):
+            yield number, None, "expected a JSON object"
+            continue
+        yield number, record, None
+
+
+def parse_csv(lines):
+    reader = csv.DictReader(_decoded(lines))
+    try:
+        for record in reader:
+            # line_num is the physical line the record ended on (header is line
+            # 1)
+            record = {k: v for k, v in record.items() if k is not None}
+            if not _valid_utf8(*record, *record.values()):
+                yield reader.line_num, None, "invalid UTF-8"
+                continue
+            yield reader.line_num, record, None
+    except csv.Error as e:
+        yield reader.line_num, None, f"invalid CSV: {e}"
+
+
+PARSERS = {
+    "ndjson": parse_ndjson,
+    "csv": parse_csv,
+}
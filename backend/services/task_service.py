@@ -1,6 +1,19 @@
-from backend.database import db
-from backend.models.task import Task
-from datetime import datetime
+from backend.database import db, utcnow
+from backend.events import default_broker
+from backend.models.category import Category
+from backend.models.task import SEARCH_TABLE, Task
+from backend.serializers import PRIORITY_NAMES, PRIORITY_VALUES
+from backend.services.collection_versions import default_versions
+from datetime import date, datetime
+from sqlalchemy import (
+    and_, case, column, func, insert, literal_column, or_, select, table,
+    update,
+)
+from sqlalchemy.orm import contains_eager
+import base64
+import json
+import re
+import time
 
 
 class TaskValidationError(Exception):
@@ -11,68 +24,886 @@ class TaskNotFoundError(Exception):
     pass
 
 
-class TaskService:
+class TaskBatchError(TaskValidationError):
+    """Raised by atomic batch operations; errors lists every rejected item."""
 
-    TaskValidationError = TaskValidationError
-    TaskNotFoundError = TaskNotFoundError
+    def __init__(self, errors):
+        super().__init__("batch rejected")
+        self.errors = errors
 
-    def create_task(self, user_id, title, description, priority, hours, category_id, due_date=None):
 
-        if not title or not title.strip():
-            raise TaskValidationError("title required")
+# Columns a listing may be ordered by. Every key is NOT NULL, and the task id
+# is always appended as a tie-breaker so the order is total and stable.
+SORT_COLUMNS = {
+    "priority": Task.priority,
+    "hours": Task.hours,
+    "id": Task.id,
+}
 
-        if priority not in [1, 2, 3]:
-            raise TaskValidationError("invalid priority")
+# Fields an update may change
+UPDATABLE_FIELDS = (
+    "title", "description", "priority", "hours", "status", "category_id",
+    "due_date",
+)
 
-        if hours is None or hours < 0:
-            raise TaskValidationError("hours must be non-negative")
+# Values of Task.status
+STATUSES = ("Pending", "In Progress", "Completed")
+
+# Related records a listing may inline (?expand=...)
+EXPANSIONS = ("category",)
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# The FTS5 index of task titles and descriptions (see backend/models/task.py)
+search_index = table(SEARCH_TABLE, column("rowid"))
+MAX_SEARCH_TERMS = 10
 
-        # FIX: Parse due_date if it's a string
-        if due_date and isinstance(due_date, str):
-            try:
-                due_date = datetime.fromisoformat(due_date.replace('Z', '+00:00'))
-            except:
-                due_date = datetime.strptime(due_date, '%Y-%m-%d')
 
+class TaskService:
+
+    TaskValidationError = TaskValidationError
+    TaskNotFoundError = TaskNotFoundError
+    TaskBatchError = TaskBatchError
+
+    def __init__(self, versions=None, events=None, shards=None):
+        self.versions = versions if versions is not None else default_versions
+        self.events = events if events is not None else default_broker
+        # ShardRouter when tasks are split over shards (backend/shards.py)
+        self.shards = shards
+
+    def create_task(self, user_id, title, description, priority, hours, category_id, due_date=None):
+        self._use_shard(user_id)
         task = Task(
-            title=title.strip(),
-            description=description.strip() if description else None,
-            priority=priority,
-            hours=hours,
-            category_id=category_id,
-            user_id=user_id,
-            due_date=due_date
+            **self.task_values(
+                user_id, title, description, priority, hours, category_id,
+                due_date,
+            )
         )
+        self._check_category(user_id, category_id)
 
         db.session.add(task)
         db.session.commit()
+        self._changed(user_id)
         return task
 
-    def get_tasks(self, user_id):
-        return Task.query.filter_by(user_id=user_id).order_by(Task.priority).all()
+    def create_tasks(self, user_id, items, atomic=False):
+        """
+        Create many tasks in one transaction.
+
+        Every item (a dict with create_task's argument names) is validated
+        first, then the valid ones are written with a single executemany
+        INSERT. Returns (created_ids, errors) where errors lists the index and
+        message of each rejected item. In atomic mode any error rejects the
+        whole batch with a TaskBatchError.
+        """
+        self._use_shard(user_id)
+        categories = self._live_category_ids(
+            user_id,
+            [
+                item.get("category_id")
+                for item in items
+                if isinstance(item, dict)
+            ],
+        )
+        rows, errors = [], []
+        for index, item in enumerate(items):
+            try:
+                if (
+                    item.get("category_id") is not None
+                    and item.get("category_id") not in categories
+                ):
+                    raise TaskValidationError("unknown category_id")
+                rows.append(self.task_values(
+                    user_id,
+                    item.get("title"),
+                    item.get("description"),
+                    item.get("priority"),
+                    item.get("hours"),
+                    item.get("category_id"),
+                    item.get("due_date"),
+                ))
+            except (TaskValidationError, AttributeError, TypeError) as e:
+                errors.append(
+                    {"index": index, "error": str(e) or "invalid task"}
+                )
+
+        if errors and atomic:
+            raise TaskBatchError(errors)
+        if not rows:
+            return [], errors
+
+        self._assign_ids(rows)
+        stmt = insert(Task).returning(Task.id, sort_by_parameter_order=True)
+        created = db.session.scalars(stmt, rows).all()
+        db.session.commit()
+        self._changed(user_id)
+        return created, errors
+
+    def import_tasks(
+        self, user_id, records, chunk_size=500, max_reported_errors=1000
+    ):
+        """
+        Create tasks from a stream of (line, record, error) tuples as produced
+        by the parsers in backend.services.task_import.
+
+        Records are validated like create_task and may name their category
+        ("category") instead of giving its id; the user's categories are
+        loaded once up front. Valid rows are inserted chunk_size at a time,
+        one transaction per chunk. Returns a summary with the number of rows
+        inserted and rejected, the first max_reported_errors rejections and
+        the throughput.
+        """
+        started = time.perf_counter()
+        self._use_shard(user_id)
+        categories = dict(
+            db.session.execute(
+                select(Category.name, Category.id).where(
+                    Category.user_id == user_id, Category.deleted_at.is_(None)
+                )
+            ).all()
+        )
+        category_ids = set(categories.values())
+
+        inserted, rejected, errors, chunk = 0, 0, [], []
+        for line, record, error in records:
+            if error is None:
+                try:
+                    chunk.append(
+                        self._import_values(
+                            user_id, record, categories, category_ids
+                        )
+                    )
+                except (
+                    TaskValidationError, AttributeError, TypeError, ValueError
+                ) as e:
+                    error = (
+                        str(e)
+                        if isinstance(e, TaskValidationError)
+                        else "invalid task"
+                    )
+            if error is not None:
+                rejected += 1
+                if len(errors) < max_reported_errors:
+                    errors.append({"line": line, "error": error})
+                continue
 
-    def get_task(self, task_id):
+            if len(chunk) >= chunk_size:
+                inserted += self._insert_chunk(chunk)
+                chunk = []
+
+        if chunk:
+            inserted += self._insert_chunk(chunk)
+        if inserted:
+            self._changed(user_id)
+
+        elapsed = time.perf_counter() - started
+        return {
+            "inserted": inserted,
+            "rejected": rejected,
+            "errors": errors,
+            "elapsed_seconds": round(elapsed, 3),
+            "rows_per_second": (
+                round((inserted + rejected) / elapsed, 1) if elapsed else None
+            ),
+        }
+
+    def get_tasks(
+        self, user_id, sort="priority", columns=None, expand=(), **filters
+    ):
+        """
+        Return every task of the user matching the filters, in sort order.
+        With columns, only those are selected and rows are returned instead
+        of Task objects. expand names related records (EXPANSIONS) to join
+        into the same statement: their columns may then be selected, and
+        Task objects come with the relationship already loaded.
+        """
+        self._use_shard(user_id)
+        query = self._filtered_query(user_id, columns, expand, **filters)
+        return query.order_by(*self._sort_key(sort)).all()
+
+    def get_tasks_page(
+        self, user_id, limit=None, cursor=None, sort="priority", columns=None,
+        expand=(), **filters,
+    ):
+        """
+        Return one page of tasks and the cursor of the next page (or None).
+
+        Pagination is keyset based: the cursor carries the sort value and id of
+        the last row served, so each page is a range seek on the index instead
+        of an OFFSET that grows with the number of tasks. columns must then
+        include the sort column and Task.id.
+        """
+        limit = self.page_size(limit)
+        self._use_shard(user_id)
+        query = self._filtered_query(user_id, columns, expand, **filters)
+        column, tiebreak = self._sort_key(sort)
+
+        if cursor:
+            query = query.filter(self._after_cursor(cursor, sort))
+
+        # Fetch one extra row to know whether another page exists
+        rows = query.order_by(column, tiebreak).limit(limit + 1).all()
+        return self.split_page(rows, limit, sort)
+
+    def search_tasks(
+        self, user_id, q, limit=None, cursor=None, columns=None, **filters
+    ):
+        """
+        Return one page of the user's tasks matching the search terms and the
+        cursor of the next page (or None).
+
+        Every word of q must occur in the title or description, as a word or
+        a word prefix ("gro" finds "groceries"). Tasks with every word in the
+        title rank first, then the others; each group newest first. On SQLite
+        both groups are read from the FTS5 index in rowid order and stop at
+        the page size, so a page costs the same whatever the number of
+        matches (bm25 would count every match of each word across all users
+        first). The cursor carries the group and id of the last row served.
+        Other databases fall back to substring matching with LIKE, in id order.
+        """
+        terms = re.findall(r"\w+", q or "")
+        if not terms:
+            raise TaskValidationError("search query is required")
+        if len(terms) > MAX_SEARCH_TERMS:
+            raise TaskValidationError("too many search terms")
+        limit = self.page_size(limit)
+        self._use_shard(user_id)
+
+        if db.session.get_bind(Task).dialect.name != "sqlite":
+            query = self._filtered_query(user_id, columns, **filters)
+            for term in terms:
+                pattern = f"%{term}%"
+                query = query.filter(
+                    or_(
+                        Task.title.ilike(pattern),
+                        Task.description.ilike(pattern),
+                    )
+                )
+            if cursor:
+                query = query.filter(self._after_cursor(cursor, "id"))
+            return self.split_page(
+                query.order_by(Task.id).limit(limit + 1).all(), limit, "id"
+            )
+
+        group, before_id = 1, None
+        if cursor:
+            cursor_sort, group, before_id = self._decode_cursor(cursor)
+            if cursor_sort != "search" or group not in (1, 2):
+                raise TaskValidationError("invalid cursor")
+
+        # The owner term restricts each match to this user's documents
+        words = " ".join(f'"{term}"*' for term in terms)
+        owner = f'owner:"u{int(user_id)}"'
+        matches = {
+            1: f"{owner} AND title:({words})",
+            2: (
+                f"{owner} AND ({{title description}}:({words}) "
+                f"NOT title:({words}))"
+            ),
+        }
+        conditions = self._conditions(user_id, **filters)
+
+        rows = []
+        for current in (1, 2):
+            if current < group:
+                continue
+            stmt = (
+                select(*(columns or [Task]))
+                .select_from(
+                    search_index.join(Task, Task.id == search_index.c.rowid)
+                )
+                .where(
+                    literal_column(SEARCH_TABLE).op("MATCH")(matches[current]),
+                    *conditions,
+                )
+            )
+            # A cursor id of 0 starts at the top of its group
+            if current == group and before_id:
+                stmt = stmt.where(search_index.c.rowid < before_id)
+            found = db.session.execute(
+                stmt.order_by(search_index.c.rowid.desc()).limit(
+                    limit + 1 - len(rows)
+                )
+            )
+            found = found.all() if columns else found.scalars().all()
+            if len(rows) + len(found) > limit:
+                last_served = limit - 1 - len(rows)
+                page = (rows + found)[:limit]
+                # The page may end exactly at the last match of the first group
+                last_id = found[last_served].id if last_served >= 0 else 0
+                return page, self._encode_cursor("search", current, last_id)
+            rows += found
+        return rows, None
+
+    def get_stats(self, user_id, today=None):
+        """
+        Aggregates of the user's tasks, computed with two GROUP BY queries:
+        counts and hours per status and priority (which also give the totals
+        and the overdue count), and tasks and hours per category. A task is
+        overdue when it is not completed and was due before today.
+        """
+        today = datetime.combine(today or date.today(), datetime.min.time())
+        self._use_shard(user_id)
+        status = func.coalesce(Task.status, "Pending")
+        overdue = case(
+            (and_(Task.due_date < today, status != "Completed"), 1), else_=0
+        )
+
+        by_status_priority = db.session.execute(
+            select(
+                status, Task.priority, func.count(), func.sum(Task.hours),
+                func.sum(overdue),
+            )
+            .where(*self._conditions(user_id))
+            .group_by(status, Task.priority)
+        ).all()
+        # Aggregated along ix_task_user_category, then joined to the names
+        per_category = (
+            select(
+                Task.category_id, func.count().label("tasks"),
+                func.sum(Task.hours).label("hours"),
+            )
+            .where(*self._conditions(user_id))
+            .group_by(Task.category_id)
+            .subquery()
+        )
+        by_category = db.session.execute(
+            select(
+                per_category.c.category_id, Category.name,
+                per_category.c.tasks, per_category.c.hours,
+            )
+            .outerjoin(
+                Category,
+                and_(
+                    Category.id == per_category.c.category_id,
+                    Category.user_id == user_id,
+                ),
+            )
+            .order_by(per_category.c.category_id)
+        ).all()
+
+        stats = {
+            "total": 0,
+            "hours": 0,
+            "overdue": 0,
+            "by_status": {},
+            "by_priority": {name: 0 for name in PRIORITY_NAMES.values()},
+            "hours_by_category": [
+                {
+                    "category_id": category_id, "name": name, "tasks": count,
+                    "hours": hours,
+                }
+                for category_id, name, count, hours in by_category
+            ],
+        }
+        for (
+            status_name, priority, count, hours, overdue_count
+        ) in by_status_priority:
+            stats["total"] += count
+            stats["hours"] += hours
+            stats["overdue"] += overdue_count
+            stats["by_status"][status_name] = (
+                stats["by_status"].get(status_name, 0) + count
+            )
+            priority_name = PRIORITY_NAMES.get(priority, "Medium")
+            stats["by_priority"][priority_name] += count
+        return stats
+
+    def iter_tasks(self, user_id, columns, batch_size=1000):
+        """
+        Yield lists of rows (the given columns) of all the user's tasks in id
+        order, batch_size rows at a time. Rows are streamed from the cursor
+        with yield_per, so memory use does not depend on the number of tasks.
+        """
+        self._use_shard(user_id)
+        stmt = (
+            select(*columns)
+            .where(*self._conditions(user_id))
+            .order_by(Task.id)
+            .execution_options(yield_per=batch_size)
+        )
+        for partition in db.session.execute(stmt).partitions():
+            yield partition
+
+    def get_task(self, task_id, user_id=None):
+        """The task; with user_id, only if it is one of that user's tasks."""
+        if user_id is not None:
+            self._use_shard(user_id)
         t = db.session.get(Task, task_id)
-        if not t:
+        if (
+            not t
+            or t.deleted_at is not None
+            or user_id not in (None, t.user_id)
+        ):
             raise TaskNotFoundError()
         return t
 
-    def update_task(self, task_id, **kwargs):
-        t = db.session.get(Task, task_id)
-        if not t:
-            raise TaskNotFoundError()
+    def update_tasks(self, user_id, items, atomic=False):
+        """
+        Apply partial updates to many tasks of one user in one transaction.
+
+        Each item is a dict with the task "id" and the fields to change.
+        Items are validated and checked for ownership first, then written as
+        an executemany UPDATE by primary key. Returns (updated_ids, errors);
+        an id given twice is an error on its second item.
+        """
+        self._use_shard(user_id)
+        owned = self._owned_ids(
+            user_id,
+            [item.get("id") for item in items if isinstance(item, dict)],
+        )
+        categories = self._live_category_ids(
+            user_id,
+            [
+                item.get("category_id")
+                for item in items
+                if isinstance(item, dict)
+            ],
+        )
+        rows, errors, seen = [], [], set()
+        for index, item in enumerate(items):
+            try:
+                task_id = item.get("id") if isinstance(item, dict) else None
+                if not self._is_id(task_id) or task_id not in owned:
+                    raise TaskNotFoundError("task not found")
+                if task_id in seen:
+                    raise TaskValidationError("duplicate id")
+                seen.add(task_id)
+                row = self.update_values(item)
+                if (
+                    "category_id" in row
+                    and row["category_id"] not in categories
+                ):
+                    raise TaskValidationError("unknown category_id")
+                rows.append(row)
+            except (TaskValidationError, TaskNotFoundError) as e:
+                errors.append({"index": index, "error": str(e)})
+
+        if errors and atomic:
+            raise TaskBatchError(errors)
+        rows = [row for row in rows if len(row) > 1]
+        if rows:
+            db.session.execute(update(Task), rows)
+            db.session.commit()
+            self._changed(user_id)
+        return [row["id"] for row in rows], errors
 
-        for k, v in kwargs.items():
-            if hasattr(t, k) and v is not None:
-                setattr(t, k, v)
+    def delete_tasks(self, user_id, task_ids, atomic=False):
+        """
+        Soft-delete many tasks of one user with a single UPDATE statement.
+        Returns (deleted_ids, errors); unknown or foreign ids are errors, and
+        an id given twice is deleted once.
+        """
+        self._use_shard(user_id)
+        owned = self._owned_ids(user_id, task_ids)
+        deleted, errors = [], []
+        for index, task_id in enumerate(task_ids):
+            if not self._is_id(task_id) or task_id not in owned:
+                errors.append({"index": index, "error": "task not found"})
+            elif task_id not in deleted:
+                deleted.append(task_id)
+
+        if errors and atomic:
+            raise TaskBatchError(errors)
+        if deleted:
+            db.session.execute(
+                update(Task)
+                .where(Task.user_id == user_id, Task.id.in_(deleted))
+                .values(deleted_at=utcnow()),
+                execution_options={"synchronize_session": False},
+            )
+            db.session.commit()
+            self._changed(user_id)
+        return deleted, errors
+
+    def update_task(self, task_id, user_id=None, **kwargs):
+        """
+        Change the UPDATABLE_FIELDS given (None leaves a field as it is);
+        other keys are ignored. Values are validated like update_tasks.
+        """
+        t = self.get_task(task_id, user_id)
+        row = self.update_values({**kwargs, "id": t.id})
+        if "category_id" in row:
+            self._check_category(t.user_id, row["category_id"])
+
+        for k, v in row.items():
+            setattr(t, k, v)
 
         db.session.commit()
+        self._changed(t.user_id)
         return t
 
-    def delete_task(self, task_id):
-        t = db.session.get(Task, task_id)
-        if not t:
-            raise TaskNotFoundError()
+    def delete_task(self, task_id, user_id=None):
+        t = self.get_task(task_id, user_id)
+        t.deleted_at = utcnow()
+        db.session.commit()
+        self._changed(t.user_id)
+
+    # Validation and statement building, shared with AsyncTaskService
+    # (backend/services/async_services.py); none of it touches db.session
+    def task_values(
+        self, user_id, title, description, priority, hours, category_id,
+        due_date,
+    ):
+        """Validate the fields of a new task and return its column values."""
+        if not isinstance(title, str) or not title.strip():
+            raise TaskValidationError("title required")
+
+        if priority not in [1, 2, 3]:
+            raise TaskValidationError("invalid priority")
+
+        if not self._is_number(hours) or hours < 0:
+            raise TaskValidationError("hours must be non-negative")
+
+        if description is not None and not isinstance(description, str):
+            raise TaskValidationError("invalid description")
+
+        return {
+            "title": title.strip(),
+            "description": description.strip() if description else None,
+            "priority": priority,
+            "hours": hours,
+            "category_id": category_id,
+            "user_id": user_id,
+            "due_date": self._parse_due_date(due_date) if due_date else None,
+        }
+
+    def update_values(self, item):
+        """Validate a partial update and return it as a row keyed by column."""
+        row = {"id": item["id"]}
+        for key in UPDATABLE_FIELDS:
+            if item.get(key) is not None:
+                row[key] = item[key]
+
+        if "title" in row:
+            if not isinstance(row["title"], str) or not row["title"].strip():
+                raise TaskValidationError("title required")
+            row["title"] = row["title"].strip()
+        if "priority" in row and row["priority"] not in [1, 2, 3]:
+            raise TaskValidationError("invalid priority")
+        if "hours" in row and (
+            not self._is_number(row["hours"]) or row["hours"] < 0
+        ):
+            raise TaskValidationError("hours must be non-negative")
+        if "description" in row and not isinstance(row["description"], str):
+            raise TaskValidationError("invalid description")
+        if "status" in row and row["status"] not in STATUSES:
+            raise TaskValidationError("invalid status")
+        if "due_date" in row:
+            row["due_date"] = self._parse_due_date(row["due_date"])
+        return row
+
+    def listing(
+        self, user_id, sort="priority", columns=None, expand=(), cursor=None,
+        **filters,
+    ):
+        """
+        select() of the user's tasks matching the filters, in sort order and
+        after the cursor.
+        """
+        stmt = select(*(columns or [Task])).where(
+            *self._conditions(user_id, **filters)
+        )
+        stmt = self._expanded(stmt, expand, columns)
+        if cursor:
+            stmt = stmt.where(self._after_cursor(cursor, sort))
+        return stmt.order_by(*self._sort_key(sort))
+
+    def split_page(self, rows, limit, sort):
+        """
+        Split the limit + 1 rows fetched for a page into (page, next cursor).
+        """
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        last = rows[-1]
+        column, _ = self._sort_key(sort)
+        return rows, self._encode_cursor(
+            sort, getattr(last, column.key), last.id
+        )
+
+    def page_size(self, limit):
+        if limit is None:
+            return DEFAULT_PAGE_SIZE
+        try:
+            limit = int(limit)
+        except (TypeError, ValueError):
+            raise TaskValidationError("invalid limit")
+        if limit < 1:
+            raise TaskValidationError("invalid limit")
+        return min(limit, MAX_PAGE_SIZE)
+
+    def live_category(self, user_id, category_id):
+        """
+        select() of category_id if it is a live category of the user, or None
+        without a category_id; raises TaskValidationError for a malformed one.
+        """
+        if category_id is None:
+            return None
+        if not self._is_id(category_id):
+            raise TaskValidationError("invalid category_id")
+        return select(Category.id).where(
+            Category.id == category_id, Category.user_id == user_id,
+            Category.deleted_at.is_(None),
+        )
+
+    def _changed(self, user_id):
+        """
+        Record that the user's tasks changed (invalidates ETags, notifies
+        /events).
+        """
+        self.versions.bump(user_id, "tasks")
+        self.events.changed(user_id, "tasks")
+
+    def _use_shard(self, user_id):
+        """
+        Send this session's task and category statements to the user's shard.
+        """
+        if self.shards is not None:
+            self.shards.use(db.session, user_id)
+
+    def _assign_ids(self, rows):
+        """
+        Ids for rows inserted in bulk (the ORM's own inserts get them in
+        backend.shards).
+        """
+        if self.shards is not None:
+            for row, task_id in zip(
+                rows, self.shards.ids.take("task", len(rows))
+            ):
+                row["id"] = task_id
 
-        db.session.delete(t)
-        db.session.commit()
\ No newline at end of file
+    def _check_category(self, user_id, category_id):
+        """
+        Raise TaskValidationError unless category_id is a live category of the
+        user.
+        """
+        stmt = self.live_category(user_id, category_id)
+        if stmt is not None and db.session.scalar(stmt) is None:
+            raise TaskValidationError("unknown category_id")
+
+    def _live_category_ids(self, user_id, category_ids):
+        """
+        Return the subset of category_ids that are live categories of the user.
+        """
+        category_ids = list({i for i in category_ids if self._is_id(i)})
+        if not category_ids:
+            return set()
+        return set(
+            db.session.scalars(
+                select(Category.id).where(
+                    Category.user_id == user_id, Category.deleted_at.is_(None),
+                    Category.id.in_(category_ids),
+                )
+            )
+        )
+
+    def _filtered_query(self, user_id, columns=None, expand=(), **filters):
+        query = Task.query.filter(*self._conditions(user_id, **filters))
+        query = self._expanded(query, expand, columns)
+        if columns:
+            query = query.with_entities(*columns)
+        return query
+
+    def _expanded(self, query, expand, columns=None):
+        """
+        Outer-join the expanded relationships into a Query or select(), so
+        a listing stays one statement however many tasks it returns instead
+        of lazy-loading each task's category. Only a live category of the
+        task's owner is joined; any other category_id expands to nothing.
+        """
+        for name in expand or ():
+            if name not in EXPANSIONS:
+                raise TaskValidationError("invalid expand")
+        if "category" in (expand or ()):
+            query = query.outerjoin(Category, and_(
+                Category.id == Task.category_id,
+                Category.user_id == Task.user_id,
+                Category.deleted_at.is_(None),
+            ))
+            if not columns:
+                query = query.options(contains_eager(Task.category))
+        return query
+
+    def _conditions(
+        self, user_id, status=None, category_id=None, priority=None,
+        due_after=None, due_before=None,
+    ):
+        """
+        WHERE clauses selecting the user's (not deleted) tasks that match the
+        filters.
+        """
+        conditions = [Task.user_id == user_id, Task.deleted_at.is_(None)]
+        if status is not None:
+            conditions.append(Task.status == status)
+        if category_id is not None:
+            conditions.append(Task.category_id == category_id)
+        if priority is not None:
+            if priority not in [1, 2, 3]:
+                raise TaskValidationError("invalid priority")
+            conditions.append(Task.priority == priority)
+        if due_after is not None:
+            conditions.append(Task.due_date >= self._parse_due_date(due_after))
+        if due_before is not None:
+            conditions.append(
+                Task.due_date <= self._parse_due_date(due_before)
+            )
+        return conditions
+
+    def _after_cursor(self, cursor, sort):
+        """
+        WHERE clause for the rows after the cursor's position in sort order.
+        """
+        cursor_sort, value, last_id = self._decode_cursor(cursor)
+        if cursor_sort != sort:
+            raise TaskValidationError("cursor does not match sort")
+        column, tiebreak = self._sort_key(sort)
+        return or_(column > value, and_(column == value, tiebreak > last_id))
+
+    def _sort_key(self, sort):
+        column = SORT_COLUMNS.get(sort or "priority")
+        if column is None:
+            raise TaskValidationError("invalid sort")
+        return column, Task.id
+
+    def _encode_cursor(self, sort, value, last_id):
+        raw = json.dumps([sort, value, last_id], separators=(",", ":"))
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+    def _decode_cursor(self, cursor):
+        try:
+            padded = cursor + "=" * (-len(cursor) % 4)
+            sort, value, last_id = json.loads(base64.urlsafe_b64decode(padded))
+            if not isinstance(value, (int, float)) or not isinstance(
+                last_id, int
+            ):
+                raise ValueError()
+        except Exception:
+            raise TaskValidationError("invalid cursor")
+        return sort, value, last_id
+
+    def _import_values(self, user_id, record, categories, category_ids):
+        """Validate an imported record; values may be strings (CSV)."""
+        def value(*keys):
+            for key in keys:
+                v = record.get(key)
+                if v is not None and v != "":
+                    return v.strip() if isinstance(v, str) else v
+            return None
+
+        category_id = value("category_id")
+        if category_id is None:
+            name = value("category", "category_name")
+            if name is None:
+                raise TaskValidationError("category is required")
+            if name not in categories:
+                raise TaskValidationError(f"unknown category: {name}")
+            category_id = categories[name]
+        else:
+            try:
+                category_id = int(category_id)
+            except (TypeError, ValueError):
+                raise TaskValidationError("invalid category_id")
+            if category_id not in category_ids:
+                raise TaskValidationError("unknown category_id")
+
+        priority = value("priority")
+        if isinstance(priority, str):
+            priority = PRIORITY_VALUES.get(
+                priority, int(priority) if priority.isdigit() else None
+            )
+
+        hours = self._import_hours(value("hours", "estimated_hours"))
+
+        title = value("title")
+        description = value("description")
+        due_date = value("due_date")
+        if due_date is not None and not isinstance(due_date, str):
+            raise TaskValidationError("invalid due_date")
+
+        values = self.task_values(
+            user_id,
+            title if isinstance(title, str) else None,
+            str(description) if description is not None else None,
+            priority,
+            hours,
+            category_id,
+            due_date,
+        )
+        status = value("status")
+        if status is not None:
+            if status not in STATUSES:
+                raise TaskValidationError("invalid status")
+            values["status"] = status
+        return values
+
+    @staticmethod
+    def _import_hours(hours):
+        """
+        Whole hours of an imported record: "3", 3 or 3.0 (1.5, nan and inf are
+        not).
+        """
+        if hours is None:
+            return 0
+        if isinstance(hours, bool):
+            raise TaskValidationError("hours must be a whole number")
+        if isinstance(hours, float):
+            if not hours.is_integer():
+                raise TaskValidationError("hours must be a whole number")
+            hours = int(hours)
+        elif isinstance(hours, str):
+            try:
+                hours = int(hours)
+            except ValueError:
+                raise TaskValidationError("hours must be a whole number")
+        if not isinstance(hours, int) or hours < 0:
+            raise TaskValidationError("hours must be non-negative")
+        return hours
+
+    def _insert_chunk(self, rows):
+        # Rows must share one set of keys to go out as a single executemany
+        keys = set().union(*rows)
+        if "status" in keys:
+            for row in rows:
+                row.setdefault("status", "Pending")
+        self._assign_ids(rows)
+        db.session.execute(insert(Task), rows)
+        db.session.commit()
+        return len(rows)
+
+    def _owned_ids(self, user_id, task_ids):
+        """Return the subset of task_ids that exist and belong to the user."""
+        task_ids = list({i for i in task_ids if self._is_id(i)})
+        if not task_ids:
+            return set()
+        return set(
+            db.session.scalars(
+                select(Task.id).where(
+                    Task.user_id == user_id, Task.deleted_at.is_(None),
+                    Task.id.in_(task_ids),
+                )
+            )
+        )
+
+    @staticmethod
+    def _is_id(value):
+        # JSON true/false would pass isinstance(value, int)
+        return isinstance(value, int) and not isinstance(value, bool)
+
+    @staticmethod
+    def _is_number(value):
+        return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+    def _parse_due_date(self, due_date):
+        if isinstance(due_date, date):
+            return due_date
+        if not isinstance(due_date, str):
+            raise TaskValidationError("invalid due_date")
+        try:
+            return datetime.fromisoformat(due_date.replace('Z', '+00:00'))
+        except ValueError:
+            try:
+                return datetime.strptime(due_date, '%Y-%m-%d')
+            except ValueError:
+                raise TaskValidationError("invalid due_date")
@@ -0,0 +1,111 @@
+"""
+Tokens revoked before they expire (POST /logout), by sha256 of the token.
+
+AuthService looks a token up here when it is not in its token cache. A
+revocation takes effect at once in the process that made it (which drops
+its cache entry) and, in every other process sharing the store, once that
+process's cache entry expires (JWT_CACHE_TTL_SECONDS at most):
+
+- DatabaseTokenRevocations: the revoked_token table; one primary-key lookup
+  per token cache miss. Used unless CACHE_BACKEND says otherwise.
+- SharedTokenRevocations: a Redis-compatible store (CACHE_BACKEND=shared).
+- TokenRevocations: a dict in this process (CACHE_BACKEND=memory), which is
+  only correct when one process serves the app.
+
+An entry is kept until the token's exp; a token without exp stays revoked.
+"""
+import threading
+import time
+
+from sqlalchemy import delete, insert, or_, select
+
+
+class TokenRevocations:
+    """Revoked tokens in this process."""
+
+    def __init__(self):
+        self._revoked = {}  # digest -> exp
+        self._lock = threading.Lock()
+
+    def is_revoked(self, digest):
+        with self._lock:
+            return digest in self._revoked
+
+    def revoke(self, digest, exp=None):
+        now = time.time()
+        with self._lock:
+            self._revoked[digest] = exp
+            # Expired tokens fail verification anyway; no need to remember them
+            for key in [
+                k
+                for k, e in self._revoked.items()
+                if e is not None and e <= now
+            ]:
+                del self._revoked[key]
+
+
+class DatabaseTokenRevocations:
+    """Revoked tokens in the revoked_token table of engine (the primary)."""
+
+    def __init__(self, engine):
+        from backend.models.user import RevokedToken
+
+        self.engine = engine
+        self.table = RevokedToken.__table__
+
+    def is_revoked(self, digest):
+        with self.engine.connect() as connection:
+            return (
+                connection.execute(
+                    select(self.table.c.digest).where(
+                        self.table.c.digest == digest.hex()
+                    )
+                ).first()
+                is not None
+            )
+
+    def revoke(self, digest, exp=None):
+        with self.engine.begin() as connection:
+            # Drops expired entries, and this token's if it was revoked before
+            connection.execute(
+                delete(self.table).where(
+                    or_(
+                        self.table.c.expires_at <= time.time(),
+                        self.table.c.digest == digest.hex(),
+                    )
+                )
+            )
+            connection.execute(
+                insert(self.table).values(digest=digest.hex(), expires_at=exp)
+            )
+
+
+class SharedTokenRevocations:
+    """Revoked tokens in a Redis-compatible store, expiring with the token."""
+
+    def __init__(self, client, prefix="todo:revoked:"):
+        self.client = client
+        self.prefix = prefix
+
+    def is_revoked(self, digest):
+        return self.client.get(self.prefix + digest.hex()) is not None
+
+    def revoke(self, digest, exp=None):
+        ttl = None if exp is None else int(exp - time.time()) + 1
+        if ttl is None or ttl > 0:
+            self.client.set(self.prefix + digest.hex(), b"1", ex=ttl)
+
+
+def create_revocations(config, engine):
+    """
+    The revocation store that goes with CACHE_BACKEND; engine is the primary
+    database.
+    """
+    backend = config.get("CACHE_BACKEND", "none")
+    if backend == "shared":
+        from backend.cache import shared_client
+
+        return SharedTokenRevocations(shared_client(config))
+    if backend == "memory":
+        return TokenRevocations()
+    return DatabaseTokenRevocations(engine)
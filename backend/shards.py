@@ -0,0 +1,355 @@
+"""
+Horizontal sharding of the task data by user.
+
+With SHARD_URLS set, tasks and categories live on N shard databases and
+DATABASE_URL becomes the directory: users, their placement and the id
+counters. Every query of a user's tasks or categories already filters by
+user_id, so all of a user's rows sit on one shard and no query spans two.
+
+- Placement: a new user is placed by consistent hashing of the user id
+  onto a ring of the shard names (VNODES points per shard), and the choice
+  is recorded in shard_placement. Adding a shard only changes the ring
+  position of about 1/N of the users, and only towards the new shard;
+  backend.rebalance moves those users while the app keeps serving them.
+  Users without a placement row follow the ring.
+- Routing: the services call ShardRouter.use(session, user_id) before they
+  query; RoutingSession.get_bind then sends statements on the sharded
+  tables to that user's shard. Placements are cached per process for
+  SHARD_PLACEMENT_TTL_SECONDS.
+- Ids: rows move between shards with their ids, so ids must be unique
+  across shards. Each process reserves SHARD_ID_BLOCK_SIZE ids at a time
+  from id_block in the directory and assigns them on insert.
+- Moves: while a user is being moved their writes wait (at most
+  SHARD_MOVE_WAIT_SECONDS, then ShardMovingError); reads go on from the old
+  shard until the placement flips.
+- Enabling: tasks and categories written before SHARD_URLS was set are
+  still in the directory, where nothing reads them; create_app refuses to
+  start until backend.rebalance --migrate has moved them onto the shards.
+"""
+import bisect
+import hashlib
+import logging
+import os
+import threading
+import time
+
+from sqlalchemy import (
+    create_engine, event, func, insert, inspect, select, update,
+)
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import object_session
+
+from backend.models.category import Category
+from backend.models.shard import IdBlock, ShardPlacement
+from backend.models.task import Task
+
+logger = logging.getLogger(__name__)
+
+# Tables split by user; everything else stays in the directory
+SHARDED_MODELS = (Category, Task)
+SHARDED_TABLES = {model.__tablename__ for model in SHARDED_MODELS}
+
+# Points per shard on the hash ring; more points even out the shares
+VNODES = 100
+
+
+class ShardKeyError(Exception):
+    """
+    A statement on a sharded table was run without a user to pick the shard.
+    """
+
+
+class ShardMovingError(Exception):
+    """
+    A write waited longer than SHARD_MOVE_WAIT_SECONDS for its user's move to
+    end.
+    """
+
+
+class HashRing:
+    """Consistent hashing of keys onto named nodes."""
+
+    def __init__(self, nodes, vnodes=VNODES):
+        points = sorted(
+            (self._hash(f"{node}#{i}"), node)
+            for node in nodes
+            for i in range(vnodes)
+        )
+        self._points = [point for point, _ in points]
+        self._nodes = [node for _, node in points]
+
+    def node_for(self, key):
+        index = bisect.bisect(self._points, self._hash(str(key)))
+        return self._nodes[index % len(self._nodes)]
+
+    @staticmethod
+    def _hash(value):
+        return int.from_bytes(hashlib.md5(value.encode()).digest()[:8], "big")
+
+
+class IdAllocator:
+    """
+    Ids unique across shards, handed out from blocks reserved in the
+    directory's id_block table: one directory write per block_size inserts.
+    A block is never shared by two processes (blocks reserved before a fork
+    are dropped in the child).
+    """
+
+    def __init__(self, engine, block_size=1000, first_id=None):
+        self.engine = engine
+        self.block_size = block_size
+        # Called with a table name when its counter is created: the largest
+        # id already in use
+        self.first_id = first_id or (lambda name: 0)
+        self._blocks = {}
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+
+    def take(self, name, count=1):
+        """count new ids for the table name."""
+        ids = []
+        with self._lock:
+            if self._pid != os.getpid():
+                self._blocks, self._pid = {}, os.getpid()
+            while len(ids) < count:
+                start, end = self._blocks.get(name) or self._reserve(name)
+                taken = min(end - start, count - len(ids))
+                ids.extend(range(start, start + taken))
+                self._blocks[name] = (
+                    (start + taken, end) if start + taken < end else None
+                )
+        return ids
+
+    def _reserve(self, name):
+        size = self.block_size
+        while True:
+            with self.engine.begin() as connection:
+                end = connection.execute(
+                    update(IdBlock).where(IdBlock.name == name)
+                    .values(next_id=IdBlock.next_id + size)
+                    .returning(IdBlock.next_id)
+                ).scalar()
+            if end is not None:
+                return end - size, end
+            try:
+                start = self.first_id(name) + 1
+                with self.engine.begin() as connection:
+                    connection.execute(
+                        insert(IdBlock).values(name=name, next_id=start + size)
+                    )
+                return start, start + size
+            except IntegrityError:
+                # Another process created the counter first
+                continue
+
+
+class ShardRouter:
+    """Maps users to shard engines; see the module docstring."""
+
+    def __init__(
+        self, engines, directory, placement_ttl=5, move_wait=30,
+        id_block_size=1000,
+    ):
+        self.engines = dict(engines)
+        self.ring = HashRing(self.engines)
+        self.directory = directory
+        self.placement_ttl = placement_ttl
+        self.move_wait = move_wait
+        self.ids = IdAllocator(directory, id_block_size, self._max_id)
+        self._placements = {}
+        self._lock = threading.Lock()
+
+    def use(self, session, user_id):
+        """
+        Route the session's statements on sharded tables to user_id's shard.
+        """
+        session.info["shards"] = self
+        session.info["shard_key"] = user_id
+
+    def holds(self, mapper):
+        return inspect(mapper).local_table.name in SHARDED_TABLES
+
+    def shard_for(self, user_id):
+        return self._placement(user_id)[0]
+
+    def engine_for(self, user_id, write=False):
+        """
+        The engine of user_id's shard; a write waits while the user is being
+        moved.
+        """
+        if user_id is None:
+            raise ShardKeyError("no user to choose the shard by")
+        shard, moving = self._placement(user_id)
+        if write and moving:
+            shard = self._wait_for_move(user_id)
+        return self.engines[shard]
+
+    def place(self, user_id, shard, moving=False):
+        """Record user_id's shard in the directory."""
+        with self.directory.begin() as connection:
+            updated = connection.execute(
+                update(ShardPlacement).where(ShardPlacement.user_id == user_id)
+                .values(shard=shard, moving=moving)
+            ).rowcount
+            if not updated:
+                connection.execute(
+                    insert(ShardPlacement).values(
+                        user_id=user_id, shard=shard, moving=moving
+                    )
+                )
+        with self._lock:
+            self._placements[user_id] = (shard, moving, time.monotonic())
+
+    def create_all(self):
+        """Create the sharded tables on every shard."""
+        from backend.database import db
+
+        tables = [model.__table__ for model in SHARDED_MODELS]
+        for engine in self.engines.values():
+            db.metadata.create_all(engine, tables=tables)
+
+    def stranded_rows(self):
+        """
+        Tasks and categories left in the directory from before sharding;
+        nothing reads them.
+        """
+        count = 0
+        with self.directory.connect() as connection:
+            for model in SHARDED_MODELS:
+                table = model.__table__
+                if inspect(connection).has_table(table.name):
+                    count += connection.execute(
+                        select(func.count()).select_from(table)
+                    ).scalar()
+        return count
+
+    def dispose(self, close=True):
+        for engine in self.engines.values():
+            engine.dispose(close=close)
+        self.directory.dispose(close=close)
+
+    def _placement(self, user_id, fresh=False):
+        now = time.monotonic()
+        with self._lock:
+            cached = self._placements.get(user_id)
+        if (
+            cached is not None
+            and not fresh
+            and now - cached[2] < self.placement_ttl
+        ):
+            return cached[0], cached[1]
+
+        with self.directory.connect() as connection:
+            row = connection.execute(
+                select(ShardPlacement.shard, ShardPlacement.moving).where(
+                    ShardPlacement.user_id == user_id
+                )
+            ).first()
+        shard, moving = (
+            (row.shard, row.moving)
+            if row
+            else (self.ring.node_for(user_id), False)
+        )
+        if shard not in self.engines:
+            raise ShardKeyError(
+                f"user {user_id} is placed on unknown shard {shard!r}"
+            )
+        with self._lock:
+            self._placements[user_id] = (shard, moving, now)
+            # Forget users whose entry has expired
+            if len(self._placements) > 10000:
+                self._placements = {
+                    u: p
+                    for u, p in self._placements.items()
+                    if now - p[2] < self.placement_ttl
+                }
+        return shard, moving
+
+    def _wait_for_move(self, user_id):
+        deadline = time.monotonic() + self.move_wait
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            shard, moving = self._placement(user_id, fresh=True)
+            if not moving:
+                return shard
+        raise ShardMovingError(
+            f"user {user_id} is being moved to another shard"
+        )
+
+    def _max_id(self, name):
+        table = next(
+            model.__table__
+            for model in SHARDED_MODELS
+            if model.__tablename__ == name
+        )
+        largest = 0
+        for engine in self.engines.values():
+            with engine.connect() as connection:
+                largest = max(
+                    largest,
+                    connection.execute(select(func.max(table.c.id))).scalar()
+                    or 0,
+                )
+        return largest
+
+
+@event.listens_for(Task, "before_insert")
+@event.listens_for(Category, "before_insert")
+def assign_id(mapper, connection, target):
+    """
+    Give rows inserted through the ORM on a sharded session an id from the
+    directory.
+    """
+    session = object_session(target)
+    router = session.info.get("shards") if session is not None else None
+    if router is not None and target.id is None:
+        target.id = router.ids.take(mapper.local_table.name)[0]
+
+
+def create_shard_router(config, engine_options=None):
+    """
+    ShardRouter for SHARD_URLS ("name=url,..."), or None when there are none.
+    """
+    from backend.database import apply_sqlite_pragmas
+
+    entries = [
+        entry.strip()
+        for entry in config.get("SHARD_URLS", "").split(",")
+        if entry.strip()
+    ]
+    if not entries:
+        return None
+    directory_url = config["SQLALCHEMY_DATABASE_URI"]
+    if make_url(directory_url).database in (
+        None, "", ":memory:"
+    ) and directory_url.startswith("sqlite"):
+        raise ValueError(
+            "sharding needs DATABASE_URL to be a database file or server (the "
+            "directory)"
+        )
+
+    def connect(url):
+        options = (
+            engine_options({**config, "SQLALCHEMY_DATABASE_URI": url})
+            if engine_options
+            else {}
+        )
+        engine = create_engine(url, **options)
+        if make_url(url).get_backend_name() == "sqlite":
+            apply_sqlite_pragmas(engine, config.get("SQLITE_PRAGMAS") or {})
+        return engine
+
+    engines = {}
+    for entry in entries:
+        name, _, url = entry.partition("=")
+        if not name.strip() or not url.strip():
+            raise ValueError(f"SHARD_URLS entries are name=url, got {entry!r}")
+        engines[name.strip()] = connect(url.strip())
+    return ShardRouter(
+        engines,
+        connect(directory_url),
+        placement_ttl=config.get("SHARD_PLACEMENT_TTL_SECONDS", 5),
+        move_wait=config.get("SHARD_MOVE_WAIT_SECONDS", 30),
+        id_block_size=config.get("SHARD_ID_BLOCK_SIZE", 1000),
+    )
@@ -0,0 +1,19 @@
+"""
+Signals sent by the cache and the services for instrumentation.
+
+Sending is free when nothing is connected; backend.metrics connects to
+them when metrics are enabled.
+"""
+from blinker import Namespace
+
+_signals = Namespace()
+
+# sender: ResponseCache; kwargs: collection, hit
+cache_lookup = _signals.signal("cache-lookup")
+
+# sender: AuthService; kwargs: seconds, cached, valid
+token_verified = _signals.signal("token-verified")
+
+# sender: the engine's dialect (which outlives pools replaced by dispose());
+# kwargs: seconds waited for a connection, timed_out
+pool_checkout = _signals.signal("pool-checkout")
@@ -0,0 +1,62 @@
+"""
+Startup warmup: work every process would otherwise do on its first
+requests, done once before the workers accept traffic (gunicorn's
+when_ready with preload_app, see backend/gunicorn_conf.py). Forked workers
+inherit the result.
+
+- configure the ORM mappers
+- compute the password hash parameters used to spot outdated hashes
+- compile the hot listing/lookup queries into the engine's statement cache
+- serve one request through the full Flask stack (URL map, JSON provider)
+"""
+import logging
+import time
+
+from sqlalchemy.orm import configure_mappers
+
+from backend.database import db
+from backend.models.task import Task
+from backend.models.user import User, hash_parameters
+from backend.serializers import CATEGORY_COLUMNS, TASK_COLUMNS
+from backend.services.task_service import SORT_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+# No user has this id, so the queries touch no rows
+_NO_USER = 0
+
+
+def warmup(app):
+    """Prime app's per-process caches; returns the seconds spent per step."""
+    timings = {}
+
+    def step(name, fn):
+        started = time.perf_counter()
+        fn()
+        timings[name] = round(time.perf_counter() - started, 4)
+
+    step("mappers", configure_mappers)
+    step(
+        "hash_parameters",
+        lambda: hash_parameters(app.config["PASSWORD_HASH_METHOD"]),
+    )
+    with app.app_context():
+        step("queries", lambda: _compile_queries(app))
+        db.session.remove()
+    step("request", lambda: app.test_client().get("/health"))
+
+    logger.info("warmup done in %.3fs: %s", sum(timings.values()), timings)
+    return timings
+
+
+def _compile_queries(app):
+    services = app.extensions["services"]
+    tasks, categories = services["tasks"], services["categories"]
+    for sort in SORT_COLUMNS:
+        tasks.get_tasks(_NO_USER, sort=sort, columns=TASK_COLUMNS)
+        tasks.get_tasks_page(
+            _NO_USER, limit=1, sort=sort, columns=TASK_COLUMNS
+        )
+    categories.get_all_categories(_NO_USER, columns=CATEGORY_COLUMNS)
+    db.session.get(Task, _NO_USER)
+    User.query.filter_by(username="").first()
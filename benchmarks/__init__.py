@@ -0,0 +1,7 @@
+"""
+Performance benchmarks. Each module is a standalone script:
+
+    python -m benchmarks.<module> --help
+
+They are not collected by pytest.
+"""
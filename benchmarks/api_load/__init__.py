@@ -0,0 +1,20 @@
+"""
+Load test of the REST API.
+
+Seeds users x categories x tasks through the services into a temporary
+SQLite file, then replays a weighted mix of register/login/list/create/
+update/delete requests against either the Flask test client (in-process,
+no network) or a real gunicorn on localhost, and reports latency
+percentiles and throughput per operation:
+
+    python -m benchmarks.api_load --driver client --seconds 10
+    python -m benchmarks.api_load --driver gunicorn --workers 4 \\
+        --concurrency 16 --mix list=70,create=10,update=10,delete=5,login=5 \\
+        --json results.json
+
+Results written with --json can be compared against a later run; any
+operation whose p95 or req/s regressed by more than --tolerance makes the
+command exit with status 1:
+
+    python -m benchmarks.api_load --compare results.json
+"""
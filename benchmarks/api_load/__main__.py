@@ -0,0 +1,106 @@
+import argparse
+import multiprocessing
+import sys
+
+from benchmarks.api_load import report
+from benchmarks.api_load.runner import benchmark
+from benchmarks.api_load.workload import DEFAULT_MIX, parse_mix
+
+DRIVERS = ("client", "gunicorn")
+
+
+def _in_subprocess(fn, *args):
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        return pool.apply(fn, args)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.api_load",
+        description=sys.modules["benchmarks.api_load"].__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--driver", choices=DRIVERS + ("all",), default="all")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument(
+        "--categories", type=int, default=5, help="categories per user"
+    )
+    parser.add_argument(
+        "--tasks", type=int, default=200, help="tasks per user"
+    )
+    parser.add_argument(
+        "--mix",
+        default=DEFAULT_MIX,
+        help=f"operation weights (default {DEFAULT_MIX})",
+    )
+    parser.add_argument(
+        "--seconds", type=float, default=10.0,
+        help="measured duration per driver",
+    )
+    parser.add_argument(
+        "--warmup", type=float, default=1.0,
+        help="unmeasured seconds before that",
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=8,
+        help="client threads against gunicorn",
+    )
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=1)
+    parser.add_argument("--worker-class", default="sync")
+    parser.add_argument(
+        "--hash-method", help="PASSWORD_HASH_METHOD for the run (login cost)"
+    )
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument(
+        "--compare",
+        metavar="BASELINE",
+        help="results file to check for regressions",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="allowed p95/req/s regression as a fraction (default 0.2)",
+    )
+    args = parser.parse_args()
+
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+    drivers = DRIVERS if args.driver == "all" else (args.driver,)
+
+    results = {
+        "environment": report.environment(),
+        "parameters": {
+            "users": args.users, "categories": args.categories,
+            "tasks": args.tasks, "mix": mix, "warmup": args.warmup,
+        },
+        "runs": [
+            _in_subprocess(benchmark, name, args, mix) for name in drivers
+        ],
+    }
+    for run_result in results["runs"]:
+        report.print_table(run_result)
+        print()
+
+    if args.json:
+        report.write(results, args.json)
+
+    if args.compare:
+        regressions = report.compare(
+            report.load(args.compare), results, args.tolerance
+        )
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        if regressions:
+            sys.exit(1)
+        print(
+            f"no regressions beyond {args.tolerance:.0%} against "
+            f"{args.compare}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""Ways of sending the benchmark's requests to the app."""
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+
+class ClientDriver:
+    """
+    Flask test client: the app's own cost, without network or server overhead.
+    """
+
+    name = "client"
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, payload=None, headers=None):
+        response = self.client.open(
+            path, method=method, json=payload, headers=headers
+        )
+        return response.status_code, response.get_json(silent=True)
+
+    def close(self):
+        pass
+
+
+class HTTPDriver:
+    """Requests over HTTP with one persistent connection (one per thread)."""
+
+    name = "http"
+
+    def __init__(self, host, port, timeout=30):
+        self.connection = http.client.HTTPConnection(
+            host, port, timeout=timeout
+        )
+
+    def request(self, method, path, payload=None, headers=None):
+        headers = dict(headers or {})
+        body = None
+        if payload is not None:
+            body = json.dumps(payload)
+            headers["Content-Type"] = "application/json"
+        try:
+            self.connection.request(method, path, body=body, headers=headers)
+            response = self.connection.getresponse()
+            data = response.read()
+        except (http.client.HTTPException, OSError):
+            # The server closed the kept-alive connection; retry once on a new
+            # one
+            self.connection.close()
+            self.connection.request(method, path, body=body, headers=headers)
+            response = self.connection.getresponse()
+            data = response.read()
+        try:
+            return response.status, json.loads(data) if data else None
+        except ValueError:
+            return response.status, None
+
+    def close(self):
+        self.connection.close()
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class GunicornServer:
+    """
+    A gunicorn serving app (backend.wsgi:app) on localhost for the length of a
+    with block.
+    """
+
+    def __init__(
+        self, env, workers=2, threads=1, worker_class="sync",
+        startup_timeout=60, app="backend.wsgi:app",
+    ):
+        self.env = env
+        self.app = app
+        self.workers = workers
+        self.threads = threads
+        self.worker_class = worker_class
+        self.startup_timeout = startup_timeout
+        self.host = "127.0.0.1"
+        self.port = free_port()
+        self.process = None
+
+    def __enter__(self):
+        command = [
+            sys.executable, "-m", "gunicorn",
+            "--bind", f"{self.host}:{self.port}",
+            "--workers", str(self.workers),
+            "--threads", str(self.threads),
+            "--worker-class", self.worker_class,
+            "--log-level", "warning",
+            self.app,
+        ]
+        # A file rather than a pipe: nobody reads stderr while the benchmark
+        # runs, and a full pipe would block the server's logging
+        self.stderr = tempfile.TemporaryFile(mode="w+")
+        self.process = subprocess.Popen(
+            command, env={**os.environ, **self.env},
+            stdout=subprocess.DEVNULL, stderr=self.stderr, text=True,
+        )
+        self._wait_until_ready()
+        return self
+
+    def __exit__(self, *exc):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        self.stderr.close()
+
+    def driver(self):
+        return HTTPDriver(self.host, self.port)
+
+    def _wait_until_ready(self):
+        deadline = time.monotonic() + self.startup_timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                self.stderr.seek(0)
+                raise RuntimeError(
+                    f"gunicorn exited during startup:\n{self.stderr.read()}"
+                )
+            try:
+                status, _ = HTTPDriver(
+                    self.host, self.port, timeout=1
+                ).request("GET", "/health")
+                if status == 200:
+                    return
+            except OSError:
+                pass
+            time.sleep(0.2)
+        self.process.kill()
+        raise RuntimeError(
+            f"gunicorn did not answer /health within {self.startup_timeout}s"
+        )
@@ -0,0 +1,120 @@
+"""Latency/throughput summaries, the JSON results file and run comparison."""
+import json
+import math
+import os
+import platform
+import subprocess
+import time
+
+from benchmarks.api_load.workload import OPERATIONS
+
+_ORDER = list(OPERATIONS) + ["all"]
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(samples, seconds):
+    """
+    {operation: stats} for [(operation, latency, ok)], plus an "all" entry.
+    """
+    by_operation = {}
+    for operation, latency, ok in samples:
+        by_operation.setdefault(operation, []).append((latency, ok))
+    by_operation["all"] = [(latency, ok) for _, latency, ok in samples]
+
+    summary = {}
+    for operation in sorted(by_operation, key=_ORDER.index):
+        rows = by_operation[operation]
+        latencies = sorted(latency for latency, _ in rows)
+        summary[operation] = {
+            "requests": len(rows),
+            "errors": sum(1 for _, ok in rows if not ok),
+            "req_per_s": round(len(rows) / seconds, 1),
+            "p50_ms": _ms(percentile(latencies, 50)),
+            "p95_ms": _ms(percentile(latencies, 95)),
+            "p99_ms": _ms(percentile(latencies, 99)),
+            "max_ms": _ms(latencies[-1] if latencies else None),
+        }
+    return summary
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 3)
+
+
+def environment():
+    """Where the numbers come from: commit, interpreter and machine."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+            text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def print_table(result):
+    print(
+        f"{result['driver']}: {result['seconds']}s, concurrency "
+        f"{result['concurrency']}"
+    )
+    print(f"{'operation':<10} {'requests':>9} {'errors':>7} {'req/s':>9} "
+          f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for operation, stats in result["operations"].items():
+        print(
+            f"{operation:<10} {stats['requests']:>9} {stats['errors']:>7} "
+            f"{stats['req_per_s']:>9} "
+            f"{stats['p50_ms']:>9} {stats['p95_ms']:>9} {stats['p99_ms']:>9}"
+        )
+
+
+def write(results, path):
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2)
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(baseline, current, tolerance):
+    """
+    Regressions of current against baseline (both results files): for each
+    driver and operation present in both, p95 higher or req/s lower by more
+    than the tolerance fraction. Returns a list of messages.
+    """
+    regressions = []
+    baseline_runs = {run["driver"]: run for run in baseline["runs"]}
+    for run in current["runs"]:
+        before = baseline_runs.get(run["driver"])
+        if before is None:
+            continue
+        for operation, stats in run["operations"].items():
+            old = before["operations"].get(operation)
+            if not old or not old["p95_ms"] or not stats["p95_ms"]:
+                continue
+            if stats["p95_ms"] > old["p95_ms"] * (1 + tolerance):
+                regressions.append(
+                    f"{run['driver']} {operation}: p95 {old['p95_ms']} -> "
+                    f"{stats['p95_ms']} ms"
+                )
+            if stats["req_per_s"] < old["req_per_s"] * (1 - tolerance):
+                regressions.append(
+                    f"{run['driver']} {operation}: {old['req_per_s']} -> "
+                    f"{stats['req_per_s']} req/s"
+                )
+    return regressions
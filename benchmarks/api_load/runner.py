@@ -0,0 +1,116 @@
+"""Runs of the workload against one driver."""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from benchmarks.api_load import report
+from benchmarks.api_load.workload import VirtualUser
+
+
+def run(make_driver, users, mix, concurrency, seconds, warmup):
+    """
+    Replay the mix from concurrency threads; returns the samples taken after
+    warmup.
+    """
+    samples = []
+    failures = []
+    lock = threading.Lock()
+    ready = threading.Barrier(concurrency)
+
+    def virtual_user(index):
+        driver = make_driver()
+        try:
+            session = VirtualUser(
+                driver, users[index % len(users)], mix, seed=index
+            )
+            session.start()
+        except Exception as e:
+            failures.append(e)
+            ready.abort()
+            return
+        try:
+            ready.wait()
+        except threading.BrokenBarrierError:
+            return
+
+        taken = []
+        measure_from = time.perf_counter() + warmup
+        deadline = measure_from + seconds
+        while True:
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            sample = session.step()
+            if now >= measure_from:
+                taken.append(sample)
+        driver.close()
+        with lock:
+            samples.extend(taken)
+
+    threads = [
+        threading.Thread(target=virtual_user, args=(i,))
+        for i in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if failures:
+        raise failures[0]
+    return samples
+
+
+def benchmark(driver_name, args, mix):
+    # Runs in a fresh process per driver: Config reads the environment when
+    # backend.config is first imported, so each run's settings go into
+    # os.environ before the app is loaded
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            "FLASK_ENV": "production",
+            "DATABASE_URL": f"sqlite:///{os.path.join(tmp, 'load.db')}",
+        }
+        if args.hash_method:
+            env["PASSWORD_HASH_METHOD"] = args.hash_method
+        os.environ.update(env)
+
+        from backend.app import create_app
+        from benchmarks.api_load.drivers import ClientDriver, GunicornServer
+        from benchmarks.api_load.seed import seed
+
+        app = create_app()
+        started = time.perf_counter()
+        users = seed(app, args.users, args.categories, args.tasks)
+        print(
+            f"seeded {args.users} users x {args.categories} categories x "
+            f"{args.tasks} tasks "
+            f"in {time.perf_counter() - started:.1f}s",
+            file=sys.stderr,
+        )
+
+        if driver_name == "client":
+            # One thread: the in-process cost per request, free of GIL
+            # contention
+            concurrency = 1
+            samples = run(
+                lambda: ClientDriver(app), users, mix, concurrency,
+                args.seconds, args.warmup,
+            )
+        else:
+            concurrency = args.concurrency
+            with GunicornServer(
+                env, args.workers, args.threads, args.worker_class
+            ) as server:
+                samples = run(
+                    server.driver, users, mix, concurrency, args.seconds,
+                    args.warmup,
+                )
+
+    return {
+        "driver": driver_name,
+        "seconds": args.seconds,
+        "concurrency": concurrency,
+        "workers": args.workers if driver_name == "gunicorn" else None,
+        "operations": report.summarize(samples, args.seconds),
+    }
@@ -0,0 +1,64 @@
+"""Seeding of the benchmark database through the services."""
+from dataclasses import dataclass, field
+
+PASSWORD = "bench-password"
+
+
+@dataclass
+class SeededUser:
+    username: str
+    password: str
+    category_ids: list
+    task_ids: list = field(default_factory=list)
+
+
+def seed(app, users, categories, tasks):
+    """
+    Create users x categories x tasks (tasks per user) and return the
+    SeededUsers.
+    """
+    from backend.database import db
+    from backend.services.auth_service import AuthService
+    from backend.services.category_service import CategoryService
+    from backend.services.task_service import TaskService
+
+    auth = AuthService(
+        secret_key=app.config["SECRET_KEY"],
+        algorithm=app.config["JWT_ALGORITHM"],
+        expiration_hours=app.config["JWT_EXPIRATION_HOURS"],
+        password_hash_method=app.config["PASSWORD_HASH_METHOD"],
+    )
+    category_service = CategoryService()
+    task_service = TaskService()
+
+    seeded = []
+    with app.app_context():
+        for u in range(users):
+            user = auth.register_user(f"bench{u}", PASSWORD)
+            db.session.commit()
+            category_ids = [
+                category_service.create_category(
+                    user.id, f"Category {c}", f"Seeded category {c}"
+                ).id
+                for c in range(categories)
+            ]
+            items = [
+                {
+                    "title": f"Task {t}",
+                    "description": f"Seeded task {t} of bench{u}",
+                    "priority": (t % 3) + 1,
+                    "hours": (t % 8) + 1,
+                    "category_id": category_ids[t % len(category_ids)],
+                }
+                for t in range(tasks)
+            ]
+            task_ids = (
+                task_service.create_tasks(user.id, items, atomic=True)[0]
+                if items
+                else []
+            )
+            seeded.append(
+                SeededUser(f"bench{u}", PASSWORD, category_ids, task_ids)
+            )
+        db.session.remove()
+    return seeded
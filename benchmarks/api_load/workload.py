@@ -0,0 +1,127 @@
+"""The request mix and the virtual users that replay it."""
+import itertools
+import random
+import time
+
+OPERATIONS = ("register", "login", "list", "create", "update", "delete")
+DEFAULT_MIX = "list=60,create=15,update=15,delete=5,login=4,register=1"
+EXPECTED_STATUS = {
+    "register": 201,
+    "login": 200,
+    "list": 200,
+    "create": 201,
+    "update": 200,
+    "delete": 200,
+}
+
+_registrations = itertools.count()
+
+
+def parse_mix(text):
+    """Parse "list=60,create=15,..." into {operation: weight}."""
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise ValueError(
+                f"unknown operation {name!r}; expected one of "
+                f"{', '.join(OPERATIONS)}"
+            )
+        mix[name] = float(weight or 1)
+    if not any(mix.values()):
+        raise ValueError(
+            "the mix needs at least one operation with a positive weight"
+        )
+    return mix
+
+
+class VirtualUser:
+    """
+    One client session: logs in as a seeded user, then picks operations
+    from the mix. Updates and deletes only touch tasks this session created,
+    so the seeded data keeps its size for the whole run.
+    """
+
+    def __init__(self, driver, user, mix, seed=None):
+        self.driver = driver
+        self.user = user
+        self.random = random.Random(seed)
+        self.operations = list(mix)
+        self.weights = [mix[name] for name in self.operations]
+        self.created = []
+        self.headers = None
+
+    def start(self):
+        status, body = self.driver.request("POST", "/login", {
+            "username": self.user.username, "password": self.user.password,
+        })
+        if status != 200:
+            raise RuntimeError(
+                f"login of {self.user.username} failed with {status}"
+            )
+        self.headers = {"Authorization": f"Bearer {body['token']}"}
+
+    def step(self):
+        """Run one operation; returns (operation, latency in seconds, ok)."""
+        operation = self.random.choices(self.operations, self.weights)[0]
+        if operation in ("update", "delete") and not self.created:
+            operation = "create"
+        method, path, payload, headers = getattr(self, "_" + operation)()
+
+        started = time.perf_counter()
+        status, body = self.driver.request(method, path, payload, headers)
+        latency = time.perf_counter() - started
+
+        ok = status == EXPECTED_STATUS[operation]
+        if ok and operation == "create":
+            self.created.append(body["id"])
+        elif ok and operation == "delete":
+            self.created.remove(int(path.rsplit("/", 1)[1]))
+        return operation, latency, ok
+
+    def _register(self):
+        name = f"load{next(_registrations)}-{self.random.getrandbits(32):08x}"
+        return (
+            "POST",
+            "/register",
+            {"username": name, "password": self.user.password},
+            None,
+        )
+
+    def _login(self):
+        return (
+            "POST",
+            "/login",
+            {"username": self.user.username, "password": self.user.password},
+            None,
+        )
+
+    def _list(self):
+        return "GET", "/tasks", None, self.headers
+
+    def _create(self):
+        return (
+            "POST",
+            "/tasks",
+            {
+                "title": "Load test task",
+                "description": "Created by benchmarks.api_load",
+                # Spelled as in PRIORITY_VALUES; other spellings fall back to
+                # Medium
+                "priority": self.random.choice(("Low", "Medium", "High")),
+                "estimated_hours": self.random.randint(1, 8),
+                "category_id": self.random.choice(self.user.category_ids),
+            },
+            self.headers,
+        )
+
+    def _update(self):
+        task_id = self.random.choice(self.created)
+        return (
+            "PUT", f"/tasks/{task_id}", {"status": "completed"}, self.headers
+        )
+
+    def _delete(self):
+        task_id = self.random.choice(self.created)
+        return "DELETE", f"/tasks/{task_id}", None, self.headers
@@ -0,0 +1,205 @@
+"""
+Throughput and latency of the WSGI and ASGI serving modes under many
+concurrent connections.
+
+Starts gunicorn on a seeded SQLite file, once per mode:
+
+- wsgi:       backend.wsgi:app with gthread workers of --threads threads
+              (the Dockerfile default, backend/gunicorn_conf.py)
+- wsgi-sync:  backend.wsgi:app with sync workers
+- asgi:       backend.asgi:app with uvicorn workers
+
+then opens --connections client connections at once (asyncio, one request in
+flight per connection) that keep requesting --path for --seconds. A sync worker
+serves one connection at a time and a gthread worker one per thread, so most
+connections wait in the listen backlog or the worker's queue; the async workers
+accept them all and interleave their requests. "completed" counts responses
+received in time, "errors" failed connections or requests, and latencies are
+measured from sending a request to reading its full response.
+
+    python -m benchmarks.asgi_concurrency --connections 1000 --workers 2
+    --seconds 10
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+
+from benchmarks.api_load.report import percentile
+
+# mode: (app, worker class, whether --threads applies)
+MODES = {
+    "wsgi": ("backend.wsgi:app", "gthread", True),
+    "wsgi-sync": ("backend.wsgi:app", "sync", False),
+    "asgi": ("backend.asgi:app", "uvicorn.workers.UvicornWorker", False),
+}
+
+
+async def _read_response(reader):
+    """Read one HTTP/1.1 response; returns (status, keep_alive)."""
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split()[1])
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip().lower()
+    await reader.readexactly(int(headers.get("content-length", 0)))
+    return status, headers.get("connection") != "close"
+
+
+async def _connection(host, port, request, deadline, stats):
+    reader = writer = None
+    while time.perf_counter() < deadline:
+        try:
+            if writer is None:
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(host, port),
+                    deadline - time.perf_counter(),
+                )
+                stats["connected"] += 1
+            started = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            status, keep_alive = await asyncio.wait_for(
+                _read_response(reader), deadline - time.perf_counter()
+            )
+            stats["latencies"].append(time.perf_counter() - started)
+            if status != 200:
+                stats["errors"] += 1
+            if not keep_alive:
+                writer.close()
+                writer = None
+        except asyncio.TimeoutError:
+            break
+        except (OSError, asyncio.IncompleteReadError, ValueError):
+            stats["errors"] += 1
+            if writer is not None:
+                writer.close()
+            writer = None
+            await asyncio.sleep(0.05)
+    if writer is not None:
+        writer.close()
+
+
+async def _load(host, port, path, token, connections, seconds):
+    request = (
+        f"GET {path} HTTP/1.1\r\nHost: {host}\r\n"
+        f"Authorization: Bearer {token}\r\n\r\n"
+    ).encode()
+    stats = {"latencies": [], "errors": 0, "connected": 0}
+    deadline = time.perf_counter() + seconds
+    await asyncio.gather(
+        *(
+            _connection(host, port, request, deadline, stats)
+            for _ in range(connections)
+        )
+    )
+    return stats
+
+
+def run_mode(mode, args):
+    # Runs in a fresh process: Config reads DATABASE_URL when first imported
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            "FLASK_ENV": "production",
+            "DATABASE_URL": f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+        }
+        os.environ.update(env)
+
+        from backend.app import create_app
+        from benchmarks.api_load.drivers import GunicornServer
+        from benchmarks.api_load.seed import seed
+
+        user = seed(create_app(), 1, 5, args.tasks)[0]
+        app_path, worker_class, threaded = MODES[mode]
+        threads = args.threads if threaded else 1
+        with GunicornServer(
+            env, args.workers, threads, worker_class=worker_class, app=app_path
+        ) as server:
+            driver = server.driver()
+            _, body = driver.request(
+                "POST",
+                "/login",
+                {"username": user.username, "password": user.password},
+            )
+            driver.close()
+            stats = asyncio.run(
+                _load(
+                    server.host, server.port, args.path, body["token"],
+                    args.connections, args.seconds,
+                )
+            )
+
+    latencies = sorted(stats["latencies"])
+
+    def ms(seconds):
+        return None if seconds is None else round(seconds * 1000, 1)
+
+    return {
+        "mode": mode,
+        "connections": args.connections,
+        "workers": args.workers,
+        "threads": threads,
+        "completed": len(latencies),
+        "req_per_s": round(len(latencies) / args.seconds, 1),
+        "errors": stats["errors"],
+        "connected": stats["connected"],
+        "p50_ms": ms(percentile(latencies, 50)),
+        "p95_ms": ms(percentile(latencies, 95)),
+        "p99_ms": ms(percentile(latencies, 99)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--connections", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=4,
+        help="threads per gthread worker (mode wsgi)",
+    )
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument(
+        "--tasks", type=int, default=200, help="tasks of the benchmark user"
+    )
+    parser.add_argument("--path", default="/tasks?limit=20")
+    parser.add_argument(
+        "--modes", nargs="+", choices=list(MODES), default=list(MODES)
+    )
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    results = []
+    for mode in args.modes:
+        with multiprocessing.get_context("spawn").Pool(1) as pool:
+            results.append(pool.apply(run_mode, (mode, args)))
+
+    print(
+        f"{'mode':<10} {'conns':>6} {'req/s':>9} {'completed':>10} "
+        f"{'errors':>7} "
+        f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+    )
+    for r in results:
+        print(
+            f"{r['mode']:<10} {r['connections']:>6} {r['req_per_s']:>9} "
+            f"{r['completed']:>10} "
+            f"{r['errors']:>7} {r['p50_ms']:>9} {r['p95_ms']:>9} "
+            f"{r['p99_ms']:>9}"
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
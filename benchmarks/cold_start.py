@@ -0,0 +1,171 @@
+"""
+Cold start of the production gunicorn profile (backend/gunicorn_conf.py).
+
+For each setup, starts gunicorn on a seeded SQLite file and measures:
+
+- ready:        seconds from launching gunicorn to the first 200 on /health
+- first login / first list:  latency of the first POST /login and GET /tasks
+- warm list:    median latency of the following GET /tasks requests
+
+Setups: preload + warmup (the default), preload without warmup, and
+neither (every worker imports and builds the app itself).
+
+    python -m benchmarks.cold_start --workers 2 --repeat 3
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+SETUPS = {
+    "preload+warmup": {"GUNICORN_PRELOAD": "on", "WARMUP": "on"},
+    "preload": {"GUNICORN_PRELOAD": "on", "WARMUP": "off"},
+    "no-preload": {"GUNICORN_PRELOAD": "off", "WARMUP": "off"},
+}
+
+
+def _seed(database_url):
+    os.environ.update(
+        {"FLASK_ENV": "production", "DATABASE_URL": database_url}
+    )
+    from backend.app import create_app
+    from benchmarks.api_load.seed import seed
+
+    user = seed(create_app(), 1, 5, 200)[0]
+    return user.username, user.password
+
+
+def _timed(driver, *args):
+    started = time.perf_counter()
+    status, body = driver.request(*args)
+    return (time.perf_counter() - started) * 1000, status, body
+
+
+def measure(setup, env, workers, credentials):
+    from benchmarks.api_load.drivers import HTTPDriver, free_port
+
+    port = free_port()
+    env = {
+        **os.environ, **env, **SETUPS[setup],
+        "GUNICORN_BIND": f"127.0.0.1:{port}",
+        "WEB_CONCURRENCY": str(workers),
+        "GUNICORN_ACCESS_LOG": "/dev/null",
+        "LOG_LEVEL": "warning",
+    }
+    command = [
+        sys.executable, "-m", "gunicorn", "-c", "python:backend.gunicorn_conf",
+        "backend.wsgi:app",
+    ]
+
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(
+                    f"gunicorn exited with {process.returncode}"
+                )
+            try:
+                if (
+                    HTTPDriver("127.0.0.1", port, timeout=1).request(
+                        "GET", "/health"
+                    )[0]
+                    == 200
+                ):
+                    break
+            except OSError:
+                time.sleep(0.01)
+        ready = time.perf_counter() - started
+
+        driver = HTTPDriver("127.0.0.1", port)
+        username, password = credentials
+        login_ms, _, body = _timed(
+            driver,
+            "POST",
+            "/login",
+            {"username": username, "password": password},
+        )
+        headers = {"Authorization": f"Bearer {body['token']}"}
+        first_ms, _, _ = _timed(driver, "GET", "/tasks", None, headers)
+        warm = [
+            _timed(driver, "GET", "/tasks", None, headers)[0]
+            for _ in range(20)
+        ]
+        driver.close()
+    finally:
+        process.terminate()
+        process.wait()
+
+    return {
+        "setup": setup,
+        "ready_s": round(ready, 3),
+        "first_login_ms": round(login_ms, 1),
+        "first_list_ms": round(first_ms, 1),
+        "warm_list_ms": round(statistics.median(warm), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=3,
+        help="runs per setup; the median is reported",
+    )
+    parser.add_argument(
+        "--setups", nargs="+", choices=list(SETUPS), default=list(SETUPS)
+    )
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {
+            "FLASK_ENV": "production",
+            "DATABASE_URL": f"sqlite:///{os.path.join(tmp, 'cold.db')}",
+        }
+        # Seed in a separate process so this one never imports the app
+        with multiprocessing.get_context("spawn").Pool(1) as pool:
+            credentials = pool.apply(_seed, (env["DATABASE_URL"],))
+
+        results = []
+        for setup in args.setups:
+            runs = [
+                measure(setup, env, args.workers, credentials)
+                for _ in range(args.repeat)
+            ]
+            result = {"setup": setup}
+            for key in (
+                "ready_s", "first_login_ms", "first_list_ms", "warm_list_ms"
+            ):
+                result[key] = round(
+                    statistics.median(run[key] for run in runs), 3
+                )
+            results.append(result)
+
+    print(
+        f"{'setup':<16} {'ready s':>8} {'1st login ms':>13} "
+        f"{'1st list ms':>12} {'warm list ms':>13}"
+    )
+    for r in results:
+        print(f"{r['setup']:<16} {r['ready_s']:>8} {r['first_login_ms']:>13} "
+              f"{r['first_list_ms']:>12} {r['warm_list_ms']:>13}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Login throughput at each password hashing setting.
+
+For every method, registers one user and calls AuthService.authenticate_user
+in a loop: first from a single thread (logins per second per core, since the
+hash is CPU bound), then from --threads request threads at once, the way a
+threaded worker serves concurrent logins.
+
+    python -m benchmarks.password_hashing --seconds 3 \\
+        --methods scrypt:32768:8:1 scrypt:16384:8:1 pbkdf2:sha256:600000
+"""
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_METHODS = [
+    "scrypt:32768:8:1",
+    "scrypt:16384:8:1",
+    "pbkdf2:sha256:600000",
+    "pbkdf2:sha256:260000",
+]
+
+
+def _logins(app, service, username, seconds):
+    from backend.database import db
+
+    count = 0
+    deadline = time.perf_counter() + seconds
+    with app.app_context():
+        while time.perf_counter() < deadline:
+            service.authenticate_user(username, "benchmark-password")
+            db.session.remove()
+            count += 1
+    return count
+
+
+def run_method(app, method, seconds, threads):
+    from backend.services.auth_service import AuthService
+
+    service = AuthService("secret", "HS256", 1, password_hash_method=method)
+    username = f"bench-{method}"
+    with app.app_context():
+        service.register_user(username, "benchmark-password")
+
+    per_core = _logins(app, service, username, seconds) / seconds
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        futures = [
+            executor.submit(_logins, app, service, username, seconds)
+            for _ in range(threads)
+        ]
+        concurrent = sum(f.result() for f in futures) / seconds
+
+    return {
+        "method": method,
+        "logins_per_s_per_core": round(per_core, 1),
+        "ms_per_login": round(1000 / per_core, 1) if per_core else None,
+        "threads": threads,
+        "logins_per_s_threaded": round(concurrent, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--methods", nargs="+", default=DEFAULT_METHODS)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument(
+        "--threads", type=int, default=8, help="concurrent request threads"
+    )
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    from backend.app import create_app
+
+    app = create_app("testing")
+    results = [
+        run_method(app, m, args.seconds, args.threads) for m in args.methods
+    ]
+
+    print(
+        f"{'method':<24} {'logins/s/core':>14} {'ms/login':>9} "
+        f"{'threaded logins/s':>18}"
+    )
+    for r in results:
+        print(
+            f"{r['method']:<24} {r['logins_per_s_per_core']:>14} "
+            f"{r['ms_per_login']:>9} "
+            f"{r['logins_per_s_threaded']:>18}"
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Latency of GET /tasks/search at scale.
+
+Seeds --tasks tasks spread over --users users (titles and descriptions drawn
+from a Zipf-distributed vocabulary, so some words are in most tasks and
+others in a handful) into an in-memory app, then times for one user:
+
+- fts:   TaskService.search_tasks, one page of 50 from the FTS5 index
+- like:  the same words as LIKE '%word%' filters on the task table
+- full:  the user's full listing, filtered in Python, which is what the
+         browser did before the search endpoint existed
+
+for a common word, a rare word, two words and a two-letter prefix.
+
+    python -m benchmarks.search --tasks 1000000 --users 100 --repeat 20
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+
+VOCABULARY = [
+    f"{a}{b}{c}"
+    for a in "bcdfghklmnprstvz"
+    for b in "aeiou"
+    for c in ("n", "r", "st", "ll", "ck")
+]
+WEIGHTS = [1 / (rank + 1) for rank in range(len(VOCABULARY))]
+
+
+def text(rng, words):
+    return " ".join(rng.choices(VOCABULARY, WEIGHTS, k=words))
+
+
+def seed(user_ids, count, chunk=10000):
+    from sqlalchemy import insert
+    from backend.database import db
+    from backend.models.task import Task
+
+    rng = random.Random(0)
+    for start in range(0, count, chunk):
+        db.session.execute(insert(Task), [
+            {
+                "title": text(rng, 4),
+                "description": text(rng, 12),
+                "priority": (i % 3) + 1,
+                "hours": i % 8,
+                "user_id": user_ids[i % len(user_ids)],
+            }
+            for i in range(start, min(start + chunk, count))
+        ])
+        db.session.commit()
+
+
+def like(user_id, q):
+    from backend.serializers import TASK_COLUMNS
+    from backend.services.task_service import TaskService
+
+    service = TaskService()
+    query = service._filtered_query(user_id, TASK_COLUMNS)
+    for term in q.split():
+        pattern = f"%{term}%"
+        from backend.models.task import Task
+        query = query.filter(
+            (Task.title.ilike(pattern)) | (Task.description.ilike(pattern))
+        )
+    return query.order_by(*service._sort_key("id")).limit(51).all()
+
+
+def full(user_id, q):
+    from backend.serializers import TASK_COLUMNS, serialize_tasks
+    from backend.services.task_service import TaskService
+
+    terms = q.split()
+    tasks = serialize_tasks(
+        TaskService().get_tasks(user_id, columns=TASK_COLUMNS)
+    )
+    return [
+        t
+        for t in tasks
+        if all(
+            term in (t["title"] + " " + (t["description"] or "")).lower()
+            for term in terms
+        )
+    ]
+
+
+def fts(user_id, q):
+    from backend.serializers import TASK_COLUMNS
+    from backend.services.task_service import TaskService
+
+    return TaskService().search_tasks(
+        user_id, q, limit=50, columns=TASK_COLUMNS
+    )
+
+
+def measure(app, fn, user_id, q, repeat):
+    from backend.database import db
+
+    timings = []
+    for _ in range(repeat):
+        with app.app_context():
+            start = time.perf_counter()
+            fn(user_id, q)
+            timings.append(time.perf_counter() - start)
+            db.session.remove()
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--tasks", type=int, default=200000)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument(
+        "--skip-full", action="store_true",
+        help="skip the full-listing baseline",
+    )
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    from backend.app import create_app
+    from backend.database import db
+    from backend.services.auth_service import AuthService
+
+    app = create_app("testing")
+    with app.app_context():
+        auth = AuthService(
+            "secret", "HS256", 1, password_hash_method="pbkdf2:sha256:1000"
+        )
+        user_ids = [
+            auth.register_user(f"bench-{i}", "password123").id
+            for i in range(args.users)
+        ]
+        started = time.perf_counter()
+        seed(user_ids, args.tasks)
+        print(
+            f"seeded {args.tasks} tasks (index kept by triggers) in "
+            f"{time.perf_counter() - started:.1f}s"
+        )
+        db.session.remove()
+
+    queries = {
+        "common word": VOCABULARY[0],
+        "rare word": VOCABULARY[-1],
+        "two words": f"{VOCABULARY[1]} {VOCABULARY[5]}",
+        "prefix": VOCABULARY[3][:2],
+    }
+    paths = {"fts": fts, "like": like}
+    if not args.skip_full:
+        paths["full"] = full
+
+    results = []
+    for label, q in queries.items():
+        row = {"query": label, "q": q}
+        for name, fn in paths.items():
+            row[f"{name}_ms"] = round(
+                measure(app, fn, user_ids[0], q, args.repeat), 2
+            )
+        results.append(row)
+
+    print(f"{args.tasks // args.users} tasks per user, {args.tasks} in total")
+    header = "".join(f"{name + ' ms':>12}" for name in paths)
+    print(f"{'query':<14}{'q':<12}{header}")
+    for row in results:
+        cells = "".join(f"{row[name + '_ms']:>12}" for name in paths)
+        print(f"{row['query']:<14}{row['q']:<12}{cells}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
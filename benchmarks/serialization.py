@@ -0,0 +1,141 @@
+"""
+Serialization cost of the task listing at 100 / 1k / 10k rows.
+
+Compares, inside one in-memory app:
+
+- legacy:  Task ORM objects, a per-row dict with isoformat(), stdlib json
+- columns: column rows through backend.serializers, stdlib provider
+- fast:    column rows through backend.serializers, orjson provider
+
+Times cover the query, the row -> dict step and the encoding, i.e. what
+GET /tasks does on a cache miss.
+
+    python -m benchmarks.serialization --sizes 100 1000 10000 --repeat 20
+"""
+import argparse
+import json
+import statistics
+import time
+from datetime import datetime, timedelta
+
+
+def seed(user_id, category_id, count):
+    from backend.services.task_service import TaskService
+
+    TaskService().create_tasks(
+        user_id,
+        [
+            {
+                "title": f"Task {i}",
+                "description": (
+                    "Benchmark task with a moderately long description " * 2
+                ),
+                "priority": (i % 3) + 1,
+                "hours": i % 8,
+                "category_id": category_id,
+                "due_date": datetime(2025, 1, 1) + timedelta(days=i % 365),
+            }
+            for i in range(count)
+        ],
+    )
+
+
+def legacy(user_id):
+    from backend.services.task_service import TaskService
+
+    tasks = TaskService().get_tasks(user_id)
+    priority_map = {1: "High", 2: "Medium", 3: "Low"}
+    return json.dumps([
+        {
+            "id": t.id,
+            "title": t.title,
+            "description": t.description,
+            "priority": priority_map.get(t.priority, "Medium"),
+            "hours": t.hours,
+            "estimated_hours": t.hours,
+            "category_id": t.category_id,
+            "status": t.status,
+            "due_date": t.due_date.isoformat() if t.due_date else None
+        } for t in tasks
+    ], sort_keys=True)
+
+
+def with_provider(provider):
+    from backend.serializers import TASK_COLUMNS, serialize_tasks
+    from backend.services.task_service import TaskService
+
+    def run(user_id):
+        rows = TaskService().get_tasks(user_id, columns=TASK_COLUMNS)
+        return provider.dumps(serialize_tasks(rows))
+    return run
+
+
+def measure(app, fn, user_id, repeat):
+    from backend.database import db
+
+    timings = []
+    for _ in range(repeat):
+        with app.app_context():
+            start = time.perf_counter()
+            fn(user_id)
+            timings.append(time.perf_counter() - start)
+            db.session.remove()
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "--sizes", nargs="+", type=int, default=[100, 1000, 10000]
+    )
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    from backend.app import create_app
+    from backend.json_provider import (
+        OrjsonProvider, StdlibJSONProvider, orjson,
+    )
+    from backend.services.auth_service import AuthService
+    from backend.services.category_service import CategoryService
+
+    app = create_app("testing")
+    paths = {
+        "legacy": legacy, "columns": with_provider(StdlibJSONProvider(app))
+    }
+    if orjson is not None:
+        paths["fast"] = with_provider(OrjsonProvider(app))
+
+    results = []
+    with app.app_context():
+        auth = AuthService(
+            "secret", "HS256", 1, password_hash_method="pbkdf2:sha256:1000"
+        )
+        for size in args.sizes:
+            user = auth.register_user(f"bench-{size}", "password123")
+            category = CategoryService().create_category(user.id, "Bench")
+            seed(user.id, category.id, size)
+            row = {"rows": size}
+            for name, fn in paths.items():
+                row[f"{name}_ms"] = round(
+                    measure(app, fn, user.id, args.repeat), 2
+                )
+            results.append(row)
+
+    header = "".join(f"{name + ' ms':>14}" for name in paths)
+    print(f"{'rows':>8}{header}{'speedup':>10}")
+    for row in results:
+        cells = "".join(f"{row[name + '_ms']:>14}" for name in paths)
+        best = min(row[name + "_ms"] for name in paths)
+        print(f"{row['rows']:>8}{cells}{row['legacy_ms'] / best:>9.1f}x")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""
+Multi-process read/write throughput of the database setups.
+
+Starts several reader and writer processes, each with its own app (like
+gunicorn workers), and measures how many task reads and writes they get
+through in a fixed time. Compared setups:
+
+- memory:    sqlite:///:memory: (the previous default, one private DB per
+             process)
+- file:      file-backed SQLite with the default rollback journal
+- file-wal:  file-backed SQLite with the SQLITE_PRAGMAS tuning (WAL etc.)
+
+"visible" is how many tasks a reader can see at the end out of all tasks
+written by every writer; with :memory: each process only sees its own.
+
+    python -m benchmarks.sqlite_concurrency --readers 4 --writers 2 --seconds 5
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+
+MODES = ("memory", "file", "file-wal")
+SEED_TASKS = 1000
+
+
+def _environment(mode, path):
+    env = {"FLASK_ENV": "production", "SQLITE_TUNING": "on"}
+    if mode == "memory":
+        env["DATABASE_URL"] = "sqlite:///:memory:"
+    else:
+        env["DATABASE_URL"] = f"sqlite:///{path}"
+        if mode == "file":
+            env["SQLITE_TUNING"] = "off"
+    return env
+
+
+def _bench_user(app):
+    """Return (user_id, category_id), seeding the benchmark data if missing."""
+    from backend.database import db
+    from backend.models.user import User
+    from backend.services.category_service import CategoryService
+    from backend.services.task_service import TaskService
+
+    user = User.query.filter_by(username="bench").first()
+    if user:
+        category_id = CategoryService().get_all_categories(user.id)[0].id
+        return user.id, category_id
+
+    user = User(username="bench", password_hash="x")
+    db.session.add(user)
+    db.session.commit()
+    category = CategoryService().create_category(user.id, "Bench")
+    tasks = TaskService()
+    for i in range(SEED_TASKS):
+        tasks.create_task(
+            user.id, f"Seed {i}", None, (i % 3) + 1, i % 8, category.id
+        )
+    return user.id, category.id
+
+
+def _worker(role, seconds, start, results):
+    from backend.app import create_app
+    from backend.database import db
+    from backend.services.task_service import TaskService
+
+    app = create_app()
+    tasks = TaskService()
+    with app.app_context():
+        user_id, category_id = _bench_user(app)
+        db.session.remove()
+        start.wait()
+
+        operations = 0
+        errors = 0
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            try:
+                if role == "reader":
+                    tasks.get_tasks_page(user_id, limit=50)
+                else:
+                    tasks.create_task(
+                        user_id, f"Task {operations}", None, 2, 1, category_id
+                    )
+                operations += 1
+            except Exception:
+                db.session.rollback()
+                errors += 1
+            finally:
+                db.session.remove()
+
+        visible = len(tasks.get_tasks(user_id))
+        results.put(
+            {
+                "role": role, "operations": operations, "errors": errors,
+                "visible": visible,
+            }
+        )
+
+
+def run_mode(mode, readers, writers, seconds):
+    ctx = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ.update(_environment(mode, os.path.join(tmp, "bench.db")))
+
+        # Seed once so file-backed workers start from the same data
+        seeder = ctx.Process(target=_seed)
+        seeder.start()
+        seeder.join()
+
+        start = ctx.Event()
+        results = ctx.Queue()
+        processes = [
+            ctx.Process(
+                target=_worker, args=("reader", seconds, start, results)
+            )
+            for _ in range(readers)
+        ]
+        processes += [
+            ctx.Process(
+                target=_worker, args=("writer", seconds, start, results)
+            )
+            for _ in range(writers)
+        ]
+        for process in processes:
+            process.start()
+        time.sleep(2)  # let every worker build its app before the clock starts
+        start.set()
+
+        rows = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+
+    reads = sum(r["operations"] for r in rows if r["role"] == "reader")
+    writes = sum(r["operations"] for r in rows if r["role"] == "writer")
+    return {
+        "mode": mode,
+        "readers": readers,
+        "writers": writers,
+        "reads_per_s": round(reads / seconds, 1),
+        "writes_per_s": round(writes / seconds, 1),
+        "errors": sum(r["errors"] for r in rows),
+        "visible": min(r["visible"] for r in rows),
+        "written": SEED_TASKS + writes,
+    }
+
+
+def _seed():
+    from backend.app import create_app
+
+    app = create_app()
+    with app.app_context():
+        _bench_user(app)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument(
+        "--modes", nargs="+", choices=MODES, default=list(MODES)
+    )
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    results = [
+        run_mode(mode, args.readers, args.writers, args.seconds)
+        for mode in args.modes
+    ]
+
+    print(
+        f"{'mode':<10} {'reads/s':>10} {'writes/s':>10} {'errors':>7} "
+        f"{'visible':>15}"
+    )
+    for r in results:
+        print(
+            f"{r['mode']:<10} {r['reads_per_s']:>10} {r['writes_per_s']:>10} "
+            f"{r['errors']:>7} {r['visible']:>7}/{r['written']:<7}"
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
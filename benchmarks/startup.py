@@ -0,0 +1,168 @@
+"""
+Startup time of the backend: importing backend.app and running create_app()
+in a fresh interpreter, which is what every scale-up from zero pays.
+
+Each of --repeat runs starts a new interpreter and reports
+
+- import:  seconds to import backend.app
+- init:    seconds spent in create_app()
+
+and one extra run under ``python -X importtime`` breaks the import time down
+by module: the slowest modules by their own time, the time per top-level
+package, and every backend module.
+
+    python -m benchmarks.startup --repeat 5 --config production
+
+Exits with status 1 when the median import + init time exceeds the budget
+(STARTUP_BUDGET_SECONDS unless --budget is given).
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import json, time
+started = time.perf_counter()
+from backend.app import create_app
+imported = time.perf_counter()
+create_app({config!r})
+initialised = time.perf_counter()
+print(json.dumps({{
+    "import_s": imported - started, "init_s": initialised - imported,
+}}))
+"""
+
+# import time: self [us] | cumulative | imported package
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def run_child(config, env=None, importtime=False):
+    """
+    Run create_app(config) in a new interpreter; returns (timings, stderr).
+    """
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    command += ["-c", CHILD.format(config=config)]
+    result = subprocess.run(
+        command, cwd=ROOT, env={**os.environ, **(env or {})},
+        capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1]), result.stderr
+
+
+def parse_importtime(stderr):
+    """[(module, self_s, cumulative_s, depth)] from -X importtime output."""
+    modules = []
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            own, cumulative, indent, name = match.groups()
+            modules.append(
+                (name, int(own) / 1e6, int(cumulative) / 1e6, len(indent) // 2)
+            )
+    return modules
+
+
+def by_package(modules):
+    """Total own import time per top-level package."""
+    totals = defaultdict(float)
+    for name, own, _, _ in modules:
+        totals[name.split(".")[0]] += own
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "--repeat",
+        type=int,
+        default=5,
+        help="interpreters to start; the median is reported",
+    )
+    parser.add_argument(
+        "--config", default="production",
+        help="config name passed to create_app",
+    )
+    parser.add_argument(
+        "--top", type=int, default=15, help="rows of the per-module breakdown"
+    )
+    parser.add_argument(
+        "--budget",
+        type=float,
+        help="seconds; defaults to STARTUP_BUDGET_SECONDS",
+    )
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    from backend.config import Config
+    budget = (
+        args.budget
+        if args.budget is not None
+        else Config.STARTUP_BUDGET_SECONDS
+    )
+
+    runs = [run_child(args.config)[0] for _ in range(args.repeat)]
+    import_s = statistics.median(run["import_s"] for run in runs)
+    init_s = statistics.median(run["init_s"] for run in runs)
+    modules = parse_importtime(run_child(args.config, importtime=True)[1])
+
+    print(f"import backend.app  {import_s * 1000:8.1f} ms")
+    print(f"create_app()        {init_s * 1000:8.1f} ms")
+    print(
+        f"total               {(import_s + init_s) * 1000:8.1f} ms   (budget "
+        f"{budget * 1000:.0f} ms)"
+    )
+
+    print(
+        f"\nslowest modules (own time, under -X importtime, {len(modules)} "
+        "modules)"
+    )
+    for name, own, cumulative, _ in sorted(
+        modules, key=lambda m: m[1], reverse=True
+    )[: args.top]:
+        print(
+            f"  {own * 1000:7.1f} ms  {cumulative * 1000:7.1f} ms cumulative  "
+            f"{name}"
+        )
+
+    print("\npackages (own time)")
+    for package, own in by_package(modules)[:args.top]:
+        print(f"  {own * 1000:7.1f} ms  {package}")
+
+    print("\nbackend modules (cumulative time)")
+    for name, own, cumulative, _ in sorted(
+        modules, key=lambda m: m[2], reverse=True
+    ):
+        if name.split(".")[0] == "backend":
+            print(f"  {cumulative * 1000:7.1f} ms  {name}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "import_s": import_s,
+                "init_s": init_s,
+                "budget_s": budget,
+                "modules": [
+                    {"name": name, "self_s": own, "cumulative_s": cumulative}
+                    for name, own, cumulative, _ in modules
+                ],
+            }, f, indent=2)
+
+    if import_s + init_s > budget:
+        print(f"\nover budget by {(import_s + init_s - budget) * 1000:.0f} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+GET /stats against computing the same dashboard numbers in the browser.
+
+For each size, seeds one user with that many tasks into an in-memory app and
+compares, on a cache miss:
+
+- stats:   TaskService.get_stats (two GROUP BY queries) encoded as JSON
+- client:  the full GET /tasks payload (query, serialize, encode), then
+           decoding it and aggregating in Python, as the dashboard did
+
+The stats payload has the same size whatever the number of tasks (it grows
+only with the number of categories), while the client-side path ships and
+walks every task.
+
+    python -m benchmarks.stats --sizes 100 1000 10000 100000 --repeat 10
+"""
+import argparse
+import json
+import statistics
+import time
+from datetime import date, datetime
+
+from benchmarks.serialization import seed
+
+
+def server_stats(app, user_id):
+    from backend.services.task_service import TaskService
+
+    return app.json.dumps(TaskService().get_stats(user_id)).encode()
+
+
+def client_side(app, user_id):
+    from backend.serializers import TASK_COLUMNS, serialize_tasks
+    from backend.services.task_service import TaskService
+
+    payload = app.json.dumps(
+        serialize_tasks(TaskService().get_tasks(user_id, columns=TASK_COLUMNS))
+    ).encode()
+
+    # What the browser did with it
+    today = datetime.combine(date.today(), datetime.min.time()).isoformat()
+    stats = {
+        "total": 0, "hours": 0, "overdue": 0, "by_status": {},
+        "by_priority": {}, "by_category": {},
+    }
+    for task in json.loads(payload):
+        stats["total"] += 1
+        stats["hours"] += task["hours"]
+        stats["by_status"][task["status"]] = (
+            stats["by_status"].get(task["status"], 0) + 1
+        )
+        stats["by_priority"][task["priority"]] = (
+            stats["by_priority"].get(task["priority"], 0) + 1
+        )
+        stats["by_category"][task["category_id"]] = (
+            stats["by_category"].get(task["category_id"], 0) + task["hours"]
+        )
+        if (
+            task["due_date"]
+            and task["due_date"] < today
+            and task["status"] != "Completed"
+        ):
+            stats["overdue"] += 1
+    return payload
+
+
+def measure(app, fn, user_id, repeat):
+    from backend.database import db
+
+    timings = []
+    for _ in range(repeat):
+        with app.app_context():
+            start = time.perf_counter()
+            payload = fn(app, user_id)
+            timings.append(time.perf_counter() - start)
+            db.session.remove()
+    return statistics.median(timings) * 1000, len(payload)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "--sizes", nargs="+", type=int, default=[100, 1000, 10000, 100000]
+    )
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    from backend.app import create_app
+    from backend.services.auth_service import AuthService
+    from backend.services.category_service import CategoryService
+
+    app = create_app("testing")
+    results = []
+    with app.app_context():
+        auth = AuthService(
+            "secret", "HS256", 1, password_hash_method="pbkdf2:sha256:1000"
+        )
+        for size in args.sizes:
+            user = auth.register_user(f"bench-{size}", "password123")
+            category = CategoryService().create_category(user.id, "Bench")
+            seed(user.id, category.id, size)
+            row = {"tasks": size}
+            for name, fn in (("stats", server_stats), ("client", client_side)):
+                ms, size_bytes = measure(app, fn, user.id, args.repeat)
+                row[f"{name}_ms"] = round(ms, 2)
+                row[f"{name}_bytes"] = size_bytes
+            results.append(row)
+
+    print(
+        f"{'tasks':>8}{'stats ms':>10}{'stats B':>10}"
+        f"{'client ms':>11}{'client B':>12}{'speedup':>9}"
+    )
+    for row in results:
+        print(
+            f"{row['tasks']:>8}{row['stats_ms']:>10}{row['stats_bytes']:>10}"
+            f"{row['client_ms']:>11}{row['client_bytes']:>12}"
+            f"{row['client_ms'] / row['stats_ms']:>8.1f}x"
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+GET /sync against refetching the full task list.
+
+For each size, seeds one user with that many tasks into an in-memory app,
+takes a sync token, changes --changes of the tasks (half updated, half
+deleted) and times, on a cache miss:
+
+- sync:  SyncService.changes(since=token), encoded as JSON
+- full:  the full GET /tasks payload (query, serialize, encode), which is what
+         a client without sync downloads to notice the same changes
+
+The sync reads only the changed rows along the (user_id, updated_at) index,
+so its time and size follow --changes, not the number of tasks.
+
+    python -m benchmarks.sync --sizes 1000 10000 100000 --changes 50 --repeat
+    10
+"""
+import argparse
+import json
+import statistics
+import time
+
+from benchmarks.serialization import seed
+
+
+def incremental(app, user_id, token):
+    from backend.services.sync_service import SyncService
+
+    return app.json.dumps(
+        SyncService(page_size=10000).changes(user_id, token)
+    ).encode()
+
+
+def full(app, user_id, token):
+    from backend.serializers import TASK_COLUMNS, serialize_tasks
+    from backend.services.task_service import TaskService
+
+    return app.json.dumps(
+        serialize_tasks(TaskService().get_tasks(user_id, columns=TASK_COLUMNS))
+    ).encode()
+
+
+def change(user_id, count):
+    from backend.services.task_service import TaskService
+
+    service = TaskService()
+    ids = [row.id for row in service.get_tasks(user_id)[:count]]
+    service.update_tasks(
+        user_id,
+        [{"id": task_id, "status": "Completed"} for task_id in ids[::2]],
+    )
+    service.delete_tasks(user_id, ids[1::2])
+
+
+def measure(app, fn, user_id, token, repeat):
+    from backend.database import db
+
+    timings = []
+    for _ in range(repeat):
+        with app.app_context():
+            start = time.perf_counter()
+            payload = fn(app, user_id, token)
+            timings.append(time.perf_counter() - start)
+            db.session.remove()
+    return statistics.median(timings) * 1000, len(payload)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "--sizes", nargs="+", type=int, default=[1000, 10000, 100000]
+    )
+    parser.add_argument(
+        "--changes", type=int, default=50, help="tasks changed after the token"
+    )
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args()
+
+    from backend.app import create_app
+    from backend.services.auth_service import AuthService
+    from backend.services.category_service import CategoryService
+    from backend.services.sync_service import SyncService
+
+    app = create_app("testing")
+    results = []
+    with app.app_context():
+        auth = AuthService(
+            "secret", "HS256", 1, password_hash_method="pbkdf2:sha256:1000"
+        )
+        for size in args.sizes:
+            user = auth.register_user(f"bench-{size}", "password123")
+            category = CategoryService().create_category(user.id, "Bench")
+            seed(user.id, category.id, size)
+            # No overlap: the seeded rows are not resent, only the changes
+            token = SyncService(page_size=size + 1, overlap_seconds=0).changes(
+                user.id
+            )["next"]
+            change(user.id, args.changes)
+            row = {"tasks": size, "changes": args.changes}
+            for name, fn in (("sync", incremental), ("full", full)):
+                ms, size_bytes = measure(app, fn, user.id, token, args.repeat)
+                row[f"{name}_ms"] = round(ms, 2)
+                row[f"{name}_bytes"] = size_bytes
+            results.append(row)
+
+    print(
+        f"{'tasks':>8}{'changes':>9}{'sync ms':>9}{'sync B':>9}"
+        f"{'full ms':>10}{'full B':>12}{'speedup':>9}"
+    )
+    for row in results:
+        print(
+            f"{row['tasks']:>8}{row['changes']:>9}{row['sync_ms']:>9}"
+            f"{row['sync_bytes']:>9}{row['full_ms']:>10}"
+            f"{row['full_bytes']:>12}"
+            f"{row['full_ms'] / row['sync_ms']:>8.1f}x"
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,7 @@ Pytest configuration and shared fixtures for testing.
 import pytest
 import sys
 import os
+from contextlib import contextmanager
 
 # Add backend to path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -182,4 +183,25 @@ def multiple_tasks(app, task_service, test_category, test_user):
         db.session.commit()
         task_ids = [task1.id, task2.id, task3.id]
     
-    return task_ids
\ No newline at end of file
+    return task_ids
+
+
+@pytest.fixture(scope='function')
+def assert_max_queries(app):
+    """Context manager failing the test when a block runs too many statements.
+
+    with assert_max_queries(3):
+        client.get('/tasks', headers=auth_headers)
+    """
+    from backend.query_profiler import count_queries
+
+    @contextmanager
+    def check(limit):
+        with count_queries(db.engine) as log:
+            yield log
+        statements = "\n".join(log.statements)
+        assert (
+            len(log) <= limit
+        ), f"{len(log)} queries (max {limit}):\n{statements}"
+
+    return check
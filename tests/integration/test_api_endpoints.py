@@ -41,6 +41,16 @@ class TestAuthenticationEndpoints:
         assert response.status_code == 401
         assert b'Token is missing' in response.data
     
+    def test_logout_revokes_token(self, client, auth_headers):
+        """Test that a token stops working after logout."""
+        assert client.get('/tasks', headers=auth_headers).status_code == 200
+
+        response = client.post('/logout', headers=auth_headers)
+        assert response.status_code == 200
+
+        response = client.get('/tasks', headers=auth_headers)
+        assert response.status_code == 401
+
     def test_access_with_invalid_token(self, client):
         """Test accessing with malformed token."""
         response = client.get('/tasks',
@@ -194,7 +204,30 @@ class TestTaskEndpoints:
         assert task['title'] == 'Updated Title'
         assert task['status'] == 'Completed'
         assert task['priority'] == 'Low'
-    
+
+    def test_update_task_rejects_bad_fields(
+        self, client, auth_headers, test_task
+    ):
+        """Test that unknown keys are ignored and mistyped values are a 400."""
+        response = client.put(
+            f'/tasks/{test_task.id}',
+            json={'title': 'Kept', 'task_id': 999, 'user_id': 999, 'id': 999},
+            headers=auth_headers,
+        )
+        assert response.status_code == 200
+        assert json.loads(response.data) == {
+            'id': test_task.id, 'title': 'Kept'
+        }
+
+        for body, error in [({'description': {}}, 'invalid description'),
+                            ({'status': 'Done'}, 'invalid status'),
+                            ({'due_date': 5}, 'invalid due_date')]:
+            response = client.put(
+                f'/tasks/{test_task.id}', json=body, headers=auth_headers
+            )
+            assert response.status_code == 400
+            assert json.loads(response.data) == {'error': error}
+
     def test_delete_task(self, client, auth_headers, test_task):
         """Test deleting a task."""
         response = client.delete(f'/tasks/{test_task.id}', headers=auth_headers)
@@ -249,6 +282,1114 @@ class TestTaskEndpoints:
         assert response.status_code == 400
         assert b'non-negative' in response.data.lower()
 
+    def test_get_tasks_paginated(self, client, auth_headers, multiple_tasks):
+        """Test cursor pagination over the task list."""
+        response = client.get('/tasks?limit=2', headers=auth_headers)
+        assert response.status_code == 200
+        page = json.loads(response.data)
+        assert [t['priority'] for t in page['tasks']] == ['High', 'Medium']
+        assert page['next_cursor']
+
+        response = client.get(
+            f"/tasks?limit=2&cursor={page['next_cursor']}",
+            headers=auth_headers,
+        )
+        page = json.loads(response.data)
+        assert [t['priority'] for t in page['tasks']] == ['Low']
+        assert page['next_cursor'] is None
+
+    def test_get_tasks_filtered(self, client, auth_headers, multiple_tasks):
+        """Test filtering the task list in the query string."""
+        response = client.get('/tasks?priority=Low', headers=auth_headers)
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert [t['title'] for t in data] == ['Low Priority Task']
+
+    def test_get_tasks_invalid_filters(
+        self, client, auth_headers, multiple_tasks
+    ):
+        """
+        Test that filter values that cannot be parsed are rejected, not
+        dropped.
+        """
+        for query, error in [('category_id=abc', 'invalid category_id'),
+                             ('category_id=-1', 'invalid category_id'),
+                             ('priority=Urgent', 'invalid priority'),
+                             ('priority=7', 'invalid priority'),
+                             ('status=Done', 'invalid status'),
+                             ('due_after=soon', 'invalid due_date')]:
+            for path in ('/tasks', '/tasks/search?q=task&'):
+                response = client.get(
+                    f"{path}{'' if '?' in path else '?'}{query}",
+                    headers=auth_headers,
+                )
+                assert response.status_code == 400, (path, query)
+                assert json.loads(response.data) == {'error': error}
+
+    def test_get_tasks_invalid_sort(self, client, auth_headers):
+        """Test that an unknown sort key is rejected."""
+        response = client.get(
+            '/tasks?sort=title&limit=5', headers=auth_headers
+        )
+        assert response.status_code == 400
+
+
+class TestTaskBatchEndpoints:
+    """Test the /tasks/batch endpoints."""
+
+    def test_batch_create(self, client, auth_headers, test_category):
+        """Test creating several tasks in one request with per-item errors."""
+        response = client.post(
+            '/tasks/batch',
+            json={
+                'tasks': [
+                    {
+                        'title': 'A', 'category_id': test_category.id,
+                        'priority': 'High', 'hours': 1,
+                    },
+                    {'title': 'B', 'priority': 'Low'},
+                    {
+                        'title': 'C', 'category_id': test_category.id,
+                        'priority': 'Low', 'estimated_hours': 3,
+                    },
+                ]
+            },
+            headers=auth_headers,
+        )
+        assert response.status_code == 201
+        data = json.loads(response.data)
+        assert len(data['created']) == 2
+        assert data['errors'] == [
+            {'index': 1, 'error': 'category is required'}
+        ]
+
+    def test_batch_create_atomic(self, client, auth_headers, test_category):
+        """Test that an atomic batch with an invalid item writes nothing."""
+        response = client.post(
+            '/tasks/batch',
+            json={
+                'atomic': True,
+                'tasks': [
+                    {
+                        'title': 'A', 'category_id': test_category.id,
+                        'priority': 'High', 'hours': 1,
+                    },
+                    {
+                        'title': '', 'category_id': test_category.id,
+                        'priority': 'High', 'hours': 1,
+                    },
+                ],
+            },
+            headers=auth_headers,
+        )
+        assert response.status_code == 400
+        assert json.loads(response.data)['errors'] == [
+            {'index': 1, 'error': 'title required'}
+        ]
+        assert (
+            json.loads(client.get('/tasks', headers=auth_headers).data) == []
+        )
+
+    def test_batch_update_and_delete(
+        self, client, auth_headers, multiple_tasks
+    ):
+        """Test updating and deleting several tasks in one request."""
+        response = client.patch(
+            '/tasks/batch',
+            json={
+                'tasks': [
+                    {'id': task_id, 'status': 'Completed'}
+                    for task_id in multiple_tasks
+                ]
+            },
+            headers=auth_headers,
+        )
+        assert response.status_code == 200
+        assert json.loads(response.data)['updated'] == multiple_tasks
+        tasks = json.loads(client.get('/tasks', headers=auth_headers).data)
+        assert {t['status'] for t in tasks} == {'Completed'}
+
+        response = client.delete(
+            '/tasks/batch', json={'ids': multiple_tasks}, headers=auth_headers
+        )
+        assert response.status_code == 200
+        assert json.loads(response.data)['deleted'] == multiple_tasks
+        assert (
+            json.loads(client.get('/tasks', headers=auth_headers).data) == []
+        )
+
+    def test_batch_requires_items(self, client, auth_headers):
+        """Test that an empty batch is rejected."""
+        response = client.post(
+            '/tasks/batch', json={'tasks': []}, headers=auth_headers
+        )
+        assert response.status_code == 400
+
+    def test_batch_rejects_bad_bodies(
+        self, client, auth_headers, test_category, multiple_tasks
+    ):
+        """Test that malformed batches are 400s, not 500s."""
+        item = {
+            'title': 'A', 'category_id': test_category.id, 'priority': 'High',
+            'hours': 1,
+        }
+        response = client.post(
+            '/tasks/batch', json=[item], headers=auth_headers
+        )
+        assert response.status_code == 400
+
+        response = client.post(
+            '/tasks/batch', json={'tasks': [{'title': 'B'}]},
+            headers=auth_headers,
+        )
+        assert response.status_code == 400
+        assert json.loads(response.data)['created'] == []
+
+        response = client.patch(
+            '/tasks/batch',
+            json={
+                'tasks': [
+                    {'id': [1], 'status': 'Completed'},
+                    {'id': True, 'status': 'Completed'},
+                ]
+            },
+            headers=auth_headers,
+        )
+        assert response.status_code == 200
+        assert [e['error'] for e in json.loads(response.data)['errors']] == [
+            'task not found'
+        ] * 2
+
+        response = client.delete(
+            '/tasks/batch',
+            json={'ids': [{'id': 1}, multiple_tasks[0], multiple_tasks[0]]},
+            headers=auth_headers,
+        )
+        assert response.status_code == 200
+        assert json.loads(response.data)['deleted'] == [multiple_tasks[0]]
+        assert json.loads(response.data)['errors'] == [
+            {'index': 0, 'error': 'task not found'}
+        ]
+
+    def test_batch_reports_mistyped_fields(
+        self, client, auth_headers, test_category, multiple_tasks
+    ):
+        """
+        Test that fields of the wrong type are per-item errors, not a 500 for
+        the batch.
+        """
+        item = {
+            'title': 'A', 'category_id': test_category.id, 'priority': 'High',
+            'hours': 1,
+        }
+        response = client.post('/tasks/batch', json={'tasks': [
+            item, {**item, 'due_date': 5}, {**item, 'description': {}},
+            {**item, 'hours': '2'},
+        ]}, headers=auth_headers)
+        assert response.status_code == 201
+        assert json.loads(response.data)['errors'] == [
+            {'index': 1, 'error': 'invalid due_date'},
+            {'index': 2, 'error': 'invalid description'},
+            {'index': 3, 'error': 'hours must be non-negative'},
+        ]
+
+        response = client.patch('/tasks/batch', json={'tasks': [
+            {'id': multiple_tasks[0], 'due_date': 5},
+            {'id': multiple_tasks[1], 'description': {}},
+            {'id': multiple_tasks[2], 'status': ['Completed']},
+        ]}, headers=auth_headers)
+        assert response.status_code == 200
+        assert [e['error'] for e in json.loads(response.data)['errors']] == [
+            'invalid due_date', 'invalid description', 'invalid status',
+        ]
+
+    def test_batch_update_duplicate_ids(
+        self, client, auth_headers, multiple_tasks
+    ):
+        """Test that a task given twice in one PATCH is updated once."""
+        response = client.patch(
+            '/tasks/batch',
+            json={
+                'tasks': [
+                    {'id': multiple_tasks[0], 'title': 'First'},
+                    {'id': multiple_tasks[0], 'title': 'Second'},
+                ]
+            },
+            headers=auth_headers,
+        )
+        assert json.loads(response.data)['updated'] == [multiple_tasks[0]]
+        assert json.loads(response.data)['errors'] == [
+            {'index': 1, 'error': 'duplicate id'}
+        ]
+
+
+class TestConditionalGet:
+    """Test ETag / If-None-Match handling of the listings."""
+
+    def test_unchanged_tasks_return_304_without_queries(
+        self, app, client, auth_headers, multiple_tasks
+    ):
+        """Test that a matching ETag is answered with 304 and no SQL."""
+        from sqlalchemy import event
+        from backend.database import db
+
+        response = client.get('/tasks', headers=auth_headers)
+        etag = response.headers['ETag']
+
+        statements = []
+
+        def listener(*args):
+            statements.append(args[2])
+
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            response = client.get(
+                '/tasks', headers={**auth_headers, 'If-None-Match': etag}
+            )
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+
+        assert response.status_code == 304
+        assert response.headers['ETag'] == etag
+        assert statements == []
+
+    def test_write_changes_etag(self, client, auth_headers, test_category):
+        """Test that creating a task invalidates the task list ETag."""
+        etag = client.get('/tasks', headers=auth_headers).headers['ETag']
+        client.post(
+            '/tasks',
+            json={
+                'title': 'New', 'category_id': test_category.id,
+                'priority': 'High', 'hours': 1,
+            },
+            headers=auth_headers,
+        )
+
+        response = client.get(
+            '/tasks', headers={**auth_headers, 'If-None-Match': etag}
+        )
+        assert response.status_code == 200
+        assert response.headers['ETag'] != etag
+        assert len(json.loads(response.data)) == 1
+
+    def test_etag_depends_on_query(self, client, auth_headers, multiple_tasks):
+        """Test that different filters get different ETags."""
+        all_tasks = client.get('/tasks', headers=auth_headers).headers['ETag']
+        high = client.get(
+            '/tasks?priority=High', headers=auth_headers
+        ).headers['ETag']
+        assert all_tasks != high
+
+    def test_single_task_and_categories(
+        self, client, auth_headers, test_task, test_category
+    ):
+        """Test conditional GET on one task and on the category list."""
+        for url in (f'/tasks/{test_task.id}', '/categories'):
+            etag = client.get(url, headers=auth_headers).headers['ETag']
+            response = client.get(
+                url, headers={**auth_headers, 'If-None-Match': etag}
+            )
+            assert response.status_code == 304
+
+        etag = client.get('/categories', headers=auth_headers).headers['ETag']
+        client.put(
+            f'/categories/{test_category.id}', json={'name': 'Renamed'},
+            headers=auth_headers,
+        )
+        response = client.get(
+            '/categories', headers={**auth_headers, 'If-None-Match': etag}
+        )
+        assert response.status_code == 200
+
+    def test_no_etags_without_cache(self, monkeypatch):
+        """
+        Test that CACHE_BACKEND=none sends no ETags and never answers 304.
+        """
+        from backend.app import create_app
+        from backend.config import TestingConfig
+
+        monkeypatch.setattr(TestingConfig, 'CACHE_BACKEND', 'none')
+        client = create_app('testing').test_client()
+        client.post(
+            '/register',
+            json={'username': 'nocache', 'password': 'password123'},
+        )
+        token = client.post(
+            '/login', json={'username': 'nocache', 'password': 'password123'}
+        ).get_json()['token']
+        headers = {'Authorization': f'Bearer {token}', 'If-None-Match': '*'}
+
+        for url in ('/tasks', '/categories'):
+            response = client.get(url, headers=headers)
+            assert response.status_code == 200
+            assert 'ETag' not in response.headers
+
+
+class TestResponseCache:
+    """Test that listings are served from the cache until a write."""
+
+    def test_repeat_listing_runs_no_queries(
+        self, app, client, auth_headers, multiple_tasks
+    ):
+        """
+        Test that a cached listing skips the database and is refreshed after a
+        write.
+        """
+        from sqlalchemy import event
+        from backend.database import db
+
+        first = client.get('/tasks', headers=auth_headers)
+
+        statements = []
+
+        def listener(*args):
+            statements.append(args[2])
+
+        event.listen(db.engine, 'before_cursor_execute', listener)
+        try:
+            second = client.get('/tasks', headers=auth_headers)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', listener)
+
+        assert second.data == first.data
+        assert statements == []
+
+        client.put(
+            f'/tasks/{multiple_tasks[0]}', json={'title': 'Changed'},
+            headers=auth_headers,
+        )
+        tasks = json.loads(client.get('/tasks', headers=auth_headers).data)
+        assert tasks[0]['title'] == 'Changed'
+
+
+class TestTaskSearch:
+    """Test the full-text task search."""
+
+    def test_search(self, client, auth_headers, multiple_tasks):
+        """Test that matches come back ranked, serialized like the listing."""
+        response = client.get('/tasks/search?q=medium', headers=auth_headers)
+
+        assert response.status_code == 200
+        data = response.get_json()
+        assert [t['id'] for t in data['tasks']] == [multiple_tasks[1]]
+        assert data['tasks'][0]['priority'] == 'Medium'
+        assert data['next_cursor'] is None
+
+    def test_search_pagination_and_filters(
+        self, client, auth_headers, multiple_tasks
+    ):
+        """Test the cursor and the listing filters on search results."""
+        first = client.get(
+            '/tasks/search?q=prior&limit=2', headers=auth_headers
+        ).get_json()
+        second = client.get(
+            f"/tasks/search?q=prior&limit=2&cursor={first['next_cursor']}",
+            headers=auth_headers,
+        ).get_json()
+        ids = [t['id'] for t in first['tasks'] + second['tasks']]
+        assert sorted(ids) == sorted(multiple_tasks)
+        assert second['next_cursor'] is None
+
+        high = client.get(
+            '/tasks/search?q=task&priority=High', headers=auth_headers
+        ).get_json()
+        assert [t['id'] for t in high['tasks']] == [multiple_tasks[0]]
+
+    def test_search_is_invalidated_by_writes(
+        self, client, auth_headers, test_task
+    ):
+        """Test that cached results and ETags change when a task changes."""
+        first = client.get('/tasks/search?q=test', headers=auth_headers)
+        assert len(first.get_json()['tasks']) == 1
+
+        client.put(
+            f'/tasks/{test_task.id}', json={'title': 'Renamed'},
+            headers=auth_headers,
+        )
+        second = client.get(
+            '/tasks/search?q=test',
+            headers={**auth_headers, 'If-None-Match': first.headers['ETag']},
+        )
+        assert second.status_code == 200
+        assert second.get_json()['tasks'][0]['title'] == 'Renamed'
+
+    def test_search_requires_query(self, client, auth_headers):
+        """Test that q is required."""
+        response = client.get('/tasks/search', headers=auth_headers)
+        assert response.status_code == 400
+        assert response.get_json()['error'] == 'search query is required'
+
+
+class TestStatsEndpoint:
+    """Test the aggregated task stats."""
+
+    def test_stats(
+        self, client, auth_headers, multiple_tasks, assert_max_queries
+    ):
+        """Test that the stats are computed with two aggregate queries."""
+        with assert_max_queries(2):
+            response = client.get('/stats', headers=auth_headers)
+
+        assert response.status_code == 200
+        data = response.get_json()
+        assert data['total'] == 3
+        assert data['hours'] == 17
+        assert data['by_priority'] == {'High': 1, 'Medium': 1, 'Low': 1}
+        assert data['hours_by_category'][0]['tasks'] == 3
+
+    def test_stats_cached_until_a_write(
+        self, client, auth_headers, multiple_tasks, assert_max_queries
+    ):
+        """
+        Test that repeat requests hit the cache and a task write invalidates
+        it.
+        """
+        first = client.get('/stats', headers=auth_headers)
+        with assert_max_queries(0):
+            assert (
+                client.get('/stats', headers=auth_headers).get_json()
+                == first.get_json()
+            )
+            cached = client.get(
+                '/stats',
+                headers={
+                    **auth_headers, 'If-None-Match': first.headers['ETag']
+                },
+            )
+        assert cached.status_code == 304
+
+        client.delete(f'/tasks/{multiple_tasks[0]}', headers=auth_headers)
+        assert (
+            client.get('/stats', headers=auth_headers).get_json()['total'] == 2
+        )
+
+
+class TestSyncEndpoint:
+    """Test incremental sync and soft deletes."""
+
+    def test_sync(
+        self, client, auth_headers, multiple_tasks, test_category,
+        assert_max_queries,
+    ):
+        """
+        Test a first sync, then one that only returns the changes since its
+        token.
+        """
+        with assert_max_queries(2):
+            response = client.get('/sync', headers=auth_headers)
+        assert response.status_code == 200
+        first = response.get_json()
+        assert len(first['tasks']) == 3
+        assert [c['name'] for c in first['categories']] == ['Test Category']
+
+        client.put(
+            f'/tasks/{multiple_tasks[0]}', json={'status': 'Completed'},
+            headers=auth_headers,
+        )
+        client.delete(f'/tasks/{multiple_tasks[1]}', headers=auth_headers)
+        changes = client.get(
+            f"/sync?since={first['next']}", headers=auth_headers
+        ).get_json()
+
+        # The overlap window may resend rows from the first sync, never skip
+        # one
+        assert {t['id']: t['status'] for t in changes['tasks']}[
+            multiple_tasks[0]
+        ] == 'Completed'
+        assert changes['deleted_tasks'] == [multiple_tasks[1]]
+
+    def test_invalid_token(self, client, auth_headers):
+        """Test that a malformed token is rejected."""
+        response = client.get('/sync?since=garbage', headers=auth_headers)
+        assert response.status_code == 400
+        assert response.get_json()['error'] == 'invalid sync token'
+
+    def test_soft_deleted_rows_are_hidden(
+        self, client, auth_headers, multiple_tasks, test_category
+    ):
+        """
+        Test that deleted tasks and categories are gone from every listing.
+        """
+        client.delete(f'/tasks/{multiple_tasks[0]}', headers=auth_headers)
+        path = f'/tasks/{multiple_tasks[0]}'
+        assert client.get(path, headers=auth_headers).status_code == 404
+        assert client.delete(path, headers=auth_headers).status_code == 404
+
+        client.delete(f'/categories/{test_category.id}', headers=auth_headers)
+        assert client.get('/categories', headers=auth_headers).get_json() == []
+        tasks = client.get('/tasks', headers=auth_headers).get_json()
+        assert [t['id'] for t in tasks] == multiple_tasks[1:]
+        assert all(t['category_id'] is None for t in tasks)
+        assert (
+            client.get('/stats', headers=auth_headers).get_json()['total'] == 2
+        )
+
+    def test_requires_token(self, client):
+        """Test that /sync requires authentication."""
+        assert client.get('/sync').status_code == 401
+
+
+class TestEventsEndpoint:
+    """Test the Server-Sent Events stream of change notifications."""
+
+    def test_stream_receives_changes(
+        self, app, client, auth_headers, test_category
+    ):
+        """
+        Test that a write made through the API is pushed to an open stream.
+        """
+        app.config['EVENTS_HEARTBEAT_SECONDS'] = 0.01
+        response = client.get('/events', headers=auth_headers)
+        assert response.status_code == 200
+        assert response.mimetype == 'text/event-stream'
+        assert response.headers['Cache-Control'] == 'no-cache'
+
+        chunks = iter(response.response)
+        assert next(chunks).startswith(b'retry: 3000\nevent: ready')
+
+        client.post(
+            '/tasks',
+            json={
+                'title': 'Pushed', 'priority': 'High',
+                'category_id': test_category.id,
+            },
+            headers=auth_headers,
+        )
+        chunk = next(chunks)
+        while chunk == b': heartbeat\n\n':
+            chunk = next(chunks)
+        assert chunk == b'event: changed\ndata: {"collections":["tasks"]}\n\n'
+
+        response.close()
+        assert app.extensions['events'].stream_count() == 0
+
+    def test_requires_token(self, client):
+        """Test that /events requires authentication."""
+        assert client.get('/events').status_code == 401
+
+    def test_events_can_be_disabled(self, app, client, auth_headers):
+        """
+        Test that /events answers 404 when streams are off (gunicorn sync
+        workers).
+        """
+        app.config['EVENTS_ENABLED'] = False
+        response = client.get('/events', headers=auth_headers)
+        assert response.status_code == 404
+        assert app.extensions['events'].stream_count() == 0
+
+
+class TestTaskExport:
+    """Test the streaming export of a user's tasks."""
+
+    def test_export_ndjson(self, app, client, auth_headers, multiple_tasks):
+        """
+        Test that every task is exported as one JSON line, streamed in batches.
+        """
+        app.config['EXPORT_BATCH_SIZE'] = 2
+        response = client.get(
+            '/tasks/export?format=ndjson', headers=auth_headers
+        )
+
+        assert response.status_code == 200
+        assert response.is_streamed
+        assert response.mimetype == 'application/x-ndjson'
+        lines = [
+            json.loads(line) for line in response.data.decode().splitlines()
+        ]
+        assert [t['id'] for t in lines] == sorted(multiple_tasks)
+        assert lines[0]['due_date'] == '2025-12-01T00:00:00'
+
+    def test_export_csv(self, client, auth_headers, multiple_tasks):
+        """Test the CSV export."""
+        import csv
+        import io
+
+        response = client.get('/tasks/export?format=csv', headers=auth_headers)
+        assert response.status_code == 200
+        rows = list(csv.DictReader(io.StringIO(response.data.decode())))
+        assert len(rows) == 3
+        assert rows[0]['priority'] == 'High'
+        assert rows[2]['due_date'] == '2025-12-15T00:00:00'
+
+    def test_export_rejects_unknown_format(self, client, auth_headers):
+        """Test that only ndjson and csv are supported."""
+        response = client.get('/tasks/export?format=xml', headers=auth_headers)
+        assert response.status_code == 400
+
+
+class TestTaskImport:
+    """Test the streaming bulk import of tasks."""
+
+    def test_import_ndjson(self, app, client, auth_headers, test_category):
+        """
+        Test that valid lines are inserted in chunks and bad ones reported by
+        line.
+        """
+        app.config['IMPORT_CHUNK_SIZE'] = 2
+        body = '\n'.join(
+            [
+                json.dumps(
+                    {
+                        'title': 'A', 'category': test_category.name,
+                        'priority': 'High', 'hours': 2,
+                    }
+                ),
+                json.dumps(
+                    {
+                        'title': 'B', 'category_id': test_category.id,
+                        'priority': 3,
+                    }
+                ),
+                '{not json',
+                '',
+                json.dumps(
+                    {'title': 'C', 'category': 'Missing', 'priority': 1}
+                ),
+                json.dumps(
+                    {
+                        'title': 'D', 'category': test_category.name,
+                        'due_date': '2025-12-31',
+                    }
+                ),
+            ]
+        )
+        response = client.post(
+            '/tasks/import', data=body, content_type='application/x-ndjson',
+            headers=auth_headers,
+        )
+
+        assert response.status_code == 201
+        summary = json.loads(response.data)
+        assert summary['inserted'] == 2
+        assert summary['rejected'] == 3
+        assert summary['errors'] == [
+            {'line': 3, 'error': 'invalid JSON'},
+            {'line': 5, 'error': 'unknown category: Missing'},
+            {'line': 6, 'error': 'invalid priority'},
+        ]
+        assert 'rows_per_second' in summary
+
+        tasks = json.loads(client.get('/tasks', headers=auth_headers).data)
+        assert [t['title'] for t in tasks] == ['A', 'B']
+
+    def test_import_csv(self, client, auth_headers, test_category):
+        """Test a CSV import with string values."""
+        body = (
+            'title,category,priority,hours,due_date,status\n'
+            f'First,{test_category.name},Low,2,2025-12-01,Completed\n'
+            f'Second,{test_category.name},2,,,\n'
+            f'Third,{test_category.name},1,-3,,\n'
+            f'Fourth,{test_category.name},1,1.5,,\n'
+            f'Fifth,{test_category.name},1,nan,,\n'
+        )
+        response = client.post(
+            '/tasks/import', data=body, content_type='text/csv',
+            headers=auth_headers,
+        )
+
+        assert response.status_code == 201
+        summary = json.loads(response.data)
+        assert summary['inserted'] == 2
+        assert summary['errors'] == [
+            {'line': 4, 'error': 'hours must be non-negative'},
+            {'line': 5, 'error': 'hours must be a whole number'},
+            {'line': 6, 'error': 'hours must be a whole number'},
+        ]
+
+        tasks = {
+            t['title']: t
+            for t in json.loads(
+                client.get('/tasks', headers=auth_headers).data
+            )
+        }
+        assert tasks['First']['hours'] == 2
+        assert tasks['First']['status'] == 'Completed'
+        assert tasks['First']['due_date'] == '2025-12-01T00:00:00'
+        assert tasks['Second']['status'] == 'Pending'
+
+    def test_import_rejects_malformed_values(
+        self, client, auth_headers, test_category
+    ):
+        """
+        Test that values of the wrong type reject their line instead of the
+        import.
+        """
+        name = test_category.name
+        body = '\n'.join(
+            [
+                json.dumps(
+                    {
+                        'title': 'A', 'category': name, 'priority': 1,
+                        'hours': [1],
+                    }
+                ),
+                json.dumps(
+                    {'title': 'B', 'category': name, 'priority': '\u00b2'}
+                ),
+                json.dumps(
+                    {
+                        'title': 'C', 'category': name, 'priority': 1,
+                        'hours': 2.5,
+                    }
+                ),
+                json.dumps(
+                    {
+                        'title': 'D', 'category': name, 'priority': 1,
+                        'hours': float('inf'),
+                    }
+                ),
+                json.dumps(
+                    {
+                        'title': 'E', 'category': name, 'priority': 1,
+                        'hours': 4.0,
+                    }
+                ),
+            ]
+        )
+        response = client.post(
+            '/tasks/import', data=body, content_type='application/x-ndjson',
+            headers=auth_headers,
+        )
+
+        assert response.status_code == 201
+        summary = response.get_json()
+        assert summary['inserted'] == 1
+        assert [e['line'] for e in summary['errors']] == [1, 2, 3, 4]
+
+        tasks = client.get('/tasks', headers=auth_headers).get_json()
+        assert [(t['title'], t['hours']) for t in tasks] == [('E', 4)]
+
+    def test_import_reports_invalid_utf8(
+        self, app, client, auth_headers, test_category
+    ):
+        """Test that a line that is not UTF-8 is rejected on its own."""
+        app.config['IMPORT_CHUNK_SIZE'] = 1
+        name = test_category.name.encode()
+        body = b'\n'.join(
+            [
+                b'{"title": "A", "category": "' + name + b'", "priority": 1}',
+                b'{"title": "\xff\xfe", "category": "'
+                + name
+                + b'", "priority": 1}',
+                b'{"title": "C\xc3\xa9", "category": "'
+                + name
+                + b'", "priority": 1}',
+            ]
+        )
+        response = client.post(
+            '/tasks/import', data=body, content_type='application/x-ndjson',
+            headers=auth_headers,
+        )
+        assert response.status_code == 201
+        summary = response.get_json()
+        assert (summary['inserted'], summary['errors']) == (
+            2, [{'line': 2, 'error': 'invalid UTF-8'}]
+        )
+
+        body = (
+            b'title,category,priority\nB\xe9,'
+            + name
+            + b',1\nD,'
+            + name
+            + b',1\n'
+        )
+        response = client.post(
+            '/tasks/import', data=body, content_type='text/csv',
+            headers=auth_headers,
+        )
+        summary = response.get_json()
+        assert (summary['inserted'], summary['errors']) == (
+            1, [{'line': 2, 'error': 'invalid UTF-8'}]
+        )
+
+        titles = {
+            t['title']
+            for t in client.get('/tasks', headers=auth_headers).get_json()
+        }
+        assert titles == {'A', 'C\u00e9', 'D'}
+
+
+class TestExpandedListing:
+    """Test GET /tasks?expand=category."""
+
+    def test_categories_inline(
+        self, client, auth_headers, multiple_tasks, test_category
+    ):
+        """Test that each task carries its category's name and description."""
+        response = client.get('/tasks?expand=category', headers=auth_headers)
+
+        assert response.status_code == 200
+        tasks = response.get_json()
+        assert len(tasks) == 3
+        assert {t['title'] for t in tasks} == {
+            'High Priority Task', 'Medium Priority Task', 'Low Priority Task'
+        }
+        assert tasks[0]['category'] == {
+            'id': test_category.id, 'name': 'Test Category',
+            'description': 'Test description',
+        }
+        assert tasks[0]['category_id'] == test_category.id
+
+        page = client.get(
+            '/tasks?expand=category&limit=2', headers=auth_headers
+        ).get_json()
+        assert [t['category']['name'] for t in page['tasks']] == [
+            'Test Category'
+        ] * 2
+        assert page['next_cursor']
+
+    def test_foreign_category_is_not_joined(
+        self, app, client, auth_headers, test_task, test_category
+    ):
+        """
+        Test that a task pointing at another user's category expands to no
+        category.
+        """
+        from sqlalchemy import update
+        from backend.database import db
+        from backend.models.task import Task
+
+        client.post(
+            '/register', json={'username': 'other', 'password': 'password123'}
+        )
+        token = client.post(
+            '/login', json={'username': 'other', 'password': 'password123'}
+        ).get_json()['token']
+        other = {'Authorization': f'Bearer {token}'}
+        secret = client.post(
+            '/categories',
+            json={'name': 'Secret', 'description': 'private'},
+            headers=other,
+        )
+        secret_id = secret.get_json()['id']
+        # A row written before category ownership was checked
+        with app.app_context():
+            db.session.execute(
+                update(Task)
+                .where(Task.id == test_task.id)
+                .values(category_id=secret_id)
+            )
+            db.session.commit()
+
+        tasks = client.get(
+            '/tasks?expand=category', headers=auth_headers
+        ).get_json()
+        assert [t['category'] for t in tasks] == [None]
+        page = client.get(
+            '/tasks?expand=category&limit=5', headers=auth_headers
+        ).get_json()
+        assert [t['category'] for t in page['tasks']] == [None]
+
+    def test_foreign_category_is_rejected(
+        self, client, auth_headers, test_task, test_category
+    ):
+        """
+        Test that tasks cannot be created in or moved to another user's
+        category.
+        """
+        client.post(
+            '/register', json={'username': 'other', 'password': 'password123'}
+        )
+        token = client.post(
+            '/login', json={'username': 'other', 'password': 'password123'}
+        ).get_json()['token']
+        other = {'Authorization': f'Bearer {token}'}
+        secret_id = client.post(
+            '/categories', json={'name': 'Secret'}, headers=other
+        ).get_json()['id']
+
+        task = {
+            'title': 'Sneaky', 'priority': 'High', 'hours': 1,
+            'category_id': secret_id,
+        }
+        response = client.post('/tasks', json=task, headers=auth_headers)
+        assert response.status_code == 400
+        assert response.get_json()['error'] == 'unknown category_id'
+
+        response = client.put(
+            f'/tasks/{test_task.id}', json={'category_id': secret_id},
+            headers=auth_headers,
+        )
+        assert response.status_code == 400
+
+        response = client.post(
+            '/tasks/batch', json={'tasks': [task]}, headers=auth_headers
+        )
+        assert response.get_json()['errors'] == [
+            {'index': 0, 'error': 'unknown category_id'}
+        ]
+
+        response = client.patch('/tasks/batch', json={'tasks': [
+            {'id': test_task.id, 'category_id': secret_id},
+            {'id': test_task.id + 1000, 'category_id': test_category.id},
+        ]}, headers=auth_headers)
+        assert response.get_json()['updated'] == []
+        assert response.get_json()['errors'][0] == {
+            'index': 0, 'error': 'unknown category_id'
+        }
+
+        task = client.get(
+            f'/tasks/{test_task.id}', headers=auth_headers
+        ).get_json()
+        assert task['category_id'] == test_category.id
+
+    def test_tasks_without_category(
+        self, client, auth_headers, multiple_tasks, test_category
+    ):
+        """
+        Test that tasks whose category was deleted are still listed, with no
+        category.
+        """
+        client.delete(f'/categories/{test_category.id}', headers=auth_headers)
+
+        tasks = client.get(
+            '/tasks?expand=category', headers=auth_headers
+        ).get_json()
+        assert len(tasks) == 3
+        assert {t['category'] for t in tasks} == {None}
+
+    def test_query_budget_is_constant(
+        self, app, client, auth_headers, category_service, task_service,
+        test_user, assert_max_queries,
+    ):
+        """
+        Test that the expanded listing is one statement for 1 task and for 60
+        tasks in 6 categories.
+        """
+        with app.app_context():
+            categories = [
+                category_service.create_category(test_user['id'], f'C{i}').id
+                for i in range(6)
+            ]
+            task_service.create_task(
+                test_user['id'], 'First', None, 1, 1, categories[0]
+            )
+        with assert_max_queries(1):
+            response = client.get(
+                '/tasks?expand=category', headers=auth_headers
+            )
+            assert len(response.get_json()) == 1
+
+        with app.app_context():
+            task_service.create_tasks(
+                test_user['id'],
+                [
+                    {
+                        'title': f'Task {i}', 'description': None,
+                        'priority': 2, 'hours': 1,
+                        'category_id': categories[i % 6],
+                    }
+                    for i in range(59)
+                ],
+            )
+        with assert_max_queries(1):
+            tasks = client.get(
+                '/tasks?expand=category&sort=id', headers=auth_headers
+            ).get_json()
+        assert len(tasks) == 60
+        assert [t['category']['name'] for t in tasks[:3]] == ['C0', 'C0', 'C1']
+        with assert_max_queries(1):
+            client.get('/tasks?expand=category&limit=50', headers=auth_headers)
+
+    def test_category_rename_refreshes_listing(
+        self, client, auth_headers, multiple_tasks, test_category
+    ):
+        """
+        Test that renaming a category invalidates the cached expanded listing
+        and its ETag.
+        """
+        first = client.get('/tasks?expand=category', headers=auth_headers)
+        etag = first.headers['ETag']
+        client.put(
+            f'/categories/{test_category.id}', json={'name': 'Renamed'},
+            headers=auth_headers,
+        )
+
+        response = client.get(
+            '/tasks?expand=category',
+            headers={**auth_headers, 'If-None-Match': etag},
+        )
+        assert response.status_code == 200
+        assert response.get_json()[0]['category']['name'] == 'Renamed'
+
+    def test_invalid_expand(self, client, auth_headers):
+        """Test that an unknown expansion is rejected."""
+        response = client.get('/tasks?expand=owner', headers=auth_headers)
+        assert response.status_code == 400
+        assert response.get_json()['error'] == 'invalid expand'
+
+
+class TestQueryProfiling:
+    """
+    Test the per-request query headers and the query budgets of the routes.
+    """
+
+    def test_query_headers(self, client, auth_headers, multiple_tasks):
+        """
+        Test that responses report their statement count and database time.
+        """
+        response = client.get('/tasks?sort=priority', headers=auth_headers)
+
+        assert response.headers['X-Query-Count'] == '1'
+        assert response.headers['Server-Timing'].startswith('db;dur=')
+        assert 'desc="1 queries"' in response.headers['Server-Timing']
+
+    def test_repeated_statement_is_logged(
+        self, app, client, auth_headers, caplog
+    ):
+        """Test that a request repeating a statement logs a possible N+1."""
+        from sqlalchemy import text
+        from backend.database import db
+
+        @app.route('/n-plus-one')
+        def n_plus_one():
+            for task_id in range(app.config['QUERY_REPEAT_THRESHOLD']):
+                db.session.execute(
+                    text(f'SELECT title FROM task WHERE id = {task_id}')
+                )
+            return ''
+
+        with caplog.at_level('WARNING', logger='backend.query_profiler'):
+            client.get('/n-plus-one')
+
+        assert 'possible N+1' in caplog.text
+        assert 'SELECT title FROM task WHERE id = ?' in caplog.text
+
+    def test_listing_query_budget(
+        self, client, auth_headers, multiple_tasks, assert_max_queries
+    ):
+        """
+        Test that task and category listings run one statement whatever the row
+        count.
+        """
+        with assert_max_queries(1):
+            client.get('/tasks?sort=hours', headers=auth_headers)
+        with assert_max_queries(1):
+            client.get('/tasks?limit=2', headers=auth_headers)
+        with assert_max_queries(1):
+            client.get('/categories', headers=auth_headers)
+
+    def test_write_query_budget(
+        self, client, auth_headers, test_category, multiple_tasks,
+        assert_max_queries,
+    ):
+        """Test the statement budgets of the single-task write routes."""
+        # The category lookup, the INSERT and the reload of the committed row
+        with assert_max_queries(3):
+            client.post('/tasks', json={
+                'title': 'Budget', 'priority': 'low', 'estimated_hours': 1,
+                'category_id': test_category.id,
+            }, headers=auth_headers)
+        with assert_max_queries(3):
+            client.put(
+                f'/tasks/{multiple_tasks[0]}', json={'title': 'Changed'},
+                headers=auth_headers,
+            )
+        with assert_max_queries(4):
+            client.delete(
+                f'/categories/{test_category.id}', headers=auth_headers
+            )
+
 
 class TestHealthEndpoint:
     """Test health check endpoint."""
@@ -323,4 +1464,4 @@ class TestCompleteWorkflow:
         # 8. Verify completion
         final_response = client.get(f'/tasks/{task_id}', headers=headers)
         final_task = json.loads(final_response.data)
-        assert final_task['status'] == 'Completed'
\ No newline at end of file
+        assert final_task['status'] == 'Completed'
@@ -0,0 +1,388 @@
+"""
+Integration tests for the ASGI serving mode (backend.async_app).
+Requests are sent straight to the ASGI callable; the app runs on a SQLite
+file so the async and the WSGI halves share one database.
+"""
+import asyncio
+import json
+
+import pytest
+
+from backend.async_app import AsyncAPI, create_asgi_app
+from backend.config import TestingConfig
+from backend.database import db
+
+
+async def asgi_request(app, method, path, body=None, headers=None, query=""):
+    """
+    Send one http request to the ASGI app; returns (status, headers, body).
+    """
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": query.encode(),
+        "headers": [
+            (k.lower().encode(), v.encode())
+            for k, v in (headers or {}).items()
+        ],
+        "server": ("testserver", 80),
+        "client": ("127.0.0.1", 1234),
+    }
+    payload = json.dumps(body).encode() if body is not None else b""
+    messages, received = [], False
+
+    async def receive():
+        nonlocal received
+        if not received:
+            received = True
+            return {
+                "type": "http.request", "body": payload, "more_body": False
+            }
+        await asyncio.Event().wait()
+
+    async def send(message):
+        messages.append(message)
+
+    await app(scope, receive, send)
+    start = messages[0]
+    content = b"".join(m.get("body", b"") for m in messages[1:])
+    return (
+        start["status"],
+        {k.decode(): v.decode() for k, v in start["headers"]},
+        content,
+    )
+
+
+@pytest.fixture
+def asgi_app(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        TestingConfig, "SQLALCHEMY_DATABASE_URI",
+        f"sqlite:///{tmp_path / 'asgi.db'}",
+    )
+    app = create_asgi_app("testing")
+    yield app
+    asyncio.run(app.engine.dispose())
+    with app.flask_app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def call(asgi_app):
+    """
+    Synchronous helper: call(method, path, body=None, headers=None, query='').
+    """
+    def call(*args, **kwargs):
+        status, headers, content = asyncio.run(
+            asgi_request(asgi_app, *args, **kwargs)
+        )
+        return status, headers, json.loads(content) if content else None
+    return call
+
+
+@pytest.fixture
+def token_headers(call):
+    call("POST", "/register", {"username": "async", "password": "secret123"})
+    _, _, body = call(
+        "POST", "/login", {"username": "async", "password": "secret123"}
+    )
+    return {"Authorization": f"Bearer {body['token']}"}
+
+
+@pytest.fixture
+def category_id(call, token_headers):
+    _, _, body = call("POST", "/categories", {"name": "Async"}, token_headers)
+    return body["id"]
+
+
+class TestAsgiApp:
+    """Test the native async routes and the WSGI fallback."""
+
+    def test_memory_database_falls_back_to_wsgi(self):
+        """
+        Test that an in-memory database is served entirely through the WSGI
+        adapter.
+        """
+        app = create_asgi_app("testing")
+        assert not isinstance(app, AsyncAPI)
+
+    def test_register_and_login(self, call):
+        """Test registration and login on the async auth service."""
+        user = {"username": "a1", "password": "secret123"}
+        assert call("POST", "/register", user)[0] == 201
+        assert call("POST", "/register", user)[0] == 400
+
+        status, _, body = call("POST", "/login", user)
+        assert status == 200 and body["token"]
+        wrong = {**user, "password": "wrong-pass"}
+        assert call("POST", "/login", wrong)[0] == 401
+
+    def test_missing_and_invalid_token(self, call):
+        """Test that native routes reject requests without a valid token."""
+        assert call("GET", "/tasks")[2] == {"error": "Token is missing"}
+        assert (
+            call("GET", "/tasks", headers={"Authorization": "Bearer nope"})[0]
+            == 401
+        )
+
+    def test_task_crud(self, call, token_headers, category_id):
+        """Test creating, listing, reading, updating and deleting a task."""
+        status, _, body = call(
+            "POST",
+            "/tasks",
+            {
+                "title": "Async task", "priority": "High",
+                "estimated_hours": 2, "category_id": category_id,
+            },
+            token_headers,
+        )
+        assert status == 201
+        task_id = body["id"]
+
+        status, _, tasks = call("GET", "/tasks", headers=token_headers)
+        assert status == 200
+        assert [t["title"] for t in tasks] == ["Async task"]
+        assert tasks[0]["priority"] == "High"
+
+        status, _, body = call(
+            "PUT", f"/tasks/{task_id}", {"status": "Completed"}, token_headers
+        )
+        assert status == 200
+        _, _, task = call("GET", f"/tasks/{task_id}", headers=token_headers)
+        assert task["status"] == "Completed"
+
+        path = f"/tasks/{task_id}"
+        assert call("DELETE", path, headers=token_headers)[0] == 200
+        assert call("GET", path, headers=token_headers)[0] == 404
+
+    def test_validation_errors(self, call, token_headers, category_id):
+        """
+        Test that invalid input gets the same 400 responses as the WSGI routes.
+        """
+        assert call("POST", "/tasks", {"title": "x"}, token_headers)[2] == {
+            "error": "category is required"
+        }
+        untitled = {"title": "", "priority": 1, "category_id": category_id}
+        assert call("POST", "/tasks", untitled, token_headers)[0] == 400
+        status, _, _ = call(
+            "GET", "/tasks", headers=token_headers, query="sort=nope"
+        )
+        assert status == 400
+        assert call(
+            "GET", "/tasks", headers=token_headers, query="category_id=abc"
+        )[2] == {"error": "invalid category_id"}
+        _, _, body = call(
+            "POST",
+            "/tasks",
+            {"title": "x", "priority": 1, "category_id": category_id},
+            token_headers,
+        )
+        path = f"/tasks/{body['id']}"
+        forged = {"task_id": 1, "user_id": 2}
+        assert call("PUT", path, forged, token_headers)[0] == 200
+        assert call("PUT", path, {"status": "Done"}, token_headers)[2] == {
+            "error": "invalid status"
+        }
+        _, _, body = call(
+            "POST", "/categories", {"name": "Async"}, token_headers
+        )
+        assert body == {"error": "Category already exists"}
+
+    def test_oversized_body(self, asgi_app, call, token_headers):
+        """Test that a body over the limit is refused before it is parsed."""
+        asgi_app.max_body = 64
+        status, _, body = call(
+            "POST", "/categories", {"name": "x" * 100}, token_headers
+        )
+        assert status == 413 and body == {"error": "Request body too large"}
+        assert (
+            call("POST", "/categories", {"name": "Small"}, token_headers)[0]
+            == 201
+        )
+
+    def test_services_have_no_sync_queries(self, asgi_app):
+        """
+        Test that the async services expose no sync database method to the
+        event loop.
+        """
+        assert not hasattr(asgi_app.task_service, "create_tasks")
+        assert not hasattr(asgi_app.category_service, "delete_category")
+
+    def test_pagination(self, call, token_headers, category_id):
+        """Test keyset pagination through the async task service."""
+        for i in range(5):
+            call(
+                "POST",
+                "/tasks",
+                {"title": f"T{i}", "priority": 2, "category_id": category_id},
+                token_headers,
+            )
+
+        _, _, page = call(
+            "GET", "/tasks", headers=token_headers, query="limit=3&sort=id"
+        )
+        assert len(page["tasks"]) == 3
+        _, _, rest = call(
+            "GET",
+            "/tasks",
+            headers=token_headers,
+            query=f"limit=3&sort=id&cursor={page['next_cursor']}",
+        )
+        assert [t["title"] for t in rest["tasks"]] == ["T3", "T4"]
+        assert rest["next_cursor"] is None
+
+    def test_expand_category(self, call, token_headers, category_id):
+        """Test that the async listing inlines categories like the WSGI one."""
+        call(
+            "POST",
+            "/tasks",
+            {"title": "Joined", "priority": 1, "category_id": category_id},
+            token_headers,
+        )
+
+        _, _, tasks = call(
+            "GET", "/tasks", headers=token_headers, query="expand=category"
+        )
+        assert tasks[0]["category"] == {
+            "id": category_id, "name": "Async", "description": None
+        }
+        _, _, page = call(
+            "GET", "/tasks", headers=token_headers,
+            query="expand=category&limit=1",
+        )
+        assert page["tasks"][0]["category"]["name"] == "Async"
+        status, _, _ = call(
+            "GET", "/tasks", headers=token_headers, query="expand=owner"
+        )
+        assert status == 400
+
+    def test_conditional_get(self, call, token_headers, category_id):
+        """Test that listings carry an ETag that changes after a write."""
+        _, headers, _ = call("GET", "/tasks", headers=token_headers)
+        etag = headers["etag"]
+        cached = {**token_headers, "If-None-Match": etag}
+        assert call("GET", "/tasks", headers=cached)[0] == 304
+
+        call(
+            "POST",
+            "/tasks",
+            {"title": "New", "priority": 1, "category_id": category_id},
+            token_headers,
+        )
+        status, headers, _ = call(
+            "GET", "/tasks", headers={**token_headers, "If-None-Match": etag}
+        )
+        assert status == 200
+        assert headers["etag"] != etag
+
+    def test_fallback_routes_share_state(
+        self, call, token_headers, category_id
+    ):
+        """
+        Test that WSGI routes see async writes and revoke tokens for both
+        halves.
+        """
+        call(
+            "POST",
+            "/tasks",
+            {"title": "Shared", "priority": 1, "category_id": category_id},
+            token_headers,
+        )
+
+        status, headers, _ = call(
+            "GET", "/tasks/export", headers=token_headers
+        )
+        assert status == 200
+        assert headers["content-type"] == "application/x-ndjson"
+
+        assert call("POST", "/logout", headers=token_headers)[0] == 200
+        assert call("GET", "/tasks", headers=token_headers)[0] == 401
+
+    def test_event_stream(self, asgi_app, token_headers, category_id):
+        """
+        Test that the native /events stream pushes writes and ends when the
+        client disconnects.
+        """
+        async def stream():
+            scope = {
+                "type": "http",
+                "asgi": {"version": "3.0"},
+                "http_version": "1.1",
+                "method": "GET",
+                "scheme": "http",
+                "path": "/events",
+                "raw_path": b"/events",
+                "root_path": "",
+                "query_string": b"",
+                "headers": [
+                    (k.lower().encode(), v.encode())
+                    for k, v in token_headers.items()
+                ],
+                "server": ("testserver", 80),
+                "client": ("127.0.0.1", 1234),
+            }
+            disconnect = asyncio.Event()
+            requests = iter(
+                [{"type": "http.request", "body": b"", "more_body": False}]
+            )
+            messages, changed = [], asyncio.Event()
+
+            async def receive():
+                message = next(requests, None)
+                if message is None:
+                    await disconnect.wait()
+                    message = {"type": "http.disconnect"}
+                return message
+
+            async def send(message):
+                messages.append(message)
+                if b"event: changed" in message.get("body", b""):
+                    changed.set()
+
+            served = asyncio.ensure_future(asgi_app(scope, receive, send))
+            while len(messages) < 2:
+                await asyncio.sleep(0.01)
+            await asgi_request(asgi_app, "POST", "/tasks", {
+                "title": "Pushed", "priority": 1, "category_id": category_id,
+            }, token_headers)
+            await asyncio.wait_for(changed.wait(), 2)
+            disconnect.set()
+            await asyncio.wait_for(served, 2)
+            return messages
+
+        messages = asyncio.run(stream())
+        headers = dict(messages[0]["headers"])
+        assert headers[b"content-type"].startswith(b"text/event-stream")
+        assert messages[1]["body"].startswith(b"retry: 3000")
+        assert (
+            messages[-1]["body"]
+            == b'event: changed\ndata: {"collections":["tasks"]}\n\n'
+        )
+        assert asgi_app.events.stream_count() == 0
+
+    def test_lifespan(self, asgi_app):
+        """Test the lifespan protocol used by uvicorn."""
+        async def lifespan():
+            messages = iter(
+                [{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}]
+            )
+            sent = []
+
+            async def receive():
+                return next(messages)
+
+            async def send(message):
+                sent.append(message["type"])
+
+            await asgi_app({"type": "lifespan"}, receive, send)
+            return sent
+
+        assert asyncio.run(lifespan()) == [
+            "lifespan.startup.complete", "lifespan.shutdown.complete"
+        ]
@@ -0,0 +1,160 @@
+"""
+Integration tests for the Prometheus instrumentation served at /metrics.
+"""
+import re
+
+import pytest
+
+from backend.app import create_app
+
+
+def sample(body, name, **labels):
+    """
+    Return the value of the sample name{labels} in an exposition body, or None.
+    """
+    for line in body.splitlines():
+        if not line.startswith(name + "{") and not line.startswith(name + " "):
+            continue
+        found = dict(re.findall(r'(\w+)="([^"]*)"', line.split("}")[0]))
+        if all(found.get(key) == value for key, value in labels.items()):
+            return float(line.rsplit(" ", 1)[1])
+    return None
+
+
+class TestMetricsEndpoint:
+    """Tests for GET /metrics"""
+
+    def test_request_metrics_per_endpoint(self, client, auth_headers):
+        """Request counts and latency histograms are labelled by endpoint."""
+        client.get("/tasks", headers=auth_headers)
+        body = client.get("/metrics").get_data(as_text=True)
+
+        assert sample(
+            body,
+            "flask_http_request_duration_seconds_count",
+            endpoint="api.get_tasks",
+            status="200",
+        ) == 1
+        assert sample(
+            body, "flask_http_request_total", method="GET", status="200"
+        ) >= 1
+
+    def test_in_flight_gauge(self, client, auth_headers):
+        """The in-flight gauge is back to zero once the request completed."""
+        client.get("/tasks", headers=auth_headers)
+        body = client.get("/metrics").get_data(as_text=True)
+
+        assert sample(
+            body, "todo_http_requests_in_flight", endpoint="api.get_tasks"
+        ) == 0
+
+    def test_db_query_metrics(self, client, auth_headers):
+        """SQL statements are counted and timed per operation."""
+        client.post("/tasks", json={"title": "Counted"}, headers=auth_headers)
+        body = client.get("/metrics").get_data(as_text=True)
+
+        assert sample(body, "todo_db_queries_total", operation="INSERT") >= 1
+        assert sample(body, "todo_db_queries_total", operation="SELECT") >= 1
+        assert sample(
+            body, "todo_db_query_duration_seconds_count", operation="INSERT"
+        ) >= 1
+
+    def test_failed_statement_leaves_no_timing_state(self, app):
+        """
+        A statement that raises is not left on the connection for the next one
+        to pop.
+        """
+        from sqlalchemy import exc, text
+        from backend.database import db
+
+        with app.app_context():
+            with db.engine.connect() as connection:
+                for _ in range(3):
+                    with pytest.raises(exc.OperationalError):
+                        connection.execute(text("SELECT * FROM no_such_table"))
+                    connection.rollback()
+                connection.execute(text("SELECT 1"))
+                assert not connection.info.get("metrics_query_start")
+
+        body = app.test_client().get("/metrics").get_data(as_text=True)
+        assert sample(body, "todo_db_queries_total", operation="SELECT") >= 1
+
+    def test_cache_metrics(self, client, auth_headers):
+        """Response cache lookups are counted as hits and misses."""
+        client.get("/tasks", headers=auth_headers)
+        client.get("/tasks", headers=auth_headers)
+        body = client.get("/metrics").get_data(as_text=True)
+
+        assert sample(
+            body, "todo_cache_requests_total", collection="tasks",
+            result="miss",
+        ) == 1
+        assert sample(
+            body, "todo_cache_requests_total", collection="tasks", result="hit"
+        ) == 1
+
+    def test_jwt_verify_metrics(self, client, auth_headers):
+        """Token verification is timed by outcome."""
+        client.get("/tasks", headers=auth_headers)
+        client.get("/tasks", headers=auth_headers)
+        client.get("/tasks", headers={"Authorization": "Bearer nope"})
+        body = client.get("/metrics").get_data(as_text=True)
+
+        assert sample(
+            body, "todo_jwt_verify_duration_seconds_count", result="verified"
+        ) == 1
+        assert sample(
+            body, "todo_jwt_verify_duration_seconds_count", result="cached"
+        ) == 1
+        assert sample(
+            body, "todo_jwt_verify_duration_seconds_count", result="invalid"
+        ) == 1
+
+    def test_apps_do_not_share_metrics(self, client, auth_headers):
+        """Each app has its own registry."""
+        client.get("/tasks", headers=auth_headers)
+        other = create_app("testing")
+        body = other.test_client().get("/metrics").get_data(as_text=True)
+
+        assert (
+            sample(body, "todo_cache_requests_total", collection="tasks")
+            is None
+        )
+
+    def test_metrics_can_be_disabled(self, monkeypatch):
+        """METRICS_ENABLED=false leaves /metrics unregistered."""
+        from backend.config import TestingConfig
+        monkeypatch.setattr(TestingConfig, "METRICS_ENABLED", False)
+        app = create_app("testing")
+
+        assert "metrics" not in app.extensions
+        assert app.test_client().get("/metrics").status_code == 404
+
+    def test_pool_metrics(self, tmp_path, monkeypatch):
+        """
+        A pooled database exports checkout waits, connections in use and
+        saturation.
+        """
+        from backend.config import TestingConfig
+        from backend.database import db
+        monkeypatch.setattr(
+            TestingConfig, "SQLALCHEMY_DATABASE_URI",
+            f"sqlite:///{tmp_path / 'pool.db'}",
+        )
+        monkeypatch.setattr(TestingConfig, "DB_POOL_SIZE", 2)
+        monkeypatch.setattr(TestingConfig, "DB_MAX_OVERFLOW", 2)
+        app = create_app("testing")
+        client = app.test_client()
+
+        client.post(
+            "/register", json={"username": "pooled", "password": "password123"}
+        )
+        body = client.get("/metrics").get_data(as_text=True)
+        with app.app_context():
+            db.engine.dispose()
+
+        assert sample(body, "todo_db_pool_checkout_wait_seconds_count") >= 1
+        assert sample(body, "todo_db_pool_checkout_timeouts_total") == 0
+        assert sample(body, "todo_db_pool_connections_in_use") == 0
+        assert sample(body, "todo_db_pool_capacity") == 4
+        assert sample(body, "todo_db_pool_saturation") == 0
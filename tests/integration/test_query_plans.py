@@ -0,0 +1,183 @@
+"""
+Query plan regression tests.
+Captures the SQL each service method runs and checks with EXPLAIN QUERY PLAN
+that none of it falls back to a full scan of the task, category or user tables.
+"""
+import re
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from backend.database import db
+
+
+FULL_SCAN = re.compile(r"^SCAN (task|category|user)\b")
+
+
+@contextmanager
+def captured_statements():
+    """Collect (statement, parameters) for every query run inside the block."""
+    statements = []
+
+    def before_cursor_execute(
+        conn, cursor, statement, parameters, context, executemany
+    ):
+        if not executemany:
+            statements.append((statement, parameters))
+
+    event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+
+
+def full_scans(statements):
+    """Return the plan lines of captured statements that scan a whole table."""
+    scans = []
+    connection = db.session.connection()
+    for statement, parameters in statements:
+        if (
+            not statement.lstrip()
+            .upper()
+            .startswith(("SELECT", "UPDATE", "DELETE"))
+        ):
+            continue
+        plan = connection.exec_driver_sql(
+            "EXPLAIN QUERY PLAN " + statement, parameters
+        ).fetchall()
+        for row in plan:
+            detail = row[-1]
+            if FULL_SCAN.match(detail):
+                scans.append(f"{detail} <- {statement}")
+    return scans
+
+
+def assert_no_full_scan(statements):
+    assert statements, "no statements were captured"
+    scans = full_scans(statements)
+    assert not scans, "full table scan:\n" + "\n".join(scans)
+
+
+class TestTaskQueryPlans:
+    """Every TaskService query must be an index search."""
+
+    @pytest.mark.parametrize("filters", [
+        {},
+        {"status": "Pending"},
+        {"category_id": 1},
+        {"priority": 1},
+        {"due_after": "2025-12-01", "due_before": "2025-12-31"},
+    ])
+    def test_get_tasks(
+        self, app, task_service, multiple_tasks, test_user, filters
+    ):
+        with captured_statements() as statements:
+            task_service.get_tasks(test_user['id'], **filters)
+        assert_no_full_scan(statements)
+
+    @pytest.mark.parametrize("sort", ["priority", "hours", "id"])
+    def test_get_tasks_page(
+        self, app, task_service, multiple_tasks, test_user, sort
+    ):
+        _, cursor = task_service.get_tasks_page(
+            test_user['id'], limit=1, sort=sort
+        )
+        with captured_statements() as statements:
+            task_service.get_tasks_page(
+                test_user['id'], limit=1, cursor=cursor, sort=sort
+            )
+        assert_no_full_scan(statements)
+
+    def test_expanded_listing(
+        self, app, task_service, multiple_tasks, test_user
+    ):
+        from backend.serializers import TASK_CATEGORY_COLUMNS
+
+        with captured_statements() as statements:
+            task_service.get_tasks(
+                test_user['id'], columns=TASK_CATEGORY_COLUMNS,
+                expand=('category',),
+            )
+            task_service.get_tasks_page(
+                test_user['id'], limit=1, expand=('category',)
+            )
+        assert_no_full_scan(statements)
+
+    def test_task_by_id(self, app, task_service, test_task):
+        with captured_statements() as statements:
+            task_service.get_task(test_task.id)
+            task_service.update_task(test_task.id, status='Completed')
+            task_service.delete_task(test_task.id)
+        assert_no_full_scan(statements)
+
+    def test_batch_update_and_delete(
+        self, app, task_service, multiple_tasks, test_user
+    ):
+        with captured_statements() as statements:
+            task_service.update_tasks(
+                test_user['id'],
+                [{'id': multiple_tasks[0], 'status': 'Completed'}],
+            )
+            task_service.delete_tasks(test_user['id'], multiple_tasks)
+        assert_no_full_scan(statements)
+
+
+class TestSyncQueryPlans:
+    """Sync reads along the (user_id, updated_at) indexes."""
+
+    def test_changes_since_token(
+        self, app, multiple_tasks, test_category, test_user
+    ):
+        from backend.services.sync_service import SyncService
+
+        service = SyncService(page_size=1)
+        token = service.changes(test_user['id'])['next']
+        with captured_statements() as statements:
+            service.changes(test_user['id'], token)
+        assert_no_full_scan(statements)
+        connection = db.session.connection()
+        for statement, parameters in statements:
+            plan = connection.exec_driver_sql(
+                "EXPLAIN QUERY PLAN " + statement, parameters
+            ).fetchall()
+            assert any(
+                "_user_updated_at (user_id=? AND updated_at>?)" in row[-1]
+                for row in plan
+            )
+
+
+class TestCategoryQueryPlans:
+    """Every CategoryService query must be an index search."""
+
+    def test_create_category_duplicate_check(
+        self, app, category_service, test_user
+    ):
+        with captured_statements() as statements:
+            category_service.create_category(test_user['id'], 'Work')
+        assert_no_full_scan(statements)
+
+    def test_get_all_categories(
+        self, app, category_service, test_category, test_user
+    ):
+        with captured_statements() as statements:
+            category_service.get_all_categories(test_user['id'])
+        assert_no_full_scan(statements)
+
+    def test_delete_category_with_tasks(
+        self, app, category_service, test_category, test_task
+    ):
+        with captured_statements() as statements:
+            category_service.delete_category(test_category.id)
+        assert_no_full_scan(statements)
+
+
+class TestAuthQueryPlans:
+    """User lookups must go through the username index."""
+
+    def test_register_and_authenticate(self, app, auth_service):
+        with captured_statements() as statements:
+            auth_service.register_user('planuser', 'password123')
+            auth_service.authenticate_user('planuser', 'password123')
+        assert_no_full_scan(statements)
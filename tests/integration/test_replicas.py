@@ -0,0 +1,275 @@
+"""
+Integration tests for read-replica routing (backend/replicas.py).
+The primary and the replicas are SQLite files; a replica starts as a copy of
+the primary and then stops receiving its writes, like a lagging replica.
+"""
+import shutil
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from backend.app import create_app
+from backend.config import TestingConfig
+from backend.database import db
+from backend.replicas import ReplicaRouter
+
+
+def replicate(primary, replica):
+    """Copy the primary's file to the replica, as replication would have."""
+    shutil.copyfile(primary, replica)
+
+
+@pytest.fixture
+def files(tmp_path):
+    return (
+        tmp_path / 'primary.db', tmp_path / 'replica-1.db',
+        tmp_path / 'replica-2.db',
+    )
+
+
+@pytest.fixture
+def replicated_app(files, monkeypatch, request):
+    primary, replica_1, replica_2 = files
+    monkeypatch.setattr(
+        TestingConfig, 'SQLALCHEMY_DATABASE_URI', f'sqlite:///{primary}'
+    )
+    monkeypatch.setattr(
+        TestingConfig,
+        'DATABASE_REPLICA_URLS',
+        f'sqlite:///{replica_1},sqlite:///{replica_2}',
+    )
+    monkeypatch.setattr(TestingConfig, 'SQLITE_PRAGMAS', {})
+    # Every GET must reach a database, unless a test asks for a cache
+    monkeypatch.setattr(
+        TestingConfig, 'CACHE_BACKEND', getattr(request, 'param', 'none')
+    )
+    app = create_app('testing')
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+    app.extensions['replicas'].dispose()
+
+
+@pytest.fixture
+def user(replicated_app, files):
+    """
+    A user with one task, replicated to both replicas; returns the auth
+    headers.
+    """
+    client = replicated_app.test_client()
+    client.post(
+        '/register', json={'username': 'replicated', 'password': 'password123'}
+    )
+    token = client.post(
+        '/login', json={'username': 'replicated', 'password': 'password123'}
+    ).get_json()['token']
+    headers = {'Authorization': f'Bearer {token}'}
+    category = client.post(
+        '/categories', json={'name': 'Work'}, headers=headers
+    ).get_json()
+    client.post(
+        '/tasks',
+        json={
+            'title': 'Replicated', 'priority': 'Low',
+            'category_id': category['id'],
+        },
+        headers=headers,
+    )
+
+    primary, replica_1, replica_2 = files
+    with replicated_app.app_context():
+        db.session.remove()
+    replicate(primary, replica_1)
+    replicate(primary, replica_2)
+    # Only what was written so far reached the replicas
+    replicated_app.extensions['replicas']._writes.clear()
+    return {'headers': headers, 'category_id': category['id']}
+
+
+def titles(client, headers):
+    return [
+        t['title']
+        for t in client.get('/tasks?sort=id', headers=headers).get_json()
+    ]
+
+
+class TestReplicaRouting:
+    """
+    GET requests read from the replicas, everything else from the primary.
+    """
+
+    def test_gets_read_from_replicas(self, replicated_app, user, files):
+        """
+        Test that a GET sees a replica's data, not the primary's newer rows.
+        """
+        primary, _, _ = files
+        engine = create_engine(f'sqlite:///{primary}')
+        with engine.begin() as connection:
+            connection.execute(text("UPDATE task SET title = 'Primary only'"))
+        engine.dispose()
+
+        client = replicated_app.test_client()
+        assert titles(client, user['headers']) == ['Replicated']
+
+    def test_round_robin(self, replicated_app, user, files):
+        """Test that successive GETs alternate between the replicas."""
+        _, _, replica_2 = files
+        engine = create_engine(f'sqlite:///{replica_2}')
+        with engine.begin() as connection:
+            connection.execute(text("UPDATE task SET title = 'Replica 2'"))
+        engine.dispose()
+
+        client = replicated_app.test_client()
+        seen = {titles(client, user['headers'])[0] for _ in range(4)}
+        assert seen == {'Replicated', 'Replica 2'}
+
+    def test_reads_own_writes(self, replicated_app, user):
+        """
+        Test that after a write the user reads from the primary, then from a
+        replica again.
+        """
+        client = replicated_app.test_client()
+        client.post(
+            '/tasks',
+            json={
+                'title': 'Fresh', 'priority': 'Low',
+                'category_id': user['category_id'],
+            },
+            headers=user['headers'],
+        )
+
+        assert titles(client, user['headers']) == ['Replicated', 'Fresh']
+
+        replicated_app.extensions['replicas'].max_lag = 0
+        assert titles(client, user['headers']) == ['Replicated']
+
+    def test_search_reads_from_replicas(self, replicated_app, user, files):
+        """
+        Test that asking for the engine's dialect does not pin a search to the
+        primary.
+        """
+        primary, _, _ = files
+        engine = create_engine(f'sqlite:///{primary}')
+        with engine.begin() as connection:
+            connection.execute(text("UPDATE task SET title = 'Primary only'"))
+        engine.dispose()
+
+        client = replicated_app.test_client()
+        response = client.get(
+            '/tasks/search?q=replicated', headers=user['headers']
+        )
+        assert [t['title'] for t in response.get_json()['tasks']] == [
+            'Replicated'
+        ]
+
+    @pytest.mark.parametrize('replicated_app', ['memory'], indirect=True)
+    def test_replica_reads_are_not_cached(self, replicated_app, user, files):
+        """
+        Test that a listing read from a replica gets no ETag and is not cached.
+        """
+        client = replicated_app.test_client()
+        response = client.get('/tasks', headers=user['headers'])
+        assert response.status_code == 200
+        assert 'ETag' not in response.headers
+
+        # Replication catches up; the next read must not be served from the
+        # cache
+        primary, replica_1, replica_2 = files
+        engine = create_engine(f'sqlite:///{primary}')
+        with engine.begin() as connection:
+            connection.execute(text("UPDATE task SET title = 'Caught up'"))
+        engine.dispose()
+        replicate(primary, replica_1)
+        replicate(primary, replica_2)
+        assert titles(client, user['headers']) == ['Caught up']
+
+        # Reads from the primary are cached and tagged as usual
+        client.post(
+            '/tasks',
+            json={
+                'title': 'Fresh', 'priority': 'Low',
+                'category_id': user['category_id'],
+            },
+            headers=user['headers'],
+        )
+        response = client.get('/tasks', headers=user['headers'])
+        assert 'ETag' in response.headers
+
+    def test_write_in_get_request_stays_on_primary(self, replicated_app, user):
+        """Test that once a session wrote, its later reads use the primary."""
+        router = replicated_app.extensions['replicas']
+        with replicated_app.test_request_context('/tasks', method='GET'):
+            assert (
+                db.session.get_bind(clause=db.select(text('1')))
+                is not db.engine
+            )
+            db.session.execute(text('SELECT 1'))
+            assert (
+                db.session.get_bind(clause=db.select(text('1'))) is db.engine
+            )
+            db.session.remove()
+        assert router.replicas[0].healthy
+
+    def test_unhealthy_replicas_fall_back_to_primary(
+        self, replicated_app, user
+    ):
+        """
+        Test that with every replica failing its check, reads go to the
+        primary.
+        """
+        router = replicated_app.extensions['replicas']
+        for replica in router.replicas:
+            replica.lag_query = 'SELECT * FROM missing_table'
+        router.check()
+
+        client = replicated_app.test_client()
+        client.post(
+            '/tasks',
+            json={
+                'title': 'Fresh', 'priority': 'Low',
+                'category_id': user['category_id'],
+            },
+            headers=user['headers'],
+        )
+        router._writes.clear()
+        assert titles(client, user['headers']) == ['Replicated', 'Fresh']
+
+        health = client.get('/health').get_json()
+        assert [r['healthy'] for r in health['replicas']] == [False, False]
+
+
+class TestReplicaRouter:
+    def test_lag_guard(self, tmp_path):
+        """
+        Test that a replica lagging more than max_lag is skipped until it
+        catches up.
+        """
+        engine = create_engine(f'sqlite:///{tmp_path / "replica.db"}')
+        with engine.begin() as connection:
+            connection.execute(text('CREATE TABLE replication (lag REAL)'))
+            connection.execute(text('INSERT INTO replication VALUES (10)'))
+        router = ReplicaRouter(
+            [engine],
+            max_lag=5,
+            check_interval=0,
+            lag_queries={'sqlite': 'SELECT lag FROM replication'},
+        )
+
+        assert router.reader() is None
+        assert router.status()[0]['lag_seconds'] == 10
+
+        with engine.begin() as connection:
+            connection.execute(text('UPDATE replication SET lag = 1'))
+        assert router.reader() is engine
+        engine.dispose()
+
+    def test_recent_writers_use_the_primary(self, tmp_path):
+        """Test the per-user read-your-writes window."""
+        engine = create_engine(f'sqlite:///{tmp_path / "replica.db"}')
+        router = ReplicaRouter([engine], max_lag=60)
+        router.note_write(1)
+
+        assert router.reader(1) is None
+        assert router.reader(2) is engine
+        engine.dispose()
@@ -0,0 +1,512 @@
+"""
+Integration tests for sharding by user (backend/shards.py,
+backend/rebalance.py). The directory and three shards are SQLite files.
+"""
+import threading
+import time
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, func, select, text, update
+
+from backend import rebalance
+from backend.app import create_app
+from backend.config import TestingConfig
+from backend.database import db, engine_options
+from backend.models.shard import IdBlock
+from backend.models.task import Task
+from backend.models.user import User
+from backend.rebalance import migrate, move_user, move_users, pin, plan
+from backend.shards import (
+    HashRing, IdAllocator, ShardMovingError, create_shard_router,
+)
+
+SHARDS = ('a', 'b', 'c')
+
+
+@pytest.fixture
+def sharded_app(tmp_path, monkeypatch):
+    urls = ','.join(
+        f'{name}=sqlite:///{tmp_path / f"shard-{name}.db"}' for name in SHARDS
+    )
+    monkeypatch.setattr(
+        TestingConfig,
+        'SQLALCHEMY_DATABASE_URI',
+        f'sqlite:///{tmp_path / "directory.db"}',
+    )
+    monkeypatch.setattr(TestingConfig, 'SHARD_URLS', urls)
+    monkeypatch.setattr(TestingConfig, 'SHARD_PLACEMENT_TTL_SECONDS', 0)
+    monkeypatch.setattr(TestingConfig, 'SQLITE_PRAGMAS', {})
+    # Every GET must reach a shard
+    monkeypatch.setattr(TestingConfig, 'CACHE_BACKEND', 'none')
+    app = create_app('testing')
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+    app.extensions['shards'].dispose()
+
+
+def register(app, username):
+    """
+    Register and log in username; returns the auth headers and the user id.
+    """
+    client = app.test_client()
+    client.post(
+        '/register', json={'username': username, 'password': 'password123'}
+    )
+    token = client.post(
+        '/login', json={'username': username, 'password': 'password123'}
+    ).get_json()['token']
+    with app.app_context():
+        uid = db.session.execute(
+            select(User.id).where(User.username == username)
+        ).scalar_one()
+    return {'Authorization': f'Bearer {token}'}, uid
+
+
+def rows_by_shard(app, table):
+    """Number of rows of table on each shard."""
+    counts = {}
+    for name, engine in app.extensions['shards'].engines.items():
+        with engine.connect() as connection:
+            counts[name] = connection.execute(
+                text(f'SELECT COUNT(*) FROM {table}')
+            ).scalar()
+    return counts
+
+
+@pytest.fixture
+def users(sharded_app):
+    """
+    Six users with a category and two tasks each; returns their (auth headers,
+    id).
+    """
+    client = sharded_app.test_client()
+    created = []
+    for i in range(6):
+        headers, uid = register(sharded_app, f'sharded{i}')
+        category = client.post(
+            '/categories', json={'name': f'Work {i}'}, headers=headers
+        ).get_json()
+        for title in (f'First {i}', f'Second {i}'):
+            client.post(
+                '/tasks',
+                json={
+                    'title': title, 'priority': 'Low',
+                    'category_id': category['id'],
+                },
+                headers=headers,
+            )
+        created.append((headers, uid))
+    return created
+
+
+def add_task(client, headers, title):
+    """POST a task into the user's first category."""
+    category = client.get('/categories', headers=headers).get_json()[0]
+    return client.post(
+        '/tasks',
+        json={
+            'title': title, 'priority': 'Low', 'category_id': category['id']
+        },
+        headers=headers,
+    )
+
+
+def titles(client, headers):
+    return [
+        t['title']
+        for t in client.get('/tasks?sort=id', headers=headers).get_json()
+    ]
+
+
+class TestShardedApi:
+    """The API over sharded tasks and categories."""
+
+    def test_rows_live_on_the_users_shard(self, sharded_app, users):
+        """
+        Test that each user's rows are on the shard the router places them on,
+        and only there.
+        """
+        router = sharded_app.extensions['shards']
+        for _, uid in users:
+            shard = router.shard_for(uid)
+            for name, engine in router.engines.items():
+                with engine.connect() as connection:
+                    count = connection.execute(
+                        select(func.count()).where(Task.user_id == uid)
+                    ).scalar()
+                assert count == (2 if name == shard else 0)
+        assert sum(rows_by_shard(sharded_app, 'task').values()) == 12
+        # The users and their placements stay in the directory
+        with sharded_app.app_context():
+            assert db.session.execute(
+                text('SELECT COUNT(*) FROM shard_placement')
+            ).scalar() == 6
+
+    def test_ids_are_unique_across_shards(self, sharded_app, users):
+        """Test that tasks on different shards never share an id."""
+        ids = []
+        for engine in sharded_app.extensions['shards'].engines.values():
+            with engine.connect() as connection:
+                ids += (
+                    connection.execute(text('SELECT id FROM task'))
+                    .scalars()
+                    .all()
+                )
+        assert len(ids) == len(set(ids)) == 12
+
+    def test_reads(self, sharded_app, users):
+        """
+        Test that listing, expansion, stats and sync read from the user's
+        shard.
+        """
+        client = sharded_app.test_client()
+        for i, (headers, _) in enumerate(users):
+            assert titles(client, headers) == [f'First {i}', f'Second {i}']
+            expanded = client.get(
+                '/tasks?expand=category', headers=headers
+            ).get_json()
+            assert {t['category']['name'] for t in expanded} == {f'Work {i}'}
+            assert (
+                client.get('/stats', headers=headers).get_json()['total'] == 2
+            )
+            changes = client.get('/sync', headers=headers).get_json()
+            assert len(changes['tasks']) == 2
+            assert len(changes['categories']) == 1
+
+    def test_writes(self, sharded_app, users):
+        """Test that updates and deletes reach the user's shard."""
+        client = sharded_app.test_client()
+        headers = users[0][0]
+        first, second = client.get(
+            '/tasks?sort=id', headers=headers
+        ).get_json()
+
+        response = client.put(
+            f'/tasks/{first["id"]}', json={'title': 'Renamed'}, headers=headers
+        )
+        assert response.status_code == 200
+        assert client.delete(
+            f'/tasks/{second["id"]}', headers=headers
+        ).status_code == 200
+        assert titles(client, headers) == ['Renamed']
+
+    def test_other_users_task_is_not_found(self, sharded_app, users):
+        """
+        Test that a task id of another user is a 404, whichever shard it is on.
+        """
+        client = sharded_app.test_client()
+        owner, other = users[0][0], users[1][0]
+        task = client.get('/tasks', headers=owner).get_json()[0]
+
+        assert (
+            client.get(f'/tasks/{task["id"]}', headers=other).status_code
+            == 404
+        )
+        assert client.put(
+            f'/tasks/{task["id"]}', json={'title': 'Stolen'}, headers=other
+        ).status_code == 404
+        assert (
+            client.delete(f'/tasks/{task["id"]}', headers=other).status_code
+            == 404
+        )
+        assert (
+            client.get(f'/tasks/{task["id"]}', headers=owner).status_code
+            == 200
+        )
+
+
+class TestRebalance:
+    def test_move_user(self, sharded_app, users):
+        """
+        Test that a moved user's rows are on the new shard only, and the API
+        still serves them.
+        """
+        router = sharded_app.extensions['shards']
+        client = sharded_app.test_client()
+        headers, uid = users[0]
+        source = router.shard_for(uid)
+        target = next(name for name in SHARDS if name != source)
+        before = client.get('/tasks?sort=id', headers=headers).get_json()
+
+        result = move_user(router, uid, target)
+
+        assert result['source'] == source
+        assert result['rows'] == 3
+        assert router.shard_for(uid) == target
+        after = client.get('/tasks?sort=id', headers=headers).get_json()
+        assert [(t['id'], t['title']) for t in after] == [
+            (t['id'], t['title']) for t in before
+        ]
+        with router.engines[source].connect() as connection:
+            assert connection.execute(
+                select(func.count()).where(Task.user_id == uid)
+            ).scalar() == 0
+
+        # New rows follow the user
+        assert add_task(client, headers, 'Moved').status_code == 201
+        with router.engines[target].connect() as connection:
+            assert connection.execute(
+                select(func.count()).where(Task.user_id == uid)
+            ).scalar() == 3
+
+    def test_moves_share_the_waits_of_a_batch(
+        self, sharded_app, users, monkeypatch
+    ):
+        """
+        Test that a batch of users waits for the cached placements twice in
+        all, not twice per user.
+        """
+        router = sharded_app.extensions['shards']
+        moves = [
+            (
+                uid,
+                next(name for name in SHARDS if name != router.shard_for(uid)),
+            )
+            for _, uid in users
+        ]
+        sleeps = []
+        monkeypatch.setattr(rebalance.time, 'sleep', sleeps.append)
+
+        results = move_users(router, moves, batch_size=4)
+
+        assert len(sleeps) == 4
+        assert [(r['user_id'], r['target'], r['rows']) for r in results] == [
+            (uid, target, 3) for uid, target in moves
+        ]
+        assert all(router.shard_for(uid) == target for uid, target in moves)
+        client = sharded_app.test_client()
+        for i, (headers, _) in enumerate(users):
+            assert titles(client, headers) == [f'First {i}', f'Second {i}']
+        assert sum(rows_by_shard(sharded_app, 'task').values()) == 12
+
+    def test_late_commit_is_copied(self, sharded_app, users, monkeypatch):
+        """
+        Test that a write committed after the first copy is moved, however old
+        its updated_at.
+        """
+        router = sharded_app.extensions['shards']
+        client = sharded_app.test_client()
+        headers, uid = users[0]
+        source = router.shard_for(uid)
+        target = next(name for name in SHARDS if name != source)
+        first = client.get('/tasks?sort=id', headers=headers).get_json()[0]
+
+        def commit_late(seconds):
+            # Once, after the first copy: a transaction that stamped its row
+            # long ago commits now
+            monkeypatch.setattr(rebalance.time, 'sleep', lambda seconds: None)
+            with router.engines[source].begin() as connection:
+                connection.execute(
+                    update(Task)
+                    .where(Task.id == first['id'])
+                    .values(title='Late', updated_at=datetime(2000, 1, 1))
+                )
+        monkeypatch.setattr(rebalance.time, 'sleep', commit_late)
+
+        result = move_user(router, uid, target)
+
+        assert result['delta'] == 1
+        assert router.shard_for(uid) == target
+        task = client.get(f"/tasks/{first['id']}", headers=headers).get_json()
+        assert task['title'] == 'Late'
+
+    def test_unlockable_shards_are_refused(
+        self, sharded_app, users, monkeypatch
+    ):
+        """
+        Test that a move is refused, before anything is copied, when a shard
+        cannot be locked.
+        """
+        router = sharded_app.extensions['shards']
+        uid = users[0][1]
+        source = router.shard_for(uid)
+        monkeypatch.delitem(rebalance.WRITE_LOCKS, 'sqlite')
+
+        with pytest.raises(ValueError, match='cannot lock'):
+            move_user(
+                router, uid, next(name for name in SHARDS if name != source)
+            )
+        assert router.shard_for(uid) == source
+        assert sum(rows_by_shard(sharded_app, 'task').values()) == 12
+
+    def test_writes_wait_while_moving(self, sharded_app, users):
+        """
+        Test that a write during a move waits for it to end, and lands on the
+        new shard.
+        """
+        router = sharded_app.extensions['shards']
+        headers, uid = users[0]
+        source = router.shard_for(uid)
+        target = next(name for name in SHARDS if name != source)
+        router.place(uid, source, moving=True)
+
+        responses = []
+        writer = threading.Thread(target=lambda: responses.append(
+            add_task(sharded_app.test_client(), headers, 'Waiting')
+        ))
+        writer.start()
+        time.sleep(0.3)
+        assert writer.is_alive()
+        # Reads go on meanwhile
+        assert len(titles(sharded_app.test_client(), headers)) == 2
+
+        router.place(uid, target)
+        writer.join(5)
+        assert responses[0].status_code == 201
+        with router.engines[target].connect() as connection:
+            assert connection.execute(
+                select(Task.title).where(Task.user_id == uid)
+            ).scalars().all() == ['Waiting']
+        with router.engines[source].connect() as connection:
+            assert connection.execute(
+                select(Task.title).where(Task.title == 'Waiting')
+            ).first() is None
+
+    def test_write_gives_up_after_move_wait(self, sharded_app, users):
+        """Test that a write fails once it waited SHARD_MOVE_WAIT_SECONDS."""
+        router = sharded_app.extensions['shards']
+        uid = users[0][1]
+        router.place(uid, router.shard_for(uid), moving=True)
+        router.move_wait = 0.1
+
+        with pytest.raises(ShardMovingError):
+            router.engine_for(uid, write=True)
+        assert router.engine_for(uid) is router.engines[router.shard_for(uid)]
+
+    def test_plan_after_adding_a_shard(self, sharded_app, users):
+        """
+        Test that a new shard only takes users over from the others, and --plan
+        lists them.
+        """
+        router = sharded_app.extensions['shards']
+        router.engines['d'] = create_engine('sqlite://')
+        router.ring = HashRing(router.engines)
+        uids = [uid for _, uid in users]
+
+        moves = plan(router)
+
+        assert [move[0] for move in moves] == [
+            uid for uid in uids if router.ring.node_for(uid) == 'd'
+        ]
+        assert all(target == 'd' for _, _, target in moves)
+        router.engines.pop('d').dispose()
+
+    def test_pin(self, sharded_app, users):
+        """
+        Test that users registered before sharding get a placement row for
+        their ring shard.
+        """
+        router = sharded_app.extensions['shards']
+        with router.directory.begin() as connection:
+            connection.execute(text('DELETE FROM shard_placement'))
+
+        assert pin(router) == 6
+        assert pin(router) == 0
+        assert plan(router) == []
+
+
+class TestMigrate:
+
+    def test_existing_data_is_migrated_before_start(
+        self, tmp_path, monkeypatch
+    ):
+        """
+        Test that tasks written before sharding block startup until --migrate
+        moves them.
+        """
+        directory = f'sqlite:///{tmp_path / "directory.db"}'
+        monkeypatch.setattr(
+            TestingConfig, 'SQLALCHEMY_DATABASE_URI', directory
+        )
+        monkeypatch.setattr(TestingConfig, 'SQLITE_PRAGMAS', {})
+        monkeypatch.setattr(TestingConfig, 'CACHE_BACKEND', 'none')
+        unsharded = create_app('testing')
+        headers, uid = register(unsharded, 'early')
+        client = unsharded.test_client()
+        client.post('/categories', json={'name': 'Early'}, headers=headers)
+        add_task(client, headers, 'Before sharding')
+        with unsharded.app_context():
+            db.session.remove()
+            db.engine.dispose()
+
+        urls = ','.join(
+            f'{name}=sqlite:///{tmp_path / f"shard-{name}.db"}'
+            for name in SHARDS
+        )
+        monkeypatch.setattr(TestingConfig, 'SHARD_URLS', urls)
+        monkeypatch.setattr(TestingConfig, 'SHARD_PLACEMENT_TTL_SECONDS', 0)
+        with pytest.raises(RuntimeError, match='--migrate'):
+            create_app('testing')
+
+        config = {
+            name: getattr(TestingConfig, name)
+            for name in dir(TestingConfig)
+            if name.isupper()
+        }
+        router = create_shard_router(config, engine_options)
+        assert migrate(router) == 2
+        assert router.stranded_rows() == 0
+        assert migrate(router) == 0
+        router.dispose()
+
+        app = create_app('testing')
+        assert titles(app.test_client(), headers) == ['Before sharding']
+        # New ids do not collide with the migrated ones
+        assert (
+            add_task(app.test_client(), headers, 'After sharding').status_code
+            == 201
+        )
+        assert len(titles(app.test_client(), headers)) == 2
+        with app.app_context():
+            db.session.remove()
+            db.engine.dispose()
+        app.extensions['shards'].dispose()
+
+
+class TestHashRing:
+    def test_distribution(self):
+        """Test that keys spread over the nodes roughly evenly."""
+        ring = HashRing(SHARDS)
+        counts = {name: 0 for name in SHARDS}
+        for key in range(3000):
+            counts[ring.node_for(key)] += 1
+        assert all(700 < count < 1300 for count in counts.values())
+
+    def test_adding_a_node_moves_few_keys(self):
+        """
+        Test that a fourth node takes about a quarter of the keys, all from the
+        others.
+        """
+        before, after = HashRing(SHARDS), HashRing(SHARDS + ('d',))
+        moved = [
+            key
+            for key in range(3000)
+            if before.node_for(key) != after.node_for(key)
+        ]
+
+        assert 450 < len(moved) < 1050
+        assert all(after.node_for(key) == 'd' for key in moved)
+
+
+class TestIdAllocator:
+    def test_blocks_do_not_overlap(self, tmp_path):
+        """
+        Test that two allocators on one directory never hand out the same id.
+        """
+        engine = create_engine(f'sqlite:///{tmp_path / "directory.db"}')
+        IdBlock.__table__.create(engine)
+        first = IdAllocator(engine, block_size=3, first_id=lambda name: 10)
+        second = IdAllocator(engine, block_size=3)
+
+        ids = (
+            first.take('task', 4)
+            + second.take('task', 2)
+            + first.take('task', 3)
+        )
+
+        assert len(ids) == len(set(ids))
+        assert min(ids) == 11
+        engine.dispose()
@@ -1,9 +1,15 @@
 """
 Unit tests for AuthService.
 """
+from concurrent.futures import ThreadPoolExecutor
+
+import jwt
 import pytest
 from backend.services.auth_service import AuthService, AuthenticationError, RegistrationError
-from backend.database import User
+from backend.services.token_revocations import (
+    DatabaseTokenRevocations, TokenRevocations,
+)
+from backend.database import db, User
 
 
 class TestAuthService:
@@ -124,4 +130,188 @@ class TestAuthService:
             assert len(user.password_hash) > 50
             # Should be able to check password
             assert user.check_password('password123')
-            assert not user.check_password('wrongpassword')
\ No newline at end of file
+            assert not user.check_password('wrongpassword')
+
+    def test_verify_token_cached(self, app, auth_service, test_user):
+        """
+        Test that repeat verifications of a token are served from the cache.
+        """
+        with app.app_context():
+            token = auth_service.generate_token(test_user['id'])
+
+            assert auth_service.verify_token(token) == test_user['id']
+            assert auth_service.verify_token(token) == test_user['id']
+
+            stats = auth_service.cache_stats()
+            assert stats['misses'] == 1
+            assert stats['hits'] == 1
+            assert stats['size'] == 1
+
+    def test_token_cache_is_bounded(self, app, test_user):
+        """
+        Test that the least recently used token is evicted when the cache is
+        full.
+        """
+        service = AuthService('secret', 'HS256', 1, token_cache_size=2)
+        tokens = [service.generate_token(i) for i in range(3)]
+        for token in tokens:
+            service.verify_token(token)
+
+        assert service.cache_stats()['size'] == 2
+        service.verify_token(tokens[0])
+        assert service.cache_stats()['hits'] == 0
+
+    def test_cache_entry_expires(self, app, test_user, monkeypatch):
+        """Test that a cache entry is not served past its lifetime."""
+        import backend.services.auth_service as auth_module
+
+        service = AuthService('secret', 'HS256', 1, token_cache_ttl=60)
+        token = service.generate_token(test_user['id'])
+        service.verify_token(token)
+
+        now = auth_module.time.time()
+        monkeypatch.setattr(auth_module.time, 'time', lambda: now + 61)
+        assert service.verify_token(token) == test_user['id']
+        assert service.cache_stats()['hits'] == 0
+        assert service.cache_stats()['misses'] == 2
+
+    def test_revoked_token_rejected_even_when_cached(
+        self, app, auth_service, test_user
+    ):
+        """Test that revoking a token invalidates its cache entry."""
+        with app.app_context():
+            token = auth_service.generate_token(test_user['id'])
+            auth_service.verify_token(token)
+
+            auth_service.revoke_token(token)
+
+            with pytest.raises(AuthenticationError, match="Invalid token"):
+                auth_service.verify_token(token)
+
+    def test_revocation_seen_by_other_instances(
+        self, app, test_user, monkeypatch
+    ):
+        """
+        Test that another AuthService sharing the store rejects a revoked token
+        once its cache entry expires.
+        """
+        import backend.services.auth_service as auth_module
+
+        with app.app_context():
+            revocations = DatabaseTokenRevocations(db.engine)
+        first = AuthService('secret', 'HS256', 1, revocations=revocations)
+        second = AuthService(
+            'secret', 'HS256', 1, token_cache_ttl=60, revocations=revocations
+        )
+        token = first.generate_token(test_user['id'])
+        assert second.verify_token(token) == test_user['id']
+
+        first.revoke_token(token)
+        first.revoke_token(token)
+
+        with pytest.raises(AuthenticationError, match="Invalid token"):
+            first.verify_token(token)
+        assert second.verify_token(token) == test_user['id']
+        now = auth_module.time.time()
+        monkeypatch.setattr(auth_module.time, 'time', lambda: now + 61)
+        with pytest.raises(AuthenticationError, match="Invalid token"):
+            second.verify_token(token)
+        assert (
+            second.verify_token(first.generate_token(test_user['id']))
+            == test_user['id']
+        )
+
+    def test_cache_hits_skip_the_revocation_store(self, app, test_user):
+        """
+        Test that the revocation store is only consulted when the token is not
+        cached.
+        """
+        lookups = []
+
+        class CountingRevocations(TokenRevocations):
+            def is_revoked(self, digest):
+                lookups.append(digest)
+                return super().is_revoked(digest)
+
+        service = AuthService(
+            'secret', 'HS256', 1, revocations=CountingRevocations()
+        )
+        token = service.generate_token(test_user['id'])
+        for _ in range(3):
+            service.verify_token(token)
+
+        assert len(lookups) == 1
+
+    def test_token_without_exp(self, app, test_user):
+        """
+        Test that a token without an exp claim is cached for the TTL and can be
+        revoked.
+        """
+        service = AuthService('secret', 'HS256', 1, token_cache_ttl=60)
+        token = jwt.encode(
+            {'user_id': test_user['id']}, 'secret', algorithm='HS256'
+        )
+
+        assert service.verify_token(token) == test_user['id']
+        assert service.verify_token(token) == test_user['id']
+        assert service.cache_stats()['hits'] == 1
+
+        service.revoke_token(token)
+        with pytest.raises(AuthenticationError, match="Invalid token"):
+            service.verify_token(token)
+
+    def test_register_uses_configured_hash_method(self, app):
+        """Test that new passwords are hashed with the configured method."""
+        with app.app_context():
+            service = AuthService(
+                'secret', 'HS256', 1, password_hash_method='pbkdf2:sha256:1000'
+            )
+            user = service.register_user('costuser', 'password123')
+
+            assert user.password_hash.startswith('pbkdf2:sha256:1000$')
+            assert not user.needs_rehash('pbkdf2:sha256:1000')
+
+    def test_login_rehashes_outdated_hash(self, app):
+        """
+        Test that a successful login upgrades a hash made with old parameters.
+        """
+        with app.app_context():
+            old = AuthService(
+                'secret', 'HS256', 1, password_hash_method='pbkdf2:sha256:1000'
+            )
+            old.register_user('rehashuser', 'password123')
+
+            new = AuthService(
+                'secret', 'HS256', 1, password_hash_method='pbkdf2:sha256:2000'
+            )
+            user = new.authenticate_user('rehashuser', 'password123')
+
+            assert user.password_hash.startswith('pbkdf2:sha256:2000$')
+            assert user.check_password('password123')
+
+    def test_hashing_in_concurrent_threads(self, app):
+        """
+        Test logins from several request threads at once, each hashing in its
+        own thread.
+        """
+        service = AuthService(
+            'secret', 'HS256', 1, password_hash_method='pbkdf2:sha256:1000'
+        )
+        with app.app_context():
+            service.register_user('threaduser', 'password123')
+
+        def login(password):
+            with app.app_context():
+                try:
+                    return service.authenticate_user(
+                        'threaduser', password
+                    ).username
+                except AuthenticationError:
+                    return None
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(
+                executor.map(login, ['password123', 'wrongpassword'] * 4)
+            )
+
+        assert results == ['threaduser', None] * 4
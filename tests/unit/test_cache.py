@@ -0,0 +1,146 @@
+"""Unit tests for the response cache."""
+import pytest
+
+from backend.cache import LRUCache, ResponseCache, SharedCache
+from backend.services.collection_versions import (
+    CollectionVersions, SharedCollectionVersions,
+)
+
+
+class LocalStore:
+    """
+    Local stand-in for a Redis server (the subset of commands the cache uses).
+    """
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def mget(self, *keys):
+        return [self.data.get(key) for key in keys]
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    def setnx(self, key, value):
+        self.data.setdefault(key, value.encode())
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+    def incr(self, key):
+        self.data[key] = int(self.data.get(key, 0)) + 1
+        return self.data[key]
+
+
+class TestLRUCache:
+    def test_hit_and_miss_counters(self):
+        """Test that lookups are counted."""
+        cache = LRUCache()
+        assert cache.get('a') is None
+        cache.set('a', b'1')
+        assert cache.get('a') == b'1'
+
+        stats = cache.stats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+        assert stats['hit_ratio'] == 0.5
+
+    def test_evicts_least_recently_used(self):
+        """Test the entry limit."""
+        cache = LRUCache(max_entries=2)
+        cache.set('a', b'1')
+        cache.set('b', b'2')
+        cache.get('a')
+        cache.set('c', b'3')
+
+        assert cache.get('b') is None
+        assert cache.get('a') == b'1'
+        assert cache.stats()['evictions'] == 1
+
+    def test_byte_limit(self):
+        """Test that the total size of the values is bounded."""
+        cache = LRUCache(max_bytes=10)
+        cache.set('a', b'12345')
+        cache.set('b', b'123456')
+        cache.set('huge', b'x' * 11)
+
+        assert cache.get('a') is None
+        assert cache.get('b') == b'123456'
+        assert cache.get('huge') is None
+        assert cache.stats()['bytes'] == 6
+
+    def test_ttl(self, monkeypatch):
+        """Test that expired entries are not served."""
+        import backend.cache as cache_module
+
+        cache = LRUCache(ttl=10)
+        cache.set('a', b'1')
+        now = cache_module.time.monotonic()
+        monkeypatch.setattr(cache_module.time, 'monotonic', lambda: now + 11)
+
+        assert cache.get('a') is None
+        assert cache.stats()['size'] == 0
+
+
+class TestResponseCache:
+    @pytest.mark.parametrize('shared', [False, True])
+    def test_version_bump_invalidates(self, shared):
+        """
+        Test that bumping the collection version makes old entries unreachable.
+        """
+        if shared:
+            client = LocalStore()
+            cache = ResponseCache(
+                SharedCache(client), SharedCollectionVersions(client)
+            )
+        else:
+            cache = ResponseCache(LRUCache(), CollectionVersions())
+
+        renders = []
+
+        def render():
+            renders.append(1)
+            return b'[%d]' % len(renders)
+
+        assert cache.get_or_render(1, 'tasks', '', render) == b'[1]'
+        assert cache.get_or_render(1, 'tasks', '', render) == b'[1]'
+
+        cache.versions.bump(2, 'tasks')
+        assert cache.get_or_render(1, 'tasks', '', render) == b'[1]'
+
+        cache.versions.bump(1, 'tasks')
+        assert cache.get_or_render(1, 'tasks', '', render) == b'[2]'
+        assert cache.stats()['hits'] == 2
+
+    def test_shared_versions_change_epoch_when_store_is_wiped(self):
+        """Test that versions from before a wipe never match again."""
+        client = LocalStore()
+        versions = SharedCollectionVersions(client)
+        before = versions.get(1, 'tasks')
+
+        client.data.clear()
+        assert versions.get(1, 'tasks') != before
+
+    def test_service_writes_invalidate(
+        self, app, task_service, test_category, test_user
+    ):
+        """
+        Test that TaskService writes invalidate the user's cached listing.
+        """
+        cache = ResponseCache(LRUCache(), task_service.versions)
+
+        def render():
+            return str(len(task_service.get_tasks(test_user['id']))).encode()
+
+        assert (
+            cache.get_or_render(test_user['id'], 'tasks', '', render) == b'0'
+        )
+        task_service.create_task(
+            test_user['id'], 'New', None, 1, 1, test_category.id
+        )
+        assert (
+            cache.get_or_render(test_user['id'], 'tasks', '', render) == b'1'
+        )
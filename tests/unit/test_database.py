@@ -0,0 +1,157 @@
+"""Unit tests for the database engine setup."""
+import pytest
+from flask import Flask
+from sqlalchemy import create_engine, exc, text
+
+from backend.config import TestingConfig, database_url
+from backend.database import (
+    InstrumentedQueuePool, db, configure_engine, engine_options,
+)
+from backend.signals import pool_checkout
+
+
+def make_app(uri):
+    app = Flask(__name__)
+    app.config.from_object(TestingConfig)
+    app.config['SQLALCHEMY_DATABASE_URI'] = uri
+    db.init_app(app)
+    return app
+
+
+class TestConfigureEngine:
+    def test_file_database_gets_pragmas(self, tmp_path):
+        """
+        Test that a file-backed SQLite database runs in WAL mode with the tuned
+        pragmas.
+        """
+        path = tmp_path / 'nested' / 'tasks.db'
+        app = make_app(f'sqlite:///{path}')
+        with app.app_context():
+            configure_engine(app)
+            journal_mode = db.session.execute(
+                text('PRAGMA journal_mode')
+            ).scalar()
+            busy_timeout = db.session.execute(
+                text('PRAGMA busy_timeout')
+            ).scalar()
+            synchronous = db.session.execute(
+                text('PRAGMA synchronous')
+            ).scalar()
+            db.session.remove()
+            db.engine.dispose()
+
+        assert path.exists()
+        assert journal_mode == 'wal'
+        assert busy_timeout == TestingConfig.SQLITE_PRAGMAS['busy_timeout']
+        assert synchronous == 1  # NORMAL
+
+    def test_memory_database_untouched(self):
+        """Test that the in-memory database keeps its default journal mode."""
+        app = make_app('sqlite:///:memory:')
+        with app.app_context():
+            configure_engine(app)
+            journal_mode = db.session.execute(
+                text('PRAGMA journal_mode')
+            ).scalar()
+        assert journal_mode == 'memory'
+
+
+def options_for(uri, **overrides):
+    config = {
+        name: getattr(TestingConfig, name)
+        for name in dir(TestingConfig)
+        if name.isupper()
+    }
+    config.update(SQLALCHEMY_DATABASE_URI=uri, **overrides)
+    return engine_options(config)
+
+
+class TestEngineOptions:
+    def test_memory_database_keeps_defaults(self):
+        """
+        Test that in-memory SQLite keeps Flask-SQLAlchemy's single shared
+        connection.
+        """
+        assert options_for('sqlite:///:memory:') == {}
+
+    def test_sqlite_file_gets_a_bounded_pool(self):
+        """
+        Test that a SQLite file gets the instrumented pool without the server-
+        only options.
+        """
+        options = options_for(
+            'sqlite:////tmp/tasks.db', DB_POOL_SIZE=3, DB_MAX_OVERFLOW=1
+        )
+        assert options == {
+            'poolclass': InstrumentedQueuePool,
+            'pool_size': 3,
+            'max_overflow': 1,
+            'pool_timeout': TestingConfig.DB_POOL_TIMEOUT,
+        }
+
+    def test_postgresql_options(self):
+        """
+        Test pre-ping, recycling and the server-side timeouts for a libpq
+        driver.
+        """
+        options = options_for(
+            'postgresql+psycopg2://app:secret@db:5432/todo',
+            DB_POOL_SIZE=20, DB_POOL_RECYCLE=600, DB_STATEMENT_TIMEOUT_MS=2000,
+            DB_IDLE_IN_TRANSACTION_TIMEOUT_MS=0,
+        )
+        assert options['pool_size'] == 20
+        assert options['pool_pre_ping'] is True
+        assert options['pool_recycle'] == 600
+        assert options['connect_args'] == {
+            'connect_timeout': TestingConfig.DB_CONNECT_TIMEOUT,
+            'options': '-c statement_timeout=2000',
+        }
+
+    def test_other_drivers_get_no_libpq_arguments(self):
+        """
+        Test that drivers without libpq options only get the pool settings.
+        """
+        options = options_for('postgresql+asyncpg://app@db/todo')
+        assert 'connect_args' not in options
+        assert options['pool_pre_ping'] is True
+
+    def test_postgres_scheme_is_accepted(self, monkeypatch):
+        """
+        Test that a postgres:// DATABASE_URL is rewritten to the scheme
+        SQLAlchemy knows.
+        """
+        monkeypatch.setenv('DATABASE_URL', 'postgres://app@db/todo')
+        assert database_url() == 'postgresql://app@db/todo'
+
+
+class TestInstrumentedQueuePool:
+    def test_checkout_wait_and_timeout_are_reported(self, tmp_path):
+        """
+        Test that every checkout reports its wait, and a checkout of a full
+        pool its timeout.
+        """
+        engine = create_engine(
+            f'sqlite:///{tmp_path / "pool.db"}',
+            poolclass=InstrumentedQueuePool, pool_size=1, max_overflow=0,
+            pool_timeout=0.05,
+        )
+        reports = []
+
+        def receiver(sender, seconds, timed_out):
+            reports.append((seconds, timed_out))
+
+        pool_checkout.connect(receiver, sender=engine.dialect)
+        try:
+            first = engine.connect()
+            with pytest.raises(exc.TimeoutError):
+                engine.connect()
+            first.close()
+            # dispose() replaces the pool; its checkouts are still reported
+            engine.dispose()
+            engine.connect().close()
+        finally:
+            pool_checkout.disconnect(receiver, sender=engine.dialect)
+            engine.dispose()
+
+        assert [timed_out for _, timed_out in reports] == [False, True, False]
+        assert reports[1][0] >= 0.05
@@ -0,0 +1,185 @@
+"""Unit tests for the change event broker behind GET /events."""
+import queue
+import threading
+
+from backend.events import EventBroker, SharedEventBroker, event_stream
+from backend.services.task_service import TaskService
+
+
+class LocalPubSub:
+    """
+    Local stand-in for a Redis server's pub/sub (the subset the broker uses).
+    """
+
+    def __init__(self):
+        self.listeners = []
+
+    def publish(self, channel, message):
+        for listener in list(self.listeners):
+            listener.put(
+                {
+                    "type": "message", "channel": channel,
+                    "data": message.encode(),
+                }
+            )
+
+    def pubsub(self, ignore_subscribe_messages=False):
+        server = self
+
+        class Listener:
+            def subscribe(self, channel):
+                self.messages = queue.Queue()
+                server.listeners.append(self.messages)
+
+            def listen(self):
+                while True:
+                    yield self.messages.get()
+
+        return Listener()
+
+
+class TestEventBroker:
+    def test_publish_reaches_the_users_streams(self):
+        """
+        Test that an event goes to every subscription of its user and no other.
+        """
+        broker = EventBroker()
+        first, second, other = (
+            broker.subscribe(1), broker.subscribe(1), broker.subscribe(2)
+        )
+
+        broker.changed(1, "tasks")
+
+        assert (
+            first.get_nowait()
+            == second.get_nowait()
+            == ("changed", {"collections": ["tasks"]})
+        )
+        assert other.get_nowait() is None
+
+        first.close()
+        second.close()
+        assert broker.stream_count() == 1
+
+    def test_full_queue_collapses_to_resync(self):
+        """
+        Test that a subscriber that falls behind gets one resync event instead
+        of a growing queue.
+        """
+        broker = EventBroker(max_pending=3)
+        subscription = broker.subscribe(1)
+        for _ in range(10):
+            broker.changed(1, "tasks")
+
+        assert subscription.get_nowait() == ("resync", {})
+        assert subscription.get_nowait() is None
+        assert subscription.dropped == 10
+
+        # Caught up: events are queued again
+        broker.changed(1, "categories")
+        assert subscription.get_nowait() == (
+            "changed", {"collections": ["categories"]}
+        )
+
+    def test_service_writes_publish(self, app, test_category, test_user):
+        """
+        Test that task writes publish a changed event for the tasks collection.
+        """
+        broker = EventBroker()
+        subscription = broker.subscribe(test_user['id'])
+        service = TaskService(events=broker)
+
+        with app.app_context():
+            task = service.create_task(
+                test_user['id'], 'Pushed', None, 2, 1, test_category.id
+            )
+            service.delete_task(task.id)
+
+        assert subscription.get_nowait() == (
+            "changed", {"collections": ["tasks"]}
+        )
+        assert subscription.get_nowait() == (
+            "changed", {"collections": ["tasks"]}
+        )
+        assert subscription.get_nowait() is None
+
+
+class TestEventStream:
+    def test_events_and_heartbeats(self):
+        """
+        Test the SSE framing: preamble, heartbeat when idle, then the queued
+        events in one chunk.
+        """
+        broker = EventBroker()
+        stream = event_stream(broker.subscribe(1), heartbeat=0.01)
+
+        assert next(stream).startswith("retry: 3000\nevent: ready\n")
+        assert next(stream) == ": heartbeat\n\n"
+
+        broker.changed(1, "tasks")
+        broker.changed(1, "categories", "tasks")
+        assert next(stream) == (
+            'event: changed\ndata: {"collections":["tasks"]}\n\n'
+            'event: changed\ndata: {"collections":["categories","tasks"]}\n\n'
+        )
+
+        stream.close()
+        assert broker.stream_count() == 0
+
+    def test_stream_ends_after_max_seconds(self):
+        """Test that a stream ends (and unsubscribes) after max_seconds."""
+        broker = EventBroker()
+        chunks = list(
+            event_stream(broker.subscribe(1), heartbeat=0.01, max_seconds=0.05)
+        )
+
+        assert chunks[0].startswith("retry:")
+        assert set(chunks[1:]) == {": heartbeat\n\n"}
+        assert broker.stream_count() == 0
+
+    def test_wakes_on_publish_from_another_thread(self):
+        """
+        Test that a waiting stream is woken by an event published from another
+        thread.
+        """
+        broker = EventBroker()
+        stream = event_stream(broker.subscribe(1), heartbeat=5)
+        next(stream)
+
+        threading.Timer(0.05, broker.changed, args=(1, "tasks")).start()
+        assert next(stream).startswith("event: changed")
+        stream.close()
+
+
+class TestSharedEventBroker:
+    def test_fan_out_between_workers(self):
+        """
+        Test that an event published by one worker reaches the streams of
+        another.
+        """
+        server = LocalPubSub()
+        worker_a, worker_b = SharedEventBroker(server), SharedEventBroker(
+            server
+        )
+        subscription = worker_b.subscribe(1)
+
+        worker_a.changed(1, "tasks")
+
+        assert subscription.get(timeout=2) == (
+            "changed", {"collections": ["tasks"]}
+        )
+        subscription.close()
+
+    def test_malformed_messages_are_ignored(self):
+        """Test that garbage on the channel does not stop the listener."""
+        server = LocalPubSub()
+        broker = SharedEventBroker(server)
+        subscription = broker.subscribe(1)
+
+        server.publish("todo:events", "not json")
+        broker.changed(1, "tasks")
+
+        assert subscription.get(timeout=2) == (
+            "changed", {"collections": ["tasks"]}
+        )
+        subscription.close()
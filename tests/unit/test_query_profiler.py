@@ -0,0 +1,57 @@
+"""Unit tests for the SQL query profiler."""
+from sqlalchemy import text
+
+from backend.database import db
+from backend.query_profiler import QueryLog, count_queries, normalize
+
+
+class TestNormalize:
+    def test_literals_become_placeholders(self):
+        """Test that numeric and string literals are replaced by '?'."""
+        assert (
+            normalize("SELECT * FROM task WHERE id = 12 AND title = 'a''b'")
+            == "SELECT * FROM task WHERE id = ? AND title = ?"
+        )
+
+    def test_in_lists_collapse(self):
+        """Test that expanded IN lists of any length have the same shape."""
+        assert normalize("SELECT id FROM task WHERE id IN (?, ?, ?)") == \
+            normalize("SELECT id FROM task\n  WHERE id IN (?)")
+
+    def test_identifiers_with_digits_are_kept(self):
+        """Test that digits inside identifiers are not treated as literals."""
+        assert (
+            normalize("SELECT anon_1.id FROM anon_1")
+            == "SELECT anon_1.id FROM anon_1"
+        )
+
+
+class TestQueryLog:
+    def test_repeated_shapes(self):
+        """
+        Test that repeated reports the shapes run at least threshold times.
+        """
+        log = QueryLog()
+        for task_id in range(3):
+            log.record(f"SELECT * FROM category WHERE id = {task_id}", 0.001)
+        log.record("SELECT * FROM task", 0.001)
+
+        assert len(log) == 4
+        assert round(log.seconds, 6) == 0.004
+        assert log.repeated(3) == [("SELECT * FROM category WHERE id = ?", 3)]
+        assert log.repeated(4) == []
+
+
+class TestCountQueries:
+    def test_counts_statements_in_block_only(self, app):
+        """
+        Test that count_queries records the block's statements and then
+        detaches.
+        """
+        with count_queries(db.engine) as log:
+            db.session.execute(text('SELECT 1'))
+            db.session.execute(text('SELECT 2'))
+        db.session.execute(text('SELECT 3'))
+
+        assert log.statements == ['SELECT 1', 'SELECT 2']
+        assert log.seconds >= 0
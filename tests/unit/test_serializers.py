@@ -0,0 +1,58 @@
+"""Unit tests for the task serializer and the JSON providers."""
+import json
+from datetime import datetime
+
+import pytest
+
+from backend.json_provider import OrjsonProvider, StdlibJSONProvider, orjson
+from backend.serializers import TASK_COLUMNS, serialize_task, serialize_tasks
+
+PROVIDERS = [StdlibJSONProvider]
+if orjson is not None:
+    PROVIDERS.append(OrjsonProvider)
+
+
+class TestSerializers:
+
+    def test_rows_and_objects_serialize_alike(
+        self, app, task_service, multiple_tasks, test_user
+    ):
+        """Test that column rows give the same JSON shape as Task objects."""
+        objects = task_service.get_tasks(test_user['id'])
+        rows = task_service.get_tasks(test_user['id'], columns=TASK_COLUMNS)
+
+        assert serialize_tasks(rows) == [serialize_task(t) for t in objects]
+        assert serialize_tasks(rows)[0]['priority'] == 'High'
+
+    def test_page_with_columns(
+        self, app, task_service, multiple_tasks, test_user
+    ):
+        """Test that keyset pagination works on column rows."""
+        rows, cursor = task_service.get_tasks_page(
+            test_user['id'], limit=2, columns=TASK_COLUMNS
+        )
+        rest, _ = task_service.get_tasks_page(
+            test_user['id'], limit=2, cursor=cursor, columns=TASK_COLUMNS
+        )
+        assert [r.id for r in rows + rest] == [
+            t.id for t in task_service.get_tasks(test_user['id'])
+        ]
+
+
+class TestJSONProviders:
+    @pytest.mark.parametrize('provider', PROVIDERS)
+    def test_datetimes_are_iso_8601(self, app, provider):
+        """Test that due dates keep their ISO 8601 format."""
+        encoded = provider(app).dumps(
+            {'due_date': datetime(2025, 12, 1), 'none': None}
+        )
+        assert json.loads(encoded) == {
+            'due_date': '2025-12-01T00:00:00', 'none': None
+        }
+
+    @pytest.mark.parametrize('provider', PROVIDERS)
+    def test_round_trip(self, app, provider):
+        """Test that every provider decodes what it encodes."""
+        data = {'b': [1, 2.5, 'ü'], 'a': {'nested': True}}
+        json_provider = provider(app)
+        assert json_provider.loads(json_provider.dumps(data)) == data
@@ -0,0 +1,64 @@
+"""Unit tests for the optional imports and the startup-time budget."""
+import json
+import os
+import subprocess
+import sys
+
+from backend.config import TestingConfig
+
+ROOT = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+
+
+def run_python(code, **env):
+    """
+    Run code in a fresh interpreter at the repo root; returns its parsed JSON
+    output.
+    """
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, env={**os.environ, **env},
+        capture_output=True, text=True, check=True,
+    )
+    return json.loads(result.stdout)
+
+
+class TestOptionalImports:
+    def test_disabled_features_are_not_imported(self):
+        """
+        Test that create_app imports neither the disabled features nor the ASGI
+        stack.
+        """
+        loaded = run_python(
+            "import json, sys\n"
+            "from backend.app import create_app\n"
+            "create_app('production')\n"
+            "print(json.dumps([m for m in ('prometheus_client', "
+            "'backend.metrics', 'backend.query_profiler',"
+            " 'backend.async_app', 'asgiref', 'aiosqlite', 'redis') if m in "
+            "sys.modules]))",
+            METRICS_ENABLED="false",
+            QUERY_PROFILING="false",
+        )
+        assert loaded == []
+
+
+class TestStartupBudget:
+    def test_create_app_within_budget(self):
+        """
+        Test that importing backend.app plus create_app() fits
+        STARTUP_BUDGET_SECONDS.
+        """
+        timings = run_python(
+            "import json, time\n"
+            "started = time.perf_counter()\n"
+            "from backend.app import create_app\n"
+            "create_app('production')\n"
+            "print(json.dumps({'seconds': time.perf_counter() - started}))",
+            DATABASE_URL="sqlite:///:memory:",
+        )
+        assert timings["seconds"] <= TestingConfig.STARTUP_BUDGET_SECONDS, (
+            f"startup took {timings['seconds']:.3f}s, budget "
+            f"{TestingConfig.STARTUP_BUDGET_SECONDS}s; "
+            "see python -m benchmarks.startup"
+        )
@@ -0,0 +1,95 @@
+"""Unit tests for SyncService."""
+import pytest
+
+from backend.services.sync_service import SyncService, SyncTokenError
+
+
+@pytest.fixture
+def sync_service(app):
+    """
+    A SyncService without the overlap window, so each change is sent once.
+    """
+    return SyncService(overlap_seconds=0)
+
+
+class TestSyncService:
+
+    def test_initial_sync(
+        self, app, sync_service, multiple_tasks, test_category, test_user
+    ):
+        """Test that a first sync returns every live row and no tombstones."""
+        with app.app_context():
+            changes = sync_service.changes(test_user['id'])
+
+            assert [t['id'] for t in changes['tasks']] == multiple_tasks
+            assert [c['id'] for c in changes['categories']] == [
+                test_category.id
+            ]
+            assert changes['deleted_tasks'] == []
+            assert changes['has_more'] is False
+            assert changes['next']
+
+    def test_changes_since_token(
+        self, app, sync_service, task_service, multiple_tasks, test_user
+    ):
+        """
+        Test that a token yields only what changed after it, deletions as ids.
+        """
+        with app.app_context():
+            token = sync_service.changes(test_user['id'])['next']
+            assert sync_service.changes(test_user['id'], token)['tasks'] == []
+
+            task_service.update_task(multiple_tasks[0], status='Completed')
+            task_service.delete_task(multiple_tasks[1])
+            changes = sync_service.changes(test_user['id'], token)
+
+            assert [(t['id'], t['status']) for t in changes['tasks']] == [
+                (multiple_tasks[0], 'Completed')
+            ]
+            assert changes['deleted_tasks'] == [multiple_tasks[1]]
+            assert changes['categories'] == []
+
+    def test_deleted_before_first_sync(
+        self, app, sync_service, task_service, multiple_tasks, test_user
+    ):
+        """
+        Test that rows deleted before a first sync are not sent as tombstones.
+        """
+        with app.app_context():
+            task_service.delete_task(multiple_tasks[0])
+            # A negative overlap puts the deletion before the start of the sync
+            changes = SyncService(overlap_seconds=-1).changes(test_user['id'])
+
+            assert [t['id'] for t in changes['tasks']] == multiple_tasks[1:]
+            assert changes['deleted_tasks'] == []
+
+    def test_paging(self, app, task_service, multiple_tasks, test_user):
+        """Test that a small page size pages through every row exactly once."""
+        with app.app_context():
+            service = SyncService(page_size=2, overlap_seconds=0)
+            seen, token = [], None
+            while True:
+                changes = service.changes(test_user['id'], token)
+                seen += [t['id'] for t in changes['tasks']]
+                token = changes['next']
+                if not changes['has_more']:
+                    break
+
+            assert seen == multiple_tasks
+            assert service.changes(test_user['id'], token)['tasks'] == []
+
+    def test_other_users_rows(
+        self, app, sync_service, auth_service, multiple_tasks
+    ):
+        """Test that a user's sync does not include anyone else's rows."""
+        with app.app_context():
+            other = auth_service.register_user('other', 'password123')
+            changes = sync_service.changes(other.id)
+            assert changes['tasks'] == [] and changes['categories'] == []
+
+    @pytest.mark.parametrize("token", ["garbage", "e30", "eyJ0YXNrcyI6MX0"])
+    def test_invalid_token(self, app, sync_service, test_user, token):
+        """Test that a malformed token raises SyncTokenError."""
+        with app.app_context():
+            with pytest.raises(SyncTokenError):
+                sync_service.changes(test_user['id'], token)
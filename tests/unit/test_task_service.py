@@ -1,5 +1,6 @@
 """Unit tests for TaskService."""
 import pytest
+from backend.serializers import TASK_CATEGORY_COLUMNS
 from backend.services.task_service import TaskService, TaskValidationError, TaskNotFoundError
 
 class TestTaskService:
@@ -29,4 +30,377 @@ class TestTaskService:
                     2,
                     5,
                     test_category.id
-                )
\ No newline at end of file
+                )
+
+    def test_update_task_changes_updatable_fields_only(
+        self, app, task_service, test_task
+    ):
+        """
+        Test that update_task ignores fields outside UPDATABLE_FIELDS and
+        validates the rest.
+        """
+        from datetime import datetime
+
+        with app.app_context():
+            forged = datetime(2020, 1, 1)
+            task = task_service.update_task(
+                test_task.id, title='Kept', deleted_at=forged,
+                updated_at=forged,
+            )
+
+            assert task.title == 'Kept'
+            assert task.deleted_at is None
+            assert task.updated_at > forged
+            with pytest.raises(TaskValidationError):
+                task_service.update_task(test_task.id, priority=7)
+
+    def test_deleted_category_is_rejected(
+        self, app, task_service, category_service, test_task, test_category,
+        test_user,
+    ):
+        """
+        Test that tasks cannot be created in or moved to a deleted category.
+        """
+        with app.app_context():
+            category_service.delete_category(
+                test_category.id, user_id=test_user['id']
+            )
+
+            with pytest.raises(
+                TaskValidationError, match='unknown category_id'
+            ):
+                task_service.create_task(
+                    test_user['id'], 'Orphan', None, 2, 1, test_category.id
+                )
+            with pytest.raises(
+                TaskValidationError, match='unknown category_id'
+            ):
+                task_service.update_task(
+                    test_task.id, category_id=test_category.id
+                )
+
+    def test_get_tasks_page_walks_all_tasks(
+        self, app, task_service, test_category, test_user
+    ):
+        """
+        Test that following cursors returns every task exactly once, in order.
+        """
+        with app.app_context():
+            for i in range(7):
+                task_service.create_task(
+                    test_user['id'], f'Task {i}', None, (i % 3) + 1, i,
+                    test_category.id,
+                )
+
+            seen = []
+            tasks, cursor = task_service.get_tasks_page(
+                test_user['id'], limit=3
+            )
+            seen.extend(tasks)
+            while cursor:
+                tasks, cursor = task_service.get_tasks_page(
+                    test_user['id'], limit=3, cursor=cursor
+                )
+                seen.extend(tasks)
+
+            assert len(seen) == 7
+            assert len({t.id for t in seen}) == 7
+            assert [t.priority for t in seen] == sorted(
+                t.priority for t in seen
+            )
+
+    def test_get_tasks_filters(
+        self, app, task_service, multiple_tasks, test_user
+    ):
+        """Test server-side filtering by priority and due date range."""
+        with app.app_context():
+            high = task_service.get_tasks(test_user['id'], priority=1)
+            assert [t.title for t in high] == ['High Priority Task']
+
+            early = task_service.get_tasks(
+                test_user['id'], due_before='2025-12-10'
+            )
+            assert len(early) == 2
+
+    def test_get_tasks_expand_category(
+        self, app, task_service, multiple_tasks, test_user, assert_max_queries
+    ):
+        """
+        Test that expanded listings load the categories with the tasks, in one
+        statement.
+        """
+        with app.app_context():
+            with assert_max_queries(1):
+                tasks = task_service.get_tasks(
+                    test_user['id'], expand=('category',)
+                )
+                assert {t.category.name for t in tasks} == {'Test Category'}
+
+            rows, cursor = task_service.get_tasks_page(
+                test_user['id'], limit=2, columns=TASK_CATEGORY_COLUMNS,
+                expand=('category',),
+            )
+            assert [r.category_name for r in rows] == ['Test Category'] * 2
+            assert cursor
+
+            with pytest.raises(TaskValidationError):
+                task_service.get_tasks(test_user['id'], expand=('owner',))
+
+    def test_get_tasks_page_invalid_cursor(self, app, task_service, test_user):
+        """Test that a tampered cursor is rejected."""
+        with app.app_context():
+            with pytest.raises(TaskValidationError):
+                task_service.get_tasks_page(
+                    test_user['id'], limit=2, cursor='not-a-cursor'
+                )
+
+    def test_create_tasks_reports_invalid_items(
+        self, app, task_service, test_category, test_user
+    ):
+        """Test that a batch keeps valid items and reports the invalid ones."""
+        with app.app_context():
+            created, errors = task_service.create_tasks(
+                test_user['id'],
+                [
+                    {
+                        'title': 'One', 'priority': 1, 'hours': 1,
+                        'category_id': test_category.id,
+                    },
+                    {
+                        'title': '', 'priority': 1, 'hours': 1,
+                        'category_id': test_category.id,
+                    },
+                    {
+                        'title': 'Three', 'priority': 3, 'hours': 2,
+                        'category_id': test_category.id,
+                        'due_date': '2025-12-31',
+                    },
+                ],
+            )
+
+            assert len(created) == 2
+            assert errors == [{'index': 1, 'error': 'title required'}]
+            assert [
+                t.title for t in task_service.get_tasks(test_user['id'])
+            ] == ['One', 'Three']
+
+    def test_create_tasks_atomic(
+        self, app, task_service, test_category, test_user
+    ):
+        """Test that atomic mode rejects the whole batch on any error."""
+        with app.app_context():
+            with pytest.raises(task_service.TaskBatchError) as exc:
+                task_service.create_tasks(test_user['id'], [
+                    {'title': 'One', 'priority': 1, 'hours': 1},
+                    {'title': 'Two', 'priority': 9, 'hours': 1},
+                ], atomic=True)
+
+            assert exc.value.errors == [
+                {'index': 1, 'error': 'invalid priority'}
+            ]
+            assert task_service.get_tasks(test_user['id']) == []
+
+    def test_update_and_delete_tasks(
+        self, app, task_service, multiple_tasks, test_user
+    ):
+        """
+        Test batch update and delete, including ids that are not the user's.
+        """
+        with app.app_context():
+            updated, errors = task_service.update_tasks(test_user['id'], [
+                {'id': multiple_tasks[0], 'status': 'Completed'},
+                {'id': 9999, 'status': 'Completed'},
+            ])
+            assert updated == [multiple_tasks[0]]
+            assert errors == [{'index': 1, 'error': 'task not found'}]
+            assert (
+                task_service.get_task(multiple_tasks[0]).status == 'Completed'
+            )
+
+            deleted, errors = task_service.delete_tasks(
+                test_user['id'], multiple_tasks[:2] + [9999]
+            )
+            assert deleted == multiple_tasks[:2]
+            assert errors == [{'index': 2, 'error': 'task not found'}]
+            assert len(task_service.get_tasks(test_user['id'])) == 1
+
+
+class TestTaskSearch:
+
+    def test_search_ranks_title_matches_first(
+        self, app, task_service, test_category, test_user
+    ):
+        """
+        Test that a term in the title outranks the same term in the
+        description.
+        """
+        with app.app_context():
+            task_service.create_task(
+                test_user['id'], 'Call the bank', 'about groceries', 2, 1,
+                test_category.id,
+            )
+            task_service.create_task(
+                test_user['id'], 'Buy groceries', 'milk and bread', 2, 1,
+                test_category.id,
+            )
+            task_service.create_task(
+                test_user['id'], 'Walk the dog', None, 2, 1, test_category.id
+            )
+
+            tasks, cursor = task_service.search_tasks(
+                test_user['id'], 'groceries'
+            )
+            assert [t.title for t in tasks] == [
+                'Buy groceries', 'Call the bank'
+            ]
+            assert cursor is None
+
+    def test_search_matches_prefixes_of_every_term(
+        self, app, task_service, test_category, test_user
+    ):
+        """
+        Test that each word matches as a prefix and all words are required.
+        """
+        with app.app_context():
+            task_service.create_task(
+                test_user['id'], 'Buy groceries', 'milk and bread', 2, 1,
+                test_category.id,
+            )
+            task_service.create_task(
+                test_user['id'], 'Buy a café table', None, 2, 1,
+                test_category.id,
+            )
+
+            def titles(query):
+                tasks, _ = task_service.search_tasks(test_user['id'], query)
+                return [t.title for t in tasks]
+
+            assert titles('gro mil') == ['Buy groceries']
+            assert titles('cafe') == ['Buy a café table']
+            assert titles('gro table') == []
+
+    def test_search_index_follows_writes(
+        self, app, task_service, auth_service, test_category, test_user
+    ):
+        """
+        Test that updates, bulk deletes and other users' tasks are reflected by
+        the index.
+        """
+        with app.app_context():
+            task = task_service.create_task(
+                test_user['id'], 'Renew passport', None, 2, 1, test_category.id
+            )
+            other = auth_service.register_user('someone', 'password123')
+            task_service.create_task(
+                other.id, 'Renew passport', None, 2, 1, None
+            )
+
+            assert (
+                len(task_service.search_tasks(test_user['id'], 'passport')[0])
+                == 1
+            )
+            task_service.update_task(task.id, title='Renew licence')
+            assert (
+                task_service.search_tasks(test_user['id'], 'passport')[0] == []
+            )
+            assert (
+                len(task_service.search_tasks(test_user['id'], 'licence')[0])
+                == 1
+            )
+            task_service.delete_tasks(test_user['id'], [task.id])
+            assert (
+                task_service.search_tasks(test_user['id'], 'licence')[0] == []
+            )
+
+    def test_search_pages(self, app, task_service, test_category, test_user):
+        """
+        Test that following cursors returns every match once: title matches
+        first, newest first.
+        """
+        with app.app_context():
+            in_title = [
+                task_service.create_task(
+                    test_user['id'], f'Report {i}', None, 2, 1,
+                    test_category.id,
+                ).id
+                for i in range(3)
+            ]
+            in_description = [
+                task_service.create_task(
+                    test_user['id'], f'Note {i}', 'weekly report', 2, 1,
+                    test_category.id,
+                ).id
+                for i in range(4)
+            ]
+
+            seen = []
+            tasks, cursor = task_service.search_tasks(
+                test_user['id'], 'report', limit=3
+            )
+            seen.extend(tasks)
+            while cursor:
+                tasks, cursor = task_service.search_tasks(
+                    test_user['id'], 'report', limit=3, cursor=cursor
+                )
+                seen.extend(tasks)
+
+            assert [t.id for t in seen] == in_title[::-1] + in_description[
+                ::-1
+            ]
+
+    def test_search_requires_terms(self, app, task_service, test_user):
+        """
+        Test that an empty query or a cursor of another listing is rejected.
+        """
+        with app.app_context():
+            with pytest.raises(TaskValidationError):
+                task_service.search_tasks(test_user['id'], '  "*" ')
+            with pytest.raises(TaskValidationError):
+                task_service.search_tasks(
+                    test_user['id'],
+                    'x',
+                    cursor=task_service._encode_cursor('id', 1, 1),
+                )
+
+
+class TestTaskStats:
+
+    def test_stats_aggregates(
+        self, app, task_service, multiple_tasks, test_category, test_user
+    ):
+        """
+        Test the totals, per status/priority counts and hours per category.
+        """
+        from datetime import date
+
+        with app.app_context():
+            task_service.create_task(
+                test_user['id'], 'Loose end', None, 1, 4, None
+            )
+            task_service.update_task(multiple_tasks[0], status='Completed')
+
+            stats = task_service.get_stats(
+                test_user['id'], today=date(2025, 12, 10)
+            )
+
+            assert stats['total'] == 4
+            assert stats['hours'] == 21
+            assert stats['by_status'] == {'Completed': 1, 'Pending': 3}
+            assert stats['by_priority'] == {'High': 2, 'Medium': 1, 'Low': 1}
+            # Due 2025-12-01: the completed one does not count
+            assert stats['overdue'] == 1
+            assert stats['hours_by_category'] == [
+                {'category_id': None, 'name': None, 'tasks': 1, 'hours': 4},
+                {
+                    'category_id': test_category.id, 'name': 'Test Category',
+                    'tasks': 3, 'hours': 17,
+                },
+            ]
+
+    def test_stats_without_tasks(self, app, task_service, test_user):
+        """Test the stats of a user with no tasks."""
+        with app.app_context():
+            stats = task_service.get_stats(test_user['id'])
+            assert stats['total'] == 0
+            assert stats['by_priority'] == {'High': 0, 'Medium': 0, 'Low': 0}
+            assert stats['hours_by_category'] == []
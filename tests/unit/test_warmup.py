@@ -0,0 +1,176 @@
+"""Unit tests for the startup warmup and the gunicorn settings."""
+import importlib
+import logging
+import multiprocessing
+
+import pytest
+
+from backend.database import db
+from backend.models.task import Task
+from backend.warmup import warmup
+
+
+class TestWarmup:
+    def test_warmup_runs_every_step(self, app):
+        """Test that warmup reports the time of each step."""
+        timings = warmup(app)
+        assert set(timings) == {
+            "mappers", "hash_parameters", "queries", "request"
+        }
+
+    def test_warmup_compiles_hot_queries(self, app):
+        """
+        Test that the listing queries are in the engine's statement cache
+        afterwards.
+        """
+        cache = db.engine._compiled_cache
+        cache.clear()
+        warmup(app)
+        assert len(cache) >= 5
+
+    def test_warmup_writes_nothing(self, app, multiple_tasks):
+        """Test that warmup leaves data and collection versions untouched."""
+        versions = app.extensions["response_cache"].versions
+        before = versions.get(1, "tasks")
+        warmup(app)
+        assert versions.get(1, "tasks") == before
+        assert db.session.query(Task).count() == 3
+
+
+class TestGunicornConf:
+    def load(self, monkeypatch, **env):
+        for name in (
+            "WEB_CONCURRENCY", "GUNICORN_WORKER_CLASS", "GUNICORN_PRELOAD",
+            "FLASK_ENV", "GUNICORN_MAX_REQUESTS",
+            "GUNICORN_MAX_REQUESTS_JITTER", "PROMETHEUS_MULTIPROC_DIR",
+            "GUNICORN_TIMEOUT", "WARMUP",
+        ):
+            monkeypatch.delenv(name, raising=False)
+        for name, value in env.items():
+            monkeypatch.setenv(name, value)
+        # Loading the config reconfigures the app logger; restore it afterwards
+        logger = logging.getLogger("backend")
+        monkeypatch.setattr(logger, "handlers", list(logger.handlers))
+        monkeypatch.setattr(logger, "propagate", logger.propagate)
+        monkeypatch.setattr(logger, "level", logger.level)
+        import backend.gunicorn_conf as conf
+        return importlib.reload(conf)
+
+    def share_state(self, monkeypatch, tmp_path):
+        """Configure the production app with nothing kept in one process."""
+        from backend.config import ProductionConfig
+
+        monkeypatch.setattr(
+            ProductionConfig, "SQLALCHEMY_DATABASE_URI",
+            f"sqlite:///{tmp_path / 'app.db'}",
+        )
+        monkeypatch.setattr(ProductionConfig, "CACHE_BACKEND", "shared")
+        monkeypatch.setattr(ProductionConfig, "EVENTS_BACKEND", "shared")
+
+    def test_defaults(self, monkeypatch, tmp_path):
+        """
+        Test the CPU-derived worker count, preload and request jitter defaults.
+        """
+        self.share_state(monkeypatch, tmp_path)
+        conf = self.load(monkeypatch)
+        assert conf.workers == multiprocessing.cpu_count() * 2 + 1
+        assert conf.worker_class == "gthread"
+        assert conf.threads == 4
+        assert conf.preload_app is True
+        assert conf.max_requests == 1000
+        assert conf.max_requests_jitter == 100
+
+    def test_one_worker_with_process_local_state(self, monkeypatch):
+        """
+        Test that the in-memory defaults get one worker that is never recycled.
+        """
+        conf = self.load(monkeypatch)
+        assert conf.workers == 1
+        assert conf.threads == 1
+        assert conf.max_requests == 0
+
+        with pytest.raises(RuntimeError, match="in-memory database"):
+            self.load(monkeypatch, WEB_CONCURRENCY="4")
+        with pytest.raises(RuntimeError, match="GUNICORN_MAX_REQUESTS"):
+            self.load(monkeypatch, GUNICORN_MAX_REQUESTS="500")
+        with pytest.raises(RuntimeError, match="GUNICORN_THREADS"):
+            self.load(monkeypatch, GUNICORN_THREADS="4")
+
+    def test_several_workers_need_a_shared_cache(self, monkeypatch, tmp_path):
+        """Test that a file database alone does not allow several workers."""
+        from backend.config import ProductionConfig
+
+        self.share_state(monkeypatch, tmp_path)
+        monkeypatch.setattr(ProductionConfig, "CACHE_BACKEND", "memory")
+        with pytest.raises(RuntimeError, match="CACHE_BACKEND=memory"):
+            self.load(monkeypatch, WEB_CONCURRENCY="2")
+
+    def test_unshared_events_are_turned_off(self, monkeypatch, tmp_path):
+        """
+        Test that a process-local broker turns /events off instead of the other
+        workers.
+        """
+        from backend.config import ProductionConfig
+
+        self.share_state(monkeypatch, tmp_path)
+        monkeypatch.setattr(ProductionConfig, "CACHE_BACKEND", "none")
+        monkeypatch.setattr(ProductionConfig, "EVENTS_BACKEND", "memory")
+        conf = self.load(monkeypatch)
+        assert conf.workers == multiprocessing.cpu_count() * 2 + 1
+        assert conf.events_served is False
+
+        assert (
+            self.load(monkeypatch, WEB_CONCURRENCY="1").events_served is True
+        )
+
+    def test_sync_workers_do_not_serve_events(
+        self, monkeypatch, tmp_path, app
+    ):
+        """
+        Test that sync workers turn /events off, and need no shared event
+        broker.
+        """
+        from types import SimpleNamespace
+        from backend.config import ProductionConfig
+
+        self.share_state(monkeypatch, tmp_path)
+        monkeypatch.setattr(ProductionConfig, "EVENTS_BACKEND", "memory")
+        conf = self.load(
+            monkeypatch, WEB_CONCURRENCY="2", GUNICORN_WORKER_CLASS="sync",
+            WARMUP="off",
+        )
+        assert conf.events_served is False
+
+        conf.post_worker_init(SimpleNamespace(wsgi=app))
+        assert app.config["EVENTS_ENABLED"] is False
+
+    def test_event_streams_end_before_the_timeout(self, monkeypatch):
+        """Test that streams outliving the worker timeout are refused."""
+        from backend.config import ProductionConfig
+
+        monkeypatch.setattr(ProductionConfig, "EVENTS_MAX_SECONDS", 300)
+        with pytest.raises(RuntimeError, match="EVENTS_MAX_SECONDS"):
+            self.load(monkeypatch)
+        assert (
+            self.load(monkeypatch, GUNICORN_WORKER_CLASS="sync").timeout == 30
+        )
+
+    def test_gthread_from_environment(self, monkeypatch, tmp_path):
+        """Test that the worker model and counts come from the environment."""
+        self.share_state(monkeypatch, tmp_path)
+        conf = self.load(
+            monkeypatch, WEB_CONCURRENCY="3", GUNICORN_WORKER_CLASS="gthread",
+            GUNICORN_THREADS="8", GUNICORN_PRELOAD="off",
+        )
+        assert (conf.workers, conf.worker_class, conf.threads) == (
+            3, "gthread", 8
+        )
+        assert conf.preload_app is False
+
+    def test_metrics_directory_is_prepared(self, monkeypatch, tmp_path):
+        """Test that stale multiprocess metric files are removed at startup."""
+        metrics_dir = tmp_path / "prom"
+        metrics_dir.mkdir()
+        (metrics_dir / "counter_123.db").write_bytes(b"stale")
+        self.load(monkeypatch, PROMETHEUS_MULTIPROC_DIR=str(metrics_dir))
+        assert list(metrics_dir.iterdir()) == []